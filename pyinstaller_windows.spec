@@ -93,7 +93,6 @@ excludes: list[str] = [
 	"difflib",
 	"pyreadline",
 	"optparse",
-	"numpy",
 	"PIL",
 	"xml",
 ]
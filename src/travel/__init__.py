@@ -8,7 +8,7 @@ from __future__ import annotations
 
 # Built-in Modules:
 import logging
-from typing import Union
+from typing import Any, Union
 
 # Local Modules:
 from .config import Config
@@ -36,27 +36,28 @@ def levelName(level: Union[str, int, None]) -> str:
 	return level
 
 
-cfg: Config = Config()
-if "general" not in cfg:
-	cfg["general"] = {}
-if "logging_level" not in cfg["general"]:
-	cfg["general"]["logging_level"] = logging.getLevelName(0)
-loggingLevel: str = levelName(cfg["general"]["logging_level"])
-if loggingLevel == logging.getLevelName(0) and cfg["general"]["logging_level"] not in (
-	logging.getLevelName(0),
-	0,
-):  # Invalid value in the configuration file.
-	cfg["general"]["logging_level"] = loggingLevel
-	cfg.save()
-del cfg
-
-logFile = logging.FileHandler("debug.log", mode="a", encoding="utf-8")
-logFile.setLevel(loggingLevel)
-formatter = logging.Formatter(
-	'{levelname}: from {name} in {threadName}: "{message}" @ {asctime}.{msecs:0f}',
-	datefmt="%m/%d/%Y %H:%M:%S",
-	style="{",
-)
-logFile.setFormatter(formatter)
-
-logging.basicConfig(level=logging.getLevelName(0), handlers=[logFile])
+def setupLogging() -> None:
+	"""
+	Configures logging to a rotating debug.log, using the level from the configuration.
+
+	This is not done when the package is imported, so that importing a module
+	does not read the configuration or open the log file.
+	"""
+	cfg: Config = Config.shared()
+	if "general" not in cfg:
+		cfg["general"] = {}
+	if "logging_level" not in cfg["general"]:
+		cfg["general"]["logging_level"] = logging.getLevelName(0)
+	loggingLevel: str = levelName(cfg["general"]["logging_level"])
+	if loggingLevel == logging.getLevelName(0) and cfg["general"]["logging_level"] not in (
+		logging.getLevelName(0),
+		0,
+	):  # Invalid value in the configuration file.
+		cfg["general"]["logging_level"] = loggingLevel
+		cfg.save()
+	generalCfg: dict[str, Any] = cfg["general"]
+	del cfg
+	# The pipeline is only needed once logging is set up, so it is not imported with the package.
+	from .logs import startLogging
+
+	startLogging(loggingLevel, generalCfg)
@@ -6,10 +6,31 @@
 # Future Modules:
 from __future__ import annotations
 
-# Local Modules:
-from .main import run
+# Built-in Modules:
+import sys
 
 
 if __name__ == "__main__":
+	if sys.argv[1:2] == ["batch"]:
+		# The batch engine does not need the GUI, so wx is never imported.
+		from . import setupLogging
+		from .batch import main as batch_main
+
+		setupLogging()
+		raise SystemExit(batch_main(sys.argv[2:]))
+	elif sys.argv[1:2] == ["matrix"]:
+		from . import setupLogging
+		from .matrix import main as matrix_main
+
+		setupLogging()
+		raise SystemExit(matrix_main(sys.argv[2:]))
+	elif sys.argv[1:2] == ["sweep"]:
+		from . import setupLogging
+		from .sweep import main as sweep_main
+
+		setupLogging()
+		raise SystemExit(sweep_main(sys.argv[2:]))
+	from .main import run
+
 	run()
 	raise SystemExit
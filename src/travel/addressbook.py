@@ -0,0 +1,379 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import bisect
+import json
+import logging
+import os.path
+import re
+import threading
+import time
+from collections.abc import Callable, Mapping, Sequence
+from typing import Any, Optional
+
+# Local Modules:
+from .cache import normalize_address
+from .models import Model
+from .utils import getDataPath, writeFileAtomic
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+ADDRESS_BOOK_FILE: str = "address_book.json"
+ADDRESS_BOOK_VERSION: int = 1
+DEFAULT_MAX_ENTRIES: int = 500
+DEFAULT_MAX_AGE: float = 365 * 24 * 60 * 60.0  # Seconds. Google recommends refreshing place IDs yearly.
+DEFAULT_SUGGESTIONS: int = 10
+DEFAULT_SAVE_DELAY: float = 5.0  # Seconds.
+# Locations that are already unambiguous, or that must be sent to the server as typed.
+UNRESOLVED_PATTERN: re.Pattern[str] = re.compile(
+	r"^\s*(?:place_id:|via:|enc:|[-+]?\d+(?:\.\d+)?\s*,\s*[-+]?\d+(?:\.\d+)?\s*$)", re.IGNORECASE
+)
+
+
+class Place(Model):
+	"""A geocoded address."""
+
+	__slots__: tuple[str, ...] = (
+		"text",
+		"place_id",
+		"formatted_address",
+		"lat",
+		"lng",
+		"count",
+		"last_used",
+		"geocoded",
+	)
+
+	def __init__(
+		self,
+		text: str,
+		place_id: str,
+		formatted_address: str = "",
+		lat: Optional[float] = None,
+		lng: Optional[float] = None,
+		count: int = 0,
+		last_used: float = 0.0,
+		geocoded: float = 0.0,
+	) -> None:
+		self.text: str = text
+		self.place_id: str = place_id
+		self.formatted_address: str = formatted_address
+		self.lat: Optional[float] = lat
+		self.lng: Optional[float] = lng
+		self.count: int = count
+		self.last_used: float = last_used
+		self.geocoded: float = geocoded
+
+	@classmethod
+	def from_geocode(cls, text: str, result: Mapping[str, Any]) -> Place:
+		"""
+		Creates a place from a geocoding result.
+
+		Args:
+			text: The address as the user typed it.
+			result: The first result from googlemaps.Client.geocode.
+
+		Returns:
+			The place.
+		"""
+		location: Mapping[str, Any] = result.get("geometry", {}).get("location", {})
+		return cls(
+			text=text,
+			place_id=result["place_id"],
+			formatted_address=result.get("formatted_address", ""),
+			lat=location.get("lat"),
+			lng=location.get("lng"),
+			geocoded=time.time(),
+		)
+
+	@property
+	def reference(self) -> str:
+		"""The value that identifies the place in a directions request."""
+		return f"place_id:{self.place_id}"
+
+	def to_dict(self) -> dict[str, Any]:
+		"""
+		Converts the place to a form suitable for serializing to JSON.
+
+		Returns:
+			The fields of the place.
+		"""
+		return {name: getattr(self, name) for name in self.__slots__}
+
+
+def create_address_book(settings: Mapping[str, Any]) -> Optional[AddressBook]:
+	"""
+	Creates an address book.
+
+	Args:
+		settings: The address_book section of the configuration.
+
+	Returns:
+		The address book, or None if it is disabled.
+	"""
+	if not settings.get("enabled", True):
+		return None
+	return AddressBook(
+		max_entries=settings.get("max_entries", DEFAULT_MAX_ENTRIES),
+		max_age=settings.get("max_age", DEFAULT_MAX_AGE),
+	)
+
+
+class AddressBook(object):
+	"""
+	Implements a persistent cache of geocoded addresses, with usage frequency based suggestions.
+
+	Addresses are geocoded the first time they are used, after which directions requests
+	refer to them by place ID. Suggestions are served from a sorted index of the typed
+	and formatted addresses, so looking them up never waits for the server.
+	"""
+
+	def __init__(
+		self,
+		filename: Optional[str] = None,
+		max_entries: int = DEFAULT_MAX_ENTRIES,
+		max_age: float = DEFAULT_MAX_AGE,
+		save_delay: Optional[float] = DEFAULT_SAVE_DELAY,
+	) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			filename: The path of the address book file, or None to use the default location.
+			max_entries: The maximum number of places to keep before removing the least used.
+			max_age: The number of seconds after which a place is geocoded again.
+			save_delay: The number of seconds after a change before the address book is saved to disc,
+				so that the changes from several searches are saved together, or None to only save when
+				flush is called.
+		"""
+		self.filename: str = filename if filename is not None else getDataPath(ADDRESS_BOOK_FILE)
+		self.max_entries: int = max_entries
+		self.max_age: float = max_age
+		self.save_delay: Optional[float] = save_delay
+		self._lock: threading.RLock = threading.RLock()
+		# Held while the address book is written to disc, so that saves happen one at a time.
+		self._save_lock: threading.Lock = threading.Lock()
+		self._dirty: bool = False
+		self._save_timer: Optional[threading.Timer] = None
+		self._places: dict[str, Place] = {}
+		self._index: list[tuple[str, str]] = []  # Sorted (normalized prefix text, key) pairs.
+		self.load()
+
+	def __len__(self) -> int:
+		return len(self._places)
+
+	def __contains__(self, text: object) -> bool:
+		return isinstance(text, str) and normalize_address(text) in self._places
+
+	def get(self, text: str) -> Optional[Place]:
+		"""
+		Retrieves a place without geocoding it.
+
+		Args:
+			text: The address.
+
+		Returns:
+			The place, or None if the address has not been geocoded.
+		"""
+		with self._lock:
+			return self._places.get(normalize_address(text))
+
+	def resolve(self, text: str, geocode: Callable[[str], Sequence[Mapping[str, Any]]]) -> str:
+		"""
+		Resolves an address to a place ID reference, geocoding it if necessary.
+
+		Args:
+			text: The address.
+			geocode: A callable that geocodes an address, such as googlemaps.Client.geocode.
+
+		Returns:
+			The place ID reference, or the address unchanged if it could not be geocoded.
+		"""
+		key: str = normalize_address(text)
+		if not key or UNRESOLVED_PATTERN.match(text):
+			return text
+		with self._lock:
+			place: Optional[Place] = self._places.get(key)
+		if place is None or time.time() - place.geocoded > self.max_age:
+			try:
+				results: Sequence[Mapping[str, Any]] = geocode(text)
+			except Exception as e:
+				# Directions can still be retrieved using the address as typed.
+				logger.debug("Unable to geocode %r: %s", text, e)
+				return text
+			if not results or "place_id" not in results[0]:
+				return text
+			new_place: Place = Place.from_geocode(text.strip(), results[0])
+			with self._lock:
+				if place is not None:
+					new_place.count, new_place.last_used = place.count, place.last_used
+				self._places[key] = place = new_place
+				self._evict(keep=key)
+				self._rebuild_index()
+				self._changed()
+		return place.reference
+
+	def resolve_params(
+		self, params: Mapping[str, Any], geocode: Callable[[str], Sequence[Mapping[str, Any]]]
+	) -> dict[str, Any]:
+		"""
+		Substitutes place ID references for the addresses in directions request parameters.
+
+		Args:
+			params: The keyword arguments for googlemaps.Client.directions.
+			geocode: A callable that geocodes an address, such as googlemaps.Client.geocode.
+
+		Returns:
+			A copy of the parameters with addresses resolved.
+		"""
+		result: dict[str, Any] = dict(params)
+		for name in ("origin", "destination"):
+			if isinstance(result.get(name), str):
+				result[name] = self.resolve(result[name], geocode)
+		if result.get("waypoints"):
+			result["waypoints"] = [
+				self.resolve(point, geocode) if isinstance(point, str) else point for point in result["waypoints"]
+			]
+		return result
+
+	def record_use(self, texts: Sequence[str]) -> None:
+		"""
+		Increases the usage counts of addresses, so that they are suggested first.
+
+		Args:
+			texts: The addresses that were used.
+		"""
+		now: float = time.time()
+		changed: bool = False
+		with self._lock:
+			for text in texts:
+				place: Optional[Place] = self._places.get(normalize_address(text))
+				if place is not None:
+					place.count += 1
+					place.last_used = now
+					changed = True
+			if changed:
+				self._changed()
+
+	def suggest(self, prefix: str, limit: int = DEFAULT_SUGGESTIONS) -> list[str]:
+		"""
+		Suggests addresses that start with a prefix, most frequently used first.
+
+		Args:
+			prefix: The text typed so far. Both typed and formatted addresses are matched.
+			limit: The maximum number of suggestions.
+
+		Returns:
+			The addresses as they were originally typed.
+		"""
+		prefix = normalize_address(prefix)
+		if not prefix:
+			return []
+		with self._lock:
+			start: int = bisect.bisect_left(self._index, (prefix, ""))
+			keys: set[str] = set()
+			for text, key in self._index[start:]:
+				if not text.startswith(prefix):
+					break
+				keys.add(key)
+			places: list[Place] = sorted(
+				(self._places[key] for key in keys), key=lambda place: (-place.count, -place.last_used, place.text)
+			)
+		return [place.text for place in places[:limit]]
+
+	def clear(self) -> None:
+		"""Removes all places from the address book."""
+		with self._lock:
+			self._places.clear()
+			self._index.clear()
+			self._changed()
+
+	def _changed(self) -> None:
+		# Called with the lock held.
+		self._dirty = True
+		if self._save_timer is None and self.save_delay is not None:
+			self._save_timer = threading.Timer(self.save_delay, self.flush)
+			self._save_timer.name = "address_book_save"
+			self._save_timer.daemon = True
+			self._save_timer.start()
+
+	def _evict(self, keep: str) -> None:
+		if len(self._places) <= max(0, self.max_entries):
+			return None
+		# The place that was just added has not had a chance to be used yet, so it is never removed.
+		ranked: list[tuple[str, Place]] = sorted(
+			(item for item in self._places.items() if item[0] != keep),
+			key=lambda item: (item[1].count, item[1].last_used, item[1].geocoded),
+		)
+		for key, _ in ranked[: len(self._places) - max(0, self.max_entries)]:
+			del self._places[key]
+
+	def _rebuild_index(self) -> None:
+		index: set[tuple[str, str]] = set()
+		for key, place in self._places.items():
+			index.add((key, key))
+			if place.formatted_address:
+				index.add((normalize_address(place.formatted_address), key))
+		self._index = sorted(index)
+
+	def load(self) -> None:
+		"""Loads the address book from disc."""
+		with self._lock:
+			self._places.clear()
+			self._index.clear()
+			if not os.path.exists(self.filename) or os.path.isdir(self.filename):
+				return None
+			try:
+				with open(self.filename, "r", encoding="utf-8") as fileObj:
+					data: dict[str, Any] = dict(json.load(fileObj))
+				if data.get("version") != ADDRESS_BOOK_VERSION:
+					return None
+				for item in data.get("places", []):
+					place: Place = Place(**item)
+					self._places[normalize_address(place.text)] = place
+			except (IOError, ValueError, TypeError, KeyError):
+				logger.warning(f"Ignoring unreadable address book: {self.filename}")
+				self._places.clear()
+				return None
+			self._rebuild_index()
+
+	def flush(self) -> bool:
+		"""
+		Saves the address book to disc, if it changed since it was last saved.
+
+		Returns:
+			True if the address book was saved, False if it was unchanged.
+		"""
+		return self._save(force=False)
+
+	def save(self) -> None:
+		"""Saves the address book to disc."""
+		self._save(force=True)
+
+	def _save(self, force: bool) -> bool:
+		with self._save_lock:
+			with self._lock:
+				if self._save_timer is not None:
+					self._save_timer.cancel()
+					self._save_timer = None
+				if not force and not self._dirty:
+					return False
+				self._dirty = False
+				places: list[dict[str, Any]] = [place.to_dict() for place in self._places.values()]
+			data: str = json.dumps({"version": ADDRESS_BOOK_VERSION, "places": places}, separators=(",", ":"))
+			try:
+				writeFileAtomic(self.filename, data)
+			except OSError as e:  # pragma: no cover
+				logger.warning(f"Unable to save address book: {e.strerror}")
+				with self._lock:
+					self._dirty = True
+				return False
+			return True
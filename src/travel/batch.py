@@ -0,0 +1,258 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import argparse
+import csv
+import json
+import logging
+import os.path
+import sys
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Optional, TextIO, Union
+
+# Third-party Modules:
+from googlemaps.exceptions import ApiError, HTTPError, Timeout, TransportError
+
+# Local Modules:
+from .cache import DirectionsCache, create_cache
+from .config import Config
+from .directions import DirectionsError, build_params, create_client, error_message, get_directions
+from .export import EXPORTERS, Exporter, create_exporter, export_format
+from .fetch import DEFAULT_QUERIES_PER_SECOND, DEFAULT_WORKERS, FetchPool
+from .models import Route, parse_response
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+TRUE_VALUES: frozenset[str] = frozenset(("1", "true", "yes", "on"))
+# The key of the reason a trip request could not be read, in the trips yielded by read_trips.
+ERROR_KEY: str = "_error"
+
+
+def read_trips(fileObj: TextIO, fmt: str = "jsonl") -> Iterator[dict[str, Any]]:
+	"""
+	Reads trip requests from a file, one at a time.
+
+	Args:
+		fileObj: The file object to read from.
+		fmt: The format of the file, either csv or jsonl.
+
+	Yields:
+		The trip requests. A JSON line that can not be parsed yields a trip containing only the reason,
+		under ERROR_KEY, so that it is reported as a failed trip instead of ending the batch.
+	"""
+	if fmt == "csv":
+		for row in csv.DictReader(fileObj):
+			yield {key.strip(): value for key, value in row.items() if key and value not in (None, "")}
+	elif fmt == "jsonl":
+		for line_number, line in enumerate(fileObj, 1):
+			if line.strip():
+				try:
+					yield dict(json.loads(line))
+				except (ValueError, TypeError) as e:
+					logger.debug("Unable to read line %d: %s", line_number, e)
+					yield {ERROR_KEY: f"Line {line_number}: Invalid trip request: {e}"}
+	else:
+		raise ValueError(f"Unsupported trip format: {fmt}")
+
+
+def _split(value: Union[str, Sequence[str], None]) -> list[str]:
+	if value is None:
+		return []
+	elif isinstance(value, str):
+		return [item.strip() for item in value.split("|") if item.strip()]
+	elif not isinstance(value, (list, tuple)):
+		raise TypeError(f"Expected text or a list, not {value!r}.")
+	return list(value)
+
+
+def _time(value: Union[str, int, float, None]) -> Union[datetime, int, float, None]:
+	if value is None or isinstance(value, (int, float)):
+		return value
+	elif not isinstance(value, str):
+		raise TypeError(f"Expected a time, not {value!r}.")
+	value = value.strip()
+	if value.isdigit():
+		return int(value)
+	return datetime.fromisoformat(value)
+
+
+def trip_params(trip: Mapping[str, Any]) -> dict[str, Any]:
+	"""
+	Builds the directions request parameters for a trip.
+
+	Args:
+		trip: The trip request. Waypoints and features to avoid may be lists or '|' separated strings.
+			Departure and arrival times may be Unix timestamps or ISO 8601 local times.
+
+	Returns:
+		The request parameters.
+
+	Raises:
+		DirectionsError: The trip request is invalid.
+	"""
+	if ERROR_KEY in trip:
+		raise DirectionsError(trip[ERROR_KEY])
+	try:
+		return build_params(
+			str(trip.get("origin", "")),
+			str(trip.get("destination", "")),
+			str(trip.get("mode", "driving")),
+			waypoints=_split(trip.get("waypoints")),
+			optimize_waypoints=str(trip.get("optimize_waypoints", "")).strip().lower() in TRUE_VALUES,
+			avoid=_split(trip.get("avoid")),
+			departure_time=_time(trip.get("departure_time")),
+			arrival_time=_time(trip.get("arrival_time")),
+			transit_mode=trip.get("transit_mode"),
+			transit_routing_preference=trip.get("transit_routing_preference"),
+		)
+	except (ValueError, TypeError) as e:
+		raise DirectionsError(str(e))
+
+
+def _record(trip_id: Any, future: Future[Any]) -> tuple[Any, list[Route], Optional[str]]:
+	try:
+		response: Any = future.result()
+		return trip_id, parse_response(response), None
+	except DirectionsError as e:
+		return trip_id, [], str(e)
+	except (ApiError, HTTPError, Timeout, TransportError) as e:
+		return trip_id, [], error_message(e)
+	except Exception as e:
+		# An unexpected error fails the trip, instead of ending the batch.
+		logger.exception(f"Unable to plan trip {trip_id}.")
+		return trip_id, [], f"Unexpected error: {e}"
+
+
+def run_batch(
+	trips: Iterable[Mapping[str, Any]],
+	fetch: Callable[[dict[str, Any]], Any],
+	output: TextIO,
+	workers: int = DEFAULT_WORKERS,
+	queries_per_second: float = DEFAULT_QUERIES_PER_SECOND,
+	fmt: str = "jsonl",
+) -> tuple[int, int]:
+	"""
+	Plans trips concurrently, exporting the results in the order the trips were read.
+
+	At most twice as many trips as there are workers are held in memory at once,
+	so arbitrarily large inputs can be processed.
+
+	Args:
+		trips: The trip requests.
+		fetch: A callable that retrieves the directions response for request parameters.
+		output: The file object to write the results to.
+		workers: The maximum number of concurrent requests.
+		queries_per_second: The maximum sustained request rate, or 0 for no limit.
+		fmt: The export format, one of the keys of travel.export.EXPORTERS.
+
+	Returns:
+		The number of trips that succeeded and failed.
+	"""
+	succeeded: int = 0
+	failed: int = 0
+	pending: deque[tuple[Any, Future[Any]]] = deque()
+	exporter: Exporter = create_exporter(output, fmt)
+
+	def write_next() -> None:
+		nonlocal succeeded, failed
+		trip_id, routes, error = _record(*pending.popleft())
+		if error is None:
+			succeeded += 1
+		else:
+			failed += 1
+		exporter.write(trip_id, routes, error)
+
+	workers = max(1, workers)
+	pool: FetchPool = FetchPool(fetch, workers, queries_per_second)
+	try:
+		for counter, trip in enumerate(trips):
+			trip_id: Any = trip.get("id", counter + 1)
+			future: Future[Any]
+			try:
+				future = pool.submit(trip_params(trip))
+			except Exception as e:  # Reported by _record.
+				future = Future()
+				future.set_exception(e)
+			pending.append((trip_id, future))
+			while len(pending) >= workers * 2:
+				write_next()
+		while pending:
+			write_next()
+	finally:
+		pool.shutdown()
+		exporter.close()
+	return succeeded, failed
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+	"""
+	Runs the batch directions command.
+
+	Args:
+		args: The command line arguments, or None to use sys.argv.
+
+	Returns:
+		The exit status.
+	"""
+	parser = argparse.ArgumentParser(prog="travel batch", description="Plans trips in bulk without the GUI.")
+	parser.add_argument("input", help="The trip requests, either a CSV file with a header row or JSON lines.")
+	parser.add_argument("-o", "--output", help="The file to write the results to. Defaults to stdout.")
+	parser.add_argument("-f", "--format", choices=("csv", "jsonl"), help="The format of the input file.")
+	parser.add_argument(
+		"-e",
+		"--export-format",
+		choices=tuple(EXPORTERS),
+		help="The format of the results. Defaults to the extension of the output file, or jsonl.",
+	)
+	parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent requests.")
+	parser.add_argument(
+		"-q",
+		"--queries-per-second",
+		type=float,
+		default=DEFAULT_QUERIES_PER_SECOND,
+		help="The maximum request rate.",
+	)
+	parser.add_argument("--no-cache", action="store_true", help="Do not use the directions cache.")
+	options = parser.parse_args(args)
+	fmt: str = options.format or ("csv" if os.path.splitext(options.input)[1].lower() == ".csv" else "jsonl")
+	export_fmt: str = options.export_format or export_format(options.output or "", default="jsonl")
+	cfg = Config.shared()
+	maps_client_cfg: dict[str, Any] = cfg.get("maps_client", {})
+	cache_cfg: dict[str, Any] = cfg.get("cache", {})
+	del cfg
+	try:
+		client = create_client(maps_client_cfg)
+	except DirectionsError as e:
+		print(e, file=sys.stderr)
+		return 1
+	cache: Union[DirectionsCache, None] = None if options.no_cache else create_cache(cache_cfg)
+
+	def fetch(params: dict[str, Any]) -> Any:
+		return get_directions(client, params, cache)
+
+	with open(options.input, "r", encoding="utf-8", newline="") as inputObj:
+		trips: Iterator[dict[str, Any]] = read_trips(inputObj, fmt)
+		if options.output:
+			with open(options.output, "w", encoding="utf-8", newline="") as outputObj:
+				succeeded, failed = run_batch(
+					trips, fetch, outputObj, options.workers, options.queries_per_second, export_fmt
+				)
+		else:
+			succeeded, failed = run_batch(
+				trips, fetch, sys.stdout, options.workers, options.queries_per_second, export_fmt
+			)
+	if cache is not None:
+		cache.flush()
+	print(f"{succeeded} trips planned, {failed} failed.", file=sys.stderr)
+	return 0 if not failed else 2
@@ -0,0 +1,310 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks for request building, result formatting, and cache lookups.
+
+Run with `python -m travel.bench`. Results can be written as JSON, and compared
+against the results from another commit to catch performance regressions.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import argparse
+import functools
+import json
+import os.path
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from typing import Any, Optional
+
+# Local Modules:
+from .cache import DirectionsCache, cache_key
+from .directions import (
+	build_params,
+	instructions_to_text,
+	process_leg,
+	process_results,
+	process_route,
+	process_step,
+	process_sub_step,
+)
+from .models import Leg, Route, Step, parse_response
+from .samples import MANEUVERS, SAMPLES
+
+
+BENCH_VERSION: int = 1
+DEFAULT_REPEAT: int = 5
+DEFAULT_THRESHOLD: float = 0.1  # Fraction of the baseline time.
+DEFAULT_STARTUP_MODULES: tuple[str, ...] = ("travel.main",)
+SOURCE_DIRECTORY: str = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def measure(
+	func: Callable[[], Any], repeat: int = DEFAULT_REPEAT, number: Optional[int] = None
+) -> dict[str, Any]:
+	"""
+	Times a function.
+
+	Args:
+		func: The function to time.
+		repeat: The number of timing runs.
+		number: The number of calls per run, or None to determine it automatically.
+
+	Returns:
+		The number of calls per run, and the minimum and median seconds per call.
+	"""
+	timer: timeit.Timer = timeit.Timer(func)
+	if number is None:
+		number = timer.autorange()[0]
+	timings: list[float] = [total / number for total in timer.repeat(max(1, repeat), number)]
+	return {"number": number, "min": min(timings), "median": statistics.median(timings)}
+
+
+def import_time(module: str) -> float:
+	"""
+	Measures the time taken to import a module in a new interpreter, using `python -X importtime`.
+
+	Args:
+		module: The name of the module.
+
+	Returns:
+		The cumulative import time of the module and its dependencies, in seconds.
+
+	Raises:
+		RuntimeError: The module could not be imported.
+	"""
+	env: dict[str, str] = dict(os.environ)
+	env["PYTHONPATH"] = os.pathsep.join(filter(None, (SOURCE_DIRECTORY, env.get("PYTHONPATH"))))
+	process: subprocess.CompletedProcess[str] = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", f"import {module}"],
+		capture_output=True,
+		text=True,
+		env=env,
+	)
+	lines: list[str] = process.stderr.splitlines()
+	if process.returncode != 0:
+		raise RuntimeError(lines[-1] if lines else f"Unable to import {module}.")
+	# Lines are formatted as "import time: self [us] | cumulative | imported package".
+	for line in reversed(lines):
+		fields: list[str] = line.split("|")
+		if len(fields) == 3 and fields[2].strip() == module:
+			return int(fields[1]) / 1e6
+	raise RuntimeError(f"No import time reported for {module}.")
+
+
+def measure_import(module: str, repeat: int = DEFAULT_REPEAT) -> dict[str, Any]:
+	"""
+	Measures the import time of a module repeatedly.
+
+	Args:
+		module: The name of the module.
+		repeat: The number of timing runs.
+
+	Returns:
+		The number of imports per run, and the minimum and median seconds per import.
+	"""
+	timings: list[float] = [import_time(module) for _ in range(max(1, repeat))]
+	return {"number": 1, "min": min(timings), "median": statistics.median(timings)}
+
+
+def _legs(routes: Sequence[Route]) -> Iterator[Leg]:
+	return (leg for route in routes for leg in route.legs)
+
+
+def _steps(routes: Sequence[Route]) -> Iterator[Step]:
+	return (step for leg in _legs(routes) for step in leg.steps)
+
+
+def _sub_steps(routes: Sequence[Route]) -> Iterator[Step]:
+	return (sub_step for step in _steps(routes) for sub_step in step.steps)
+
+
+def _process_routes(routes: Sequence[Route]) -> list[str]:
+	return [process_route(route) for route in routes]
+
+
+def benchmarks(cache_dir: str) -> dict[str, Callable[[], Any]]:
+	"""
+	Defines the benchmarks.
+
+	Args:
+		cache_dir: A directory where the cache benchmarks may store their file.
+
+	Returns:
+		The benchmark functions, by name.
+	"""
+	result: dict[str, Callable[[], Any]] = {}
+	responses: dict[str, list[dict[str, Any]]] = {name: sample() for name, sample in SAMPLES.items()}
+	for name, response in responses.items():
+		routes: list[Route] = parse_response(response)
+
+		def cold(response: list[dict[str, Any]] = response) -> list[str]:
+			# A response that was just retrieved has not had its instructions converted yet.
+			instructions_to_text.cache_clear()
+			return process_results(response)
+
+		result[f"process_results.{name}"] = cold
+		result[f"parse_response.{name}"] = functools.partial(parse_response, response)
+		result[f"process_route.{name}"] = functools.partial(_process_routes, routes)
+	routes = [route for response in responses.values() for route in parse_response(response)]
+	legs: list[Leg] = list(_legs(routes))
+	steps: list[Step] = list(_steps(routes))
+	sub_steps: list[Step] = list(_sub_steps(routes))
+	result["process_leg"] = lambda: [process_leg(leg) for leg in legs]
+	result["process_step"] = lambda: [process_step(step) for step in steps]
+	result["process_sub_step"] = lambda: [process_sub_step(sub_step) for sub_step in sub_steps]
+	uncached: Callable[[str], tuple[str, ...]] = instructions_to_text.__wrapped__
+	result["instructions_to_text"] = lambda: [uncached(html) for html in MANEUVERS]
+	result["build_params.driving"] = lambda: build_params(
+		"100 Main St, Springfield",
+		"City Hall, Shelbyville",
+		"driving",
+		waypoints=["Capital City", "", "Ogdenville"],
+		optimize_waypoints=True,
+		avoid=["tolls", "ferries"],
+	)
+	result["build_params.transit"] = lambda: build_params(
+		"Station 0",
+		"Station 2",
+		"transit",
+		arrival_time=1_700_000_000,
+		transit_mode="rail",
+		transit_routing_preference="less_walking",
+	)
+	params: dict[str, Any] = result["build_params.driving"]()
+	cache: DirectionsCache = DirectionsCache(os.path.join(cache_dir, "bench_cache.json"))
+	cache.put(params, responses["long_drive"])
+	missing: dict[str, Any] = {**params, "destination": "Nowhere"}
+	result["cache.key"] = lambda: cache_key(params)
+	result["cache.hit"] = lambda: cache.get(params)
+	result["cache.miss"] = lambda: cache.get(missing)
+	return result
+
+
+def run(
+	names: Optional[Sequence[str]] = None,
+	repeat: int = DEFAULT_REPEAT,
+	number: Optional[int] = None,
+	startup: Sequence[str] = (),
+) -> dict[str, Any]:
+	"""
+	Runs the benchmarks.
+
+	Args:
+		names: Substrings of the names of the benchmarks to run, or None to run all of them.
+		repeat: The number of timing runs per benchmark.
+		number: The number of calls per run, or None to determine it automatically.
+		startup: The modules whose import times should be measured.
+
+	Returns:
+		The results, in a form suitable for serializing to JSON.
+	"""
+	results: dict[str, Any] = {}
+	with tempfile.TemporaryDirectory() as cache_dir:
+		for name, func in benchmarks(cache_dir).items():
+			if names and not any(item in name for item in names):
+				continue
+			results[name] = measure(func, repeat, number)
+	for module in startup:
+		try:
+			results[f"import.{module}"] = measure_import(module, repeat)
+		except RuntimeError as e:
+			print(f"Unable to measure the import time of {module}: {e}", file=sys.stderr)
+	return {
+		"version": BENCH_VERSION,
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"results": results,
+	}
+
+
+def compare(
+	baseline: Mapping[str, Any], current: Mapping[str, Any], threshold: float = DEFAULT_THRESHOLD
+) -> list[str]:
+	"""
+	Finds the benchmarks that regressed.
+
+	Args:
+		baseline: The results from a previous run.
+		current: The results from this run.
+		threshold: The fraction by which a benchmark must be slower than the baseline to be reported.
+
+	Returns:
+		A description of each regression.
+	"""
+	regressions: list[str] = []
+	for name, result in current["results"].items():
+		before: Optional[Mapping[str, Any]] = baseline["results"].get(name)
+		if before is None or not before["min"]:
+			continue
+		ratio: float = result["min"] / before["min"]
+		if ratio > 1 + threshold:
+			regressions.append(
+				f"{name}: {ratio:.2f}x slower ({before['min'] * 1e6:.1f} to {result['min'] * 1e6:.1f} us)"
+			)
+	return regressions
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+	"""
+	Runs the benchmark command.
+
+	Args:
+		args: The command line arguments, or None to use sys.argv.
+
+	Returns:
+		The exit status.
+	"""
+	parser = argparse.ArgumentParser(prog="travel.bench", description="Benchmarks Travel Directions.")
+	parser.add_argument("names", nargs="*", help="Only run benchmarks whose names contain these strings.")
+	parser.add_argument("-o", "--output", help="The file to write the JSON results to.")
+	parser.add_argument("-c", "--compare", help="A JSON results file from a previous run to compare against.")
+	parser.add_argument(
+		"-t",
+		"--threshold",
+		type=float,
+		default=DEFAULT_THRESHOLD,
+		help="The fraction by which a benchmark may be slower than the baseline.",
+	)
+	parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT, help="Timing runs per benchmark.")
+	parser.add_argument(
+		"-n", "--number", type=int, help="Calls per timing run. Determined automatically if omitted."
+	)
+	parser.add_argument(
+		"-s",
+		"--startup",
+		nargs="*",
+		metavar="MODULE",
+		help=f"Also measure the import times of modules. Defaults to {', '.join(DEFAULT_STARTUP_MODULES)}.",
+	)
+	options = parser.parse_args(args)
+	startup: Sequence[str] = ()
+	if options.startup is not None:
+		startup = options.startup or DEFAULT_STARTUP_MODULES
+	current: dict[str, Any] = run(options.names, options.repeat, options.number, startup)
+	for name, result in current["results"].items():
+		print(f"{name:<32} {result['min'] * 1e6:>12.1f} us  (median {result['median'] * 1e6:.1f} us)")
+	if options.output:
+		with open(options.output, "w", encoding="utf-8") as fileObj:
+			json.dump(current, fileObj, indent=2, sort_keys=True)
+	if options.compare:
+		with open(options.compare, "r", encoding="utf-8") as fileObj:
+			regressions: list[str] = compare(json.load(fileObj), current, options.threshold)
+		for regression in regressions:
+			print(regression, file=sys.stderr)
+		return 1 if regressions else 0
+	return 0
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
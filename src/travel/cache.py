@@ -0,0 +1,327 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import json
+import logging
+import os
+import os.path
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any, Optional, Union
+
+# Local Modules:
+from .utils import getDataPath, writeFileAtomic
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+CACHE_FILE: str = "directions_cache.json"
+CACHE_VERSION: int = 1
+DEFAULT_TTL: float = 3600.0  # Seconds.
+DEFAULT_MAX_ENTRIES: int = 256
+DEFAULT_TIME_BUCKET: int = 300  # Seconds.
+DEFAULT_SAVE_DELAY: float = 5.0  # Seconds.
+TIME_PARAMS: tuple[str, ...] = ("departure_time", "arrival_time")
+ADDRESS_PARAMS: tuple[str, ...] = ("origin", "destination")
+
+
+def normalize_address(address: str) -> str:
+	"""
+	Normalizes a free-text address for comparison.
+
+	Args:
+		address: The address.
+
+	Returns:
+		The address with surrounding white space removed, inner white space collapsed, and case folded.
+	"""
+	return " ".join(address.split()).casefold()
+
+
+def bucket_time(value: Union[int, float, datetime, str, None], bucket: int) -> int:
+	"""
+	Rounds a departure or arrival time down to the start of its bucket.
+
+	Args:
+		value: A Unix timestamp, a datetime, or None / "now" for the current time.
+		bucket: The size of the bucket in seconds.
+
+	Returns:
+		The Unix timestamp of the start of the bucket.
+	"""
+	timestamp: float
+	if value is None or value == "now":
+		timestamp = time.time()
+	elif isinstance(value, datetime):
+		timestamp = value.timestamp()
+	else:
+		timestamp = float(value)
+	bucket = max(1, bucket)
+	return int(timestamp // bucket * bucket)
+
+
+def normalize_params(params: Mapping[str, Any], time_bucket: int = DEFAULT_TIME_BUCKET) -> dict[str, Any]:
+	"""
+	Canonicalizes directions request parameters so that equivalent requests compare equal.
+
+	Args:
+		params: The keyword arguments that would be passed to googlemaps.Client.directions.
+		time_bucket: The size in seconds of the buckets used for departure and arrival times.
+
+	Returns:
+		The canonical parameters.
+	"""
+	result: dict[str, Any] = {}
+	for key, value in params.items():
+		if key in ADDRESS_PARAMS and isinstance(value, str):
+			result[key] = normalize_address(value)
+		elif key == "waypoints" and isinstance(value, (list, tuple)):
+			waypoints: list[Any] = [
+				normalize_address(point) if isinstance(point, str) else point for point in value
+			]
+			result[key] = [point for point in waypoints if point]
+		elif key == "avoid" and isinstance(value, (list, tuple)):
+			result[key] = sorted(set(value))
+		elif key in TIME_PARAMS:
+			result[key] = bucket_time(value, time_bucket)
+		elif key == "mode" and isinstance(value, str):
+			result[key] = value.lower()
+		else:
+			result[key] = value
+	if not result.get("waypoints"):
+		# An empty waypoints list, and the optimize flag that goes with it, do not change the response.
+		result.pop("waypoints", None)
+		result.pop("optimize_waypoints", None)
+	if not result.get("avoid"):
+		result.pop("avoid", None)
+	return result
+
+
+def cache_key(params: Mapping[str, Any], time_bucket: int = DEFAULT_TIME_BUCKET) -> str:
+	"""
+	Generates a cache key for directions request parameters.
+
+	Args:
+		params: The keyword arguments that would be passed to googlemaps.Client.directions.
+		time_bucket: The size in seconds of the buckets used for departure and arrival times.
+
+	Returns:
+		The cache key.
+	"""
+	return json.dumps(normalize_params(params, time_bucket), sort_keys=True, separators=(",", ":"))
+
+
+def create_cache(settings: Mapping[str, Any]) -> Optional[DirectionsCache]:
+	"""
+	Creates a directions cache.
+
+	Args:
+		settings: The cache section of the configuration.
+
+	Returns:
+		The cache, or None if caching is disabled.
+	"""
+	if not settings.get("enabled", True):
+		return None
+	return DirectionsCache(
+		ttl=settings.get("ttl", DEFAULT_TTL),
+		max_entries=settings.get("max_entries", DEFAULT_MAX_ENTRIES),
+		time_bucket=settings.get("time_bucket", DEFAULT_TIME_BUCKET),
+	)
+
+
+class DirectionsCache(object):
+	"""
+	Implements a persistent, size bounded, least recently used cache of directions responses.
+	"""
+
+	def __init__(
+		self,
+		filename: Optional[str] = None,
+		ttl: float = DEFAULT_TTL,
+		max_entries: int = DEFAULT_MAX_ENTRIES,
+		time_bucket: int = DEFAULT_TIME_BUCKET,
+		save_delay: Optional[float] = DEFAULT_SAVE_DELAY,
+	) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			filename: The path of the cache file, or None to use the default location in the data directory.
+			ttl: The number of seconds a response remains valid.
+			max_entries: The maximum number of responses to keep before evicting the least recently used.
+			time_bucket: The size in seconds of the buckets used for departure and arrival times.
+			save_delay: The number of seconds after a change before the cache is saved to disc, so that
+				several changes are saved together, or None to only save when flush is called.
+		"""
+		self.filename: str = filename if filename is not None else getDataPath(CACHE_FILE)
+		self.ttl: float = ttl
+		self.max_entries: int = max_entries
+		self.time_bucket: int = time_bucket
+		self.save_delay: Optional[float] = save_delay
+		self._lock: threading.RLock = threading.RLock()
+		# Held while the cache is written to disc, so that saves happen one at a time.
+		self._save_lock: threading.Lock = threading.Lock()
+		self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+		self._dirty: bool = False
+		self._save_timer: Optional[threading.Timer] = None
+		self.load()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def __contains__(self, params: object) -> bool:
+		return isinstance(params, Mapping) and self.get(params) is not None
+
+	def key(self, params: Mapping[str, Any]) -> str:
+		"""
+		Generates the cache key for directions request parameters.
+
+		Args:
+			params: The keyword arguments that would be passed to googlemaps.Client.directions.
+
+		Returns:
+			The cache key.
+		"""
+		return cache_key(params, self.time_bucket)
+
+	def get(self, params: Mapping[str, Any]) -> Optional[Any]:
+		"""
+		Retrieves a cached response.
+
+		Args:
+			params: The keyword arguments that would be passed to googlemaps.Client.directions.
+
+		Returns:
+			The cached response, or None if not cached or expired.
+		"""
+		key: str = self.key(params)
+		with self._lock:
+			if key not in self._entries:
+				return None
+			timestamp, response = self._entries[key]
+			if time.time() - timestamp > self.ttl:
+				del self._entries[key]
+				return None
+			self._entries.move_to_end(key)
+		logger.debug("Directions cache hit.")
+		return response
+
+	def put(self, params: Mapping[str, Any], response: Any) -> None:
+		"""
+		Adds a response to the cache.
+
+		Args:
+			params: The keyword arguments that were passed to googlemaps.Client.directions.
+			response: The response.
+		"""
+		key: str = self.key(params)
+		with self._lock:
+			self._entries[key] = (time.time(), response)
+			self._entries.move_to_end(key)
+			self._evict()
+			self._changed()
+
+	def put_many(self, items: Iterable[tuple[Mapping[str, Any], Any]]) -> None:
+		"""
+		Adds several responses to the cache.
+
+		Args:
+			items: Pairs of request parameters and responses.
+		"""
+		with self._lock:
+			now: float = time.time()
+			for params, response in items:
+				key: str = self.key(params)
+				self._entries[key] = (now, response)
+				self._entries.move_to_end(key)
+			self._evict()
+			self._changed()
+
+	def clear(self) -> None:
+		"""Removes all responses from the cache."""
+		with self._lock:
+			self._entries.clear()
+			self._changed()
+
+	def _changed(self) -> None:
+		# Called with the lock held.
+		self._dirty = True
+		if self._save_timer is None and self.save_delay is not None:
+			self._save_timer = threading.Timer(self.save_delay, self.flush)
+			self._save_timer.name = "cache_save"
+			self._save_timer.daemon = True
+			self._save_timer.start()
+
+	def _evict(self) -> None:
+		now: float = time.time()
+		for key in [key for key, (timestamp, _) in self._entries.items() if now - timestamp > self.ttl]:
+			del self._entries[key]
+		while len(self._entries) > max(0, self.max_entries):
+			self._entries.popitem(last=False)
+
+	def load(self) -> None:
+		"""Loads the cache from disc."""
+		with self._lock:
+			self._entries.clear()
+			if not os.path.exists(self.filename) or os.path.isdir(self.filename):
+				return None
+			try:
+				with open(self.filename, "r", encoding="utf-8") as fileObj:
+					data: dict[str, Any] = dict(json.load(fileObj))
+			except (IOError, ValueError, TypeError):
+				logger.warning(f"Ignoring unreadable directions cache: {self.filename}")
+				return None
+			if data.get("version") != CACHE_VERSION:
+				return None
+			for key, timestamp, response in data.get("entries", []):
+				self._entries[key] = (float(timestamp), response)
+			self._evict()
+
+	def flush(self) -> bool:
+		"""
+		Saves the cache to disc, if it changed since it was last saved.
+
+		Returns:
+			True if the cache was saved, False if it was unchanged.
+		"""
+		return self._save(force=False)
+
+	def save(self) -> None:
+		"""Saves the cache to disc."""
+		self._save(force=True)
+
+	def _save(self, force: bool) -> bool:
+		with self._save_lock:
+			with self._lock:
+				if self._save_timer is not None:
+					self._save_timer.cancel()
+					self._save_timer = None
+				if not force and not self._dirty:
+					return False
+				self._dirty = False
+				entries: list[list[Any]] = [
+					[key, timestamp, response] for key, (timestamp, response) in self._entries.items()
+				]
+			# The cache is written to a temporary file, which then replaces the cache file, so an
+			# interrupted save never leaves a partially written file behind. Lookups and additions
+			# are not blocked while it is written.
+			data: str = json.dumps({"version": CACHE_VERSION, "entries": entries}, separators=(",", ":"))
+			try:
+				writeFileAtomic(self.filename, data)
+			except OSError as e:  # pragma: no cover
+				logger.warning(f"Unable to save directions cache: {e.strerror}")
+				with self._lock:
+					self._dirty = True
+				return False
+			return True
@@ -0,0 +1,74 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+A maps client that sends each request once, for callers that retry failed requests themselves.
+
+This module imports googlemaps, so it is imported when first used.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import time
+from collections.abc import Callable
+from typing import Any, Optional
+
+# Third-party Modules:
+import googlemaps
+import requests
+from googlemaps.exceptions import Timeout, TransportError
+
+
+class SingleAttemptClient(googlemaps.Client):  # type: ignore[misc, no-any-unimported]
+	"""
+	Implements a maps client that never retries a request.
+
+	googlemaps.Client retries server errors and quota exceeded responses itself, with its own delays,
+	which would be added to those of a resilience policy. This client raises HTTPError for server errors,
+	and _OverQueryLimit for quota exceeded responses, after a single attempt.
+	"""
+
+	def __init__(self, *args: Any, **kwargs: Any) -> None:
+		kwargs["retry_over_query_limit"] = False
+		super().__init__(*args, **kwargs)
+
+	def _request(
+		self,
+		url: str,
+		params: Any,
+		first_request_time: Any = None,
+		retry_counter: int = 0,
+		base_url: Optional[str] = None,
+		accepts_clientid: bool = True,
+		extract_body: Optional[Callable[[requests.Response], Any]] = None,
+		requests_kwargs: Optional[dict[str, Any]] = None,
+		post_json: Any = None,
+	) -> Any:
+		# Replaces the method of googlemaps.Client, without the retries.
+		if base_url is None:
+			base_url = self.base_url
+		authed_url: str = self._generate_auth_url(url, params, accepts_clientid)
+		final_requests_kwargs: dict[str, Any] = dict(self.requests_kwargs, **(requests_kwargs or {}))
+		requests_method: Callable[..., requests.Response] = self.session.get
+		if post_json is not None:
+			requests_method = self.session.post
+			final_requests_kwargs["json"] = post_json
+		try:
+			response: requests.Response = requests_method(base_url + authed_url, **final_requests_kwargs)
+		except requests.exceptions.Timeout:
+			raise Timeout() from None
+		except Exception as e:
+			raise TransportError(e) from None
+		# Keeps the query rate of googlemaps.Client.
+		if self.sent_times and len(self.sent_times) == self.queries_quota:
+			elapsed_since_earliest: float = time.time() - self.sent_times[0]
+			if elapsed_since_earliest < 1:
+				time.sleep(1 - elapsed_since_earliest)
+		# Server errors raise HTTPError, since the status is not 200.
+		result: Any = extract_body(response) if extract_body is not None else self._get_body(response)
+		self.sent_times.append(time.time())
+		return result
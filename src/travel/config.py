@@ -7,11 +7,15 @@
 from __future__ import annotations
 
 # Built-in Modules:
+import copy
 import json
+import os
 import os.path
+import tempfile
 import threading
 from collections.abc import Iterator
-from typing import Any, MutableMapping
+from contextlib import suppress
+from typing import Any, MutableMapping, Optional
 
 # Local Modules:
 from .utils import getDataPath
@@ -27,9 +31,14 @@ class ConfigError(Exception):
 class Config(MutableMapping[str, Any]):
 	"""
 	Implements loading and saving of program configuration.
+
+	Parsed files are cached for the life of the process, keyed by their modification time and size,
+	so constructing a Config only parses files that have changed on disc.
 	"""
 
 	_configLock: threading.RLock = threading.RLock()
+	_parsed: dict[str, tuple[tuple[int, int], dict[str, Any]]] = {}
+	_instances: dict[str, Config] = {}
 
 	def __init__(self, name: str = "config") -> None:
 		"""
@@ -41,42 +50,134 @@ class Config(MutableMapping[str, Any]):
 		super().__init__()
 		self._name: str = name
 		self._config: dict[str, Any] = dict()
+		self._signatures: dict[str, Optional[tuple[int, int]]] = {}
 		self.reload()
 
+	@classmethod
+	def shared(cls, name: str = "config") -> Config:
+		"""
+		Retrieves the configuration instance that is shared by the whole program.
+
+		Args:
+			name: The name of the configuration.
+
+		Returns:
+			The shared instance, created the first time it is requested.
+		"""
+		with cls._configLock:
+			if name not in cls._instances:
+				cls._instances[name] = cls(name)
+			return cls._instances[name]
+
 	@property
 	def name(self) -> str:
 		"""The name of the configuration."""
 		return self._name
 
+	@property
+	def filenames(self) -> tuple[str, str]:
+		"""The paths of the sample configuration file, and the configuration file."""
+		return (
+			os.path.join(DATA_DIRECTORY, f"{self.name}.json.sample"),
+			os.path.join(DATA_DIRECTORY, f"{self.name}.json"),
+		)
+
+	@staticmethod
+	def _signature(filename: str) -> Optional[tuple[int, int]]:
+		try:
+			result: os.stat_result = os.stat(filename)
+		except OSError:
+			return None
+		return (result.st_mtime_ns, result.st_size)
+
 	def _parse(self, filename: str) -> dict[str, Any]:
-		filename = os.path.join(DATA_DIRECTORY, filename)
 		if not os.path.exists(filename):
 			return {}
 		elif os.path.isdir(filename):
 			raise ConfigError(f"'{filename}' is a directory, not a file.")
 		with self._configLock:
+			signature: Optional[tuple[int, int]] = self._signature(filename)
+			cached: Optional[tuple[tuple[int, int], dict[str, Any]]] = self._parsed.get(filename)
+			if signature is not None and cached is not None and cached[0] == signature:
+				return copy.deepcopy(cached[1])
 			try:
 				with open(filename, "r", encoding="utf-8") as fileObj:
-					return dict(json.load(fileObj))
+					data: dict[str, Any] = dict(json.load(fileObj))
 			except IOError as e:  # pragma: no cover
 				raise ConfigError(f"{e.strerror}: '{e.filename}'")
 			except ValueError:
 				raise ConfigError(f"Corrupted json file: {filename}")
+			if signature is not None:
+				self._parsed[filename] = (signature, copy.deepcopy(data))
+			return data
 
 	def reload(self) -> None:
 		"""Reloads the configuration from disc."""
-		self._config.clear()
-		self._config.update(self._parse(f"{self.name}.json.sample"))
-		self._config.update(self._parse(f"{self.name}.json"))
+		with self._configLock:
+			self._config.clear()
+			for filename in self.filenames:
+				self._signatures[filename] = self._signature(filename)
+				self._config.update(self._parse(filename))
 
-	def save(self) -> None:
-		"""Saves the configuration to disc."""
-		filename: str = os.path.join(DATA_DIRECTORY, f"{self.name}.json")
+	def changed(self) -> bool:
+		"""
+		Determines whether the configuration files have changed on disc since they were loaded.
+
+		Returns:
+			True if changed, False otherwise.
+		"""
+		return any(self._signature(filename) != self._signatures.get(filename) for filename in self.filenames)
+
+	def refresh(self) -> bool:
+		"""
+		Reloads the configuration from disc if the files have changed.
+
+		Unsaved changes are discarded when the configuration is reloaded.
+
+		Returns:
+			True if the configuration was reloaded, False otherwise.
+		"""
 		with self._configLock:
-			with open(filename, "w", encoding="utf-8", newline="\r\n") as fileObj:
-				# Configuration should be stored using Windows style line endings (\r\n)
-				# so the file can be viewed in Notepad.
-				json.dump(self._config, fileObj, sort_keys=True, indent=2)
+			if not self.changed():
+				return False
+			self.reload()
+			return True
+
+	def save(self) -> bool:
+		"""
+		Saves the configuration to disc, if it differs from the saved configuration.
+
+		The configuration is written to a temporary file, which then replaces the configuration file,
+		so an interrupted save never leaves a partially written file behind.
+
+		Returns:
+			True if the configuration was saved, False if it was unchanged.
+		"""
+		filename: str = self.filenames[1]
+		data: str = json.dumps(self._config, sort_keys=True, indent=2)
+		with self._configLock:
+			with suppress(OSError):
+				# Line endings are translated when reading.
+				with open(filename, "r", encoding="utf-8") as fileObj:
+					if fileObj.read() == data:
+						return False
+			fileDescriptor, tempName = tempfile.mkstemp(
+				prefix=f".{self.name}.", suffix=".tmp", dir=DATA_DIRECTORY
+			)
+			try:
+				with open(fileDescriptor, "w", encoding="utf-8", newline="\r\n") as fileObj:
+					# Configuration should be stored using Windows style line endings (\r\n)
+					# so the file can be viewed in Notepad.
+					fileObj.write(data)
+					fileObj.flush()
+					os.fsync(fileObj.fileno())
+				os.replace(tempName, filename)
+			except BaseException:
+				with suppress(OSError):
+					os.remove(tempName)
+				raise
+			self._signatures[filename] = self._signature(filename)
+			return True
 
 	def __getitem__(self, key: str) -> Any:
 		return self._config[key]
@@ -0,0 +1,711 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import calendar
+import functools
+import logging
+from collections.abc import Iterator, Mapping, Sequence
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+# Local Modules:
+from .cache import DirectionsCache
+from .fetch import DEFAULT_WORKERS
+from .metrics import increment, record, span
+from .models import Leg, Route, Step, TransitDetails, parse_response
+from .similarity import distinct_routes, route_labels
+
+
+if TYPE_CHECKING:  # pragma: no cover
+	# These are imported when first used, since importing them noticeably slows startup.
+	import googlemaps
+	import requests
+
+	from .geometry import RouteGeometry  # Which imports NumPy.
+	from .resilience import Resilience  # Which imports this module.
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+INSTRUCTIONS_CACHE_SIZE: int = 4096
+ASCII_SPACES: str = "\x20\x0a\x09\x0c\x0d"
+PRESERVE_WHITESPACE_TAGS: frozenset[str] = frozenset(("pre", "textarea"))
+EMPTY_TRANSIT_DETAILS: TransitDetails = TransitDetails()
+DEFAULT_BASE_URL: str = "https://maps.googleapis.com"
+DEFAULT_TIMEOUT: int = 20  # Seconds.
+DEFAULT_RETRIES: int = 2
+DEFAULT_BACKOFF_FACTOR: float = 0.25  # Seconds.
+MAX_WAYPOINTS: int = 25  # The most waypoints the server accepts in a single request.
+MODES: tuple[str, ...] = ("driving", "walking", "bicycling", "transit")
+AVOID: tuple[str, ...] = ("highways", "tolls", "ferries", "indoor")
+TRANSIT_MODES: tuple[str, ...] = ("bus", "rail")
+TRANSIT_ROUTING_PREFERENCES: tuple[str, ...] = ("less_walking", "fewer_transfers")
+
+
+class DirectionsError(Exception):
+	"""Implements the base class for directions exceptions."""
+
+
+class MissingAPIKeyError(DirectionsError):
+	"""Raised when the maps client is not configured with an API key."""
+
+
+class InvalidAPIKeyError(DirectionsError):
+	"""Raised when the API key of the maps client is malformed."""
+
+
+class _InstructionsParser(HTMLParser):
+	"""
+	Splits HTML into its text nodes, the same way BeautifulSoup(html, "html.parser").find_all(text=True) does.
+	"""
+
+	def __init__(self) -> None:
+		super().__init__(convert_charrefs=True)
+		self.strings: list[str] = []
+		self._data: list[str] = []
+		self._preserve_whitespace: int = 0
+
+	def _end_data(self) -> None:
+		if not self._data:
+			return None
+		data: str = "".join(self._data)
+		self._data.clear()
+		if not self._preserve_whitespace and not data.strip(ASCII_SPACES):
+			# Strings consisting only of white space are collapsed to a single new line or space.
+			data = "\n" if "\n" in data else " "
+		self.strings.append(data)
+
+	def _add_string(self, data: str) -> None:
+		self._end_data()
+		self.strings.append(data)
+
+	def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+		self._end_data()
+		if tag in PRESERVE_WHITESPACE_TAGS:
+			self._preserve_whitespace += 1
+
+	def handle_startendtag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+		self._end_data()
+
+	def handle_endtag(self, tag: str) -> None:
+		self._end_data()
+		if tag in PRESERVE_WHITESPACE_TAGS and self._preserve_whitespace:
+			self._preserve_whitespace -= 1
+
+	def handle_data(self, data: str) -> None:
+		self._data.append(data)
+
+	def handle_comment(self, data: str) -> None:
+		self._add_string(data)
+
+	def handle_decl(self, decl: str) -> None:
+		self._add_string(decl[len("DOCTYPE ") :] if decl.upper().startswith("DOCTYPE ") else decl)
+
+	def handle_pi(self, data: str) -> None:
+		self._add_string(data)
+
+	def unknown_decl(self, data: str) -> None:
+		self._add_string(data[len("CDATA[") :] if data.upper().startswith("CDATA[") else data)
+
+	def close(self) -> None:
+		super().close()
+		self._end_data()
+
+
+@functools.lru_cache(maxsize=INSTRUCTIONS_CACHE_SIZE)
+def instructions_to_text(html_instructions: str) -> tuple[str, ...]:
+	"""
+	Converts HTML instructions from a directions response into plain text.
+
+	Bold tags are removed so that their contents stay on the same line as the surrounding text.
+	Every other tag starts a new string. Results are memoized, as the same instructions
+	frequently occur in many routes.
+
+	Args:
+		html_instructions: The HTML instructions.
+
+	Returns:
+		The text strings, with HTML entities unescaped.
+	"""
+	parser: _InstructionsParser = _InstructionsParser()
+	parser.feed(html_instructions.replace("<b>", "").replace("</b>", ""))
+	parser.close()
+	return tuple(parser.strings)
+
+
+def create_session(settings: Mapping[str, Any], retry: bool = True) -> requests.Session:
+	"""
+	Creates an HTTP session with a pool of persistent connections.
+
+	Args:
+		settings: The maps_client section of the configuration.
+		retry: True if failed connections and reads should be retried, False otherwise.
+
+	Returns:
+		The session.
+	"""
+	import requests
+	from requests.adapters import HTTPAdapter
+	from urllib3.util.retry import Retry
+
+	pool_size: int = max(1, settings.get("pool_size", settings.get("workers", DEFAULT_WORKERS)))
+	retries: int = max(0, settings.get("retries", DEFAULT_RETRIES)) if retry else 0
+	# Failed connections and reads are retried here, with exponential backoff.
+	# Server errors and quota exceeded responses are retried by googlemaps.Client itself,
+	# so retrying them here as well would multiply the number of attempts.
+	max_retries: Retry = Retry(
+		total=retries,
+		connect=retries,
+		read=retries,
+		status=0,
+		other=0,
+		backoff_factor=settings.get("backoff_factor", DEFAULT_BACKOFF_FACTOR),
+		allowed_methods=frozenset(("GET", "HEAD")),
+		raise_on_status=False,
+	)
+	adapter: HTTPAdapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=max_retries)
+	session: requests.Session = requests.Session()
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+	session.headers["Accept-Encoding"] = "gzip, deflate" if settings.get("compression", True) else "identity"
+	session.headers["Connection"] = "keep-alive" if settings.get("keep_alive", True) else "close"
+	session.hooks["response"].append(_on_response)
+	return session
+
+
+def _on_response(response: requests.Response, *args: Any, **kwargs: Any) -> None:
+	# The time from sending the request until the headers of the response were parsed.
+	record("http.response", response.elapsed.total_seconds())
+	retries: Any = getattr(response.raw, "retries", None)
+	if retries is not None and retries.history:
+		increment("http.retries", len(retries.history))
+
+
+def create_client(  # type: ignore[no-any-unimported]
+	settings: Mapping[str, Any], retry: bool = True
+) -> googlemaps.Client:
+	"""
+	Creates a maps client.
+
+	Args:
+		settings: The maps_client section of the configuration.
+		retry: True if the client should retry failed requests itself, False if the caller retries them,
+			such as with a resilience policy, in which case each request is sent once.
+
+	Returns:
+		The client.
+
+	Raises:
+		MissingAPIKeyError: No API key was configured.
+		InvalidAPIKeyError: The API key is malformed.
+	"""
+	import googlemaps
+
+	client_class: type[googlemaps.Client] = googlemaps.Client  # type: ignore[no-any-unimported]
+	if not retry:
+		from .client import SingleAttemptClient
+
+		client_class = SingleAttemptClient
+	api_key: str = settings.get("key", "")
+	api_timeout: int = settings.get("timeout", DEFAULT_TIMEOUT)
+	# The base URL may point to a local stand-in server, such as travel.mockserver.
+	base_url: str = settings.get("base_url") or DEFAULT_BASE_URL
+	rkwargs: dict[str, Any] = {}
+	if not api_key.strip():
+		raise MissingAPIKeyError("API key not found. See the ReadMe for instructions on how to obtain one.")
+	try:
+		return client_class(
+			key=api_key,
+			timeout=api_timeout,
+			requests_kwargs=rkwargs,
+			requests_session=create_session(settings, retry),
+			base_url=base_url,
+		)
+	except ValueError as e:
+		raise InvalidAPIKeyError(f"{e} See the ReadMe for instructions on how to obtain one.") from None
+
+
+def update_client(  # type: ignore[no-any-unimported]
+	client: googlemaps.Client, settings: Mapping[str, Any]
+) -> None:
+	"""
+	Applies the settings that may change while the program is running to an existing maps client.
+
+	Args:
+		client: The maps client.
+		settings: The maps_client section of the configuration.
+	"""
+	timeout: int = settings.get("timeout", DEFAULT_TIMEOUT)
+	client.timeout = timeout
+	client.requests_kwargs["timeout"] = timeout
+
+
+def prewarm(client: googlemaps.Client) -> None:  # type: ignore[no-any-unimported]
+	"""
+	Opens a connection to the maps server ahead of the first request.
+
+	The TCP and TLS handshakes are completed, and the connection is returned to
+	the pool of the client's session, where the first directions request reuses it.
+	This blocks, so it should be called from a background thread.
+
+	Args:
+		client: The maps client.
+	"""
+	import requests
+
+	try:
+		client.session.head(client.base_url, timeout=client.timeout, allow_redirects=False).close()
+	except requests.RequestException as e:
+		logger.debug("Unable to pre-warm the connection: %s", e)
+	else:
+		logger.debug("Connection pre-warmed.")
+
+
+def fetch_directions(  # type: ignore[no-any-unimported]
+	client: googlemaps.Client,
+	params: Mapping[str, Any],
+	cache: Optional[DirectionsCache] = None,
+	resilience: Optional[Resilience] = None,
+) -> tuple[Any, bool]:
+	"""
+	Retrieves directions, serving them from the cache if possible.
+
+	Args:
+		client: The maps client.
+		params: The keyword arguments for googlemaps.Client.directions.
+		cache: The cache, or None to always query the server.
+		resilience: The policy for retrying and hedging the request, or None to send it once.
+
+	Returns:
+		The directions response, and True if it was served from the cache or False if it was
+		received from the server.
+	"""
+	if cache is not None:
+		cached: Any = cache.get(params)
+		if cached is not None:
+			increment("cache.hit")
+			return cached, True
+		increment("cache.miss")
+	try:
+		# Includes retries, and decoding the JSON body, which googlemaps.Client does internally.
+		with span("directions.request"):
+			if resilience is None:
+				response: Any = client.directions(**params)
+			else:
+				response = resilience.call(lambda: client.directions(**params))
+	except Exception:
+		increment("directions.errors")
+		raise
+	if cache is not None and response:
+		cache.put(params, response)
+	return response, False
+
+
+def get_directions(  # type: ignore[no-any-unimported]
+	client: googlemaps.Client,
+	params: Mapping[str, Any],
+	cache: Optional[DirectionsCache] = None,
+	resilience: Optional[Resilience] = None,
+) -> Any:
+	"""
+	Retrieves directions, serving them from the cache if possible.
+
+	Args:
+		client: The maps client.
+		params: The keyword arguments for googlemaps.Client.directions.
+		cache: The cache, or None to always query the server.
+		resilience: The policy for retrying and hedging the request, or None to send it once.
+
+	Returns:
+		The directions response.
+	"""
+	return fetch_directions(client, params, cache, resilience)[0]
+
+
+def error_message(error: Exception) -> str:
+	"""
+	Generates a user friendly message from a maps client exception.
+
+	Args:
+		error: The exception.
+
+	Returns:
+		The message.
+	"""
+	from googlemaps.exceptions import Timeout
+
+	if isinstance(error, Timeout):
+		return "The server failed to respond."
+	return str(getattr(error, "message", None) or error)
+
+
+def to_timestamp(value: Union[datetime, int, float]) -> int:
+	"""
+	Converts a local date and time to a Unix timestamp.
+
+	Args:
+		value: The date and time. Naive datetime objects are assumed to be in local time.
+
+	Returns:
+		The Unix timestamp.
+	"""
+	if not isinstance(value, datetime):
+		return int(value)
+	import dateutil.tz
+
+	if value.tzinfo is None:
+		value = value.replace(tzinfo=dateutil.tz.tzlocal())
+	return calendar.timegm(value.astimezone(dateutil.tz.tzutc()).utctimetuple())
+
+
+def build_params(
+	origin: str,
+	destination: str,
+	mode: str = "driving",
+	waypoints: Optional[Sequence[str]] = None,
+	optimize_waypoints: bool = False,
+	avoid: Optional[Sequence[str]] = None,
+	departure_time: Union[datetime, int, float, None] = None,
+	arrival_time: Union[datetime, int, float, None] = None,
+	transit_mode: Optional[str] = None,
+	transit_routing_preference: Optional[str] = None,
+) -> dict[str, Any]:
+	"""
+	Builds the keyword arguments for googlemaps.Client.directions.
+
+	Args:
+		origin: The starting location.
+		destination: The ending location.
+		mode: One of driving, walking, bicycling, or transit.
+		waypoints: Intermediate locations. Ignored for transit.
+		optimize_waypoints: True if the order of the waypoints may be rearranged.
+		avoid: Features to avoid. Ignored for transit.
+		departure_time: The time to depart, or None to depart now. Only used for transit.
+		arrival_time: The time to arrive by. Only used for transit, takes precedence over departure_time.
+		transit_mode: Either bus or rail, or None for both.
+		transit_routing_preference: Either less_walking or fewer_transfers, or None for the best route.
+
+	Returns:
+		The request parameters.
+
+	Raises:
+		DirectionsError: Invalid arguments were supplied.
+	"""
+	origin = origin.strip()
+	destination = destination.strip()
+	mode = mode.strip().lower()
+	if not origin or not destination:
+		raise DirectionsError("You must supply a starting location and a destination.")
+	elif mode not in MODES:
+		raise DirectionsError(f"Invalid travel mode: {mode}")
+	params: dict[str, Any] = {
+		"origin": origin,
+		"destination": destination,
+		"mode": mode,
+		"alternatives": True,
+		"language": "en",
+		"region": "us",
+		"units": "imperial",  # Can also be "metric".
+	}
+	if mode == "transit":
+		if arrival_time is not None:
+			params["arrival_time"] = to_timestamp(arrival_time)
+		elif departure_time is not None:
+			params["departure_time"] = to_timestamp(departure_time)
+		else:
+			params["departure_time"] = None
+		# Travel Mode:
+		# bus indicates that the calculated route should prefer travel by bus.
+		# subway indicates that the calculated route should prefer travel by subway.
+		# train indicates that the calculated route should prefer travel by train.
+		# tram indicates that the calculated route should prefer travel by tram and light rail.
+		# rail indicates that the calculated route should prefer travel by train, tram, light rail, and subway.
+		# This is equivalent to transit_mode=train|tram|subway.
+		if transit_mode:
+			if transit_mode not in TRANSIT_MODES:
+				raise DirectionsError(f"Invalid transit mode: {transit_mode}")
+			params["transit_mode"] = transit_mode
+		if transit_routing_preference:
+			if transit_routing_preference not in TRANSIT_ROUTING_PREFERENCES:
+				raise DirectionsError(f"Invalid transit routing preference: {transit_routing_preference}")
+			params["transit_routing_preference"] = transit_routing_preference
+	else:
+		points: list[str] = [point.strip() for point in waypoints or [] if point.strip()]
+		if points:
+			params["waypoints"] = points
+			params["optimize_waypoints"] = optimize_waypoints
+		if avoid:
+			invalid: list[str] = [item for item in avoid if item not in AVOID]
+			if invalid:
+				raise DirectionsError(f"Invalid features to avoid: {', '.join(invalid)}")
+			params["avoid"] = list(avoid)
+	return params
+
+
+def process_leg(leg: Leg) -> list[str]:
+	"""
+	Formats the summary of a route leg.
+
+	Args:
+		leg: The leg.
+
+	Returns:
+		The formatted lines.
+	"""
+	result: list[str] = []
+	text: list[str] = []
+	result.append(f"From: {leg.start_address}\nTo: {leg.end_address}")
+	if leg.distance is not None:
+		text.append(f"Total Distance: {leg.distance.text}")
+	if leg.duration is not None:
+		text.append(f"({leg.duration.text})")
+	if text:
+		result.append(" ".join(text))
+	if leg.departure_time is not None:
+		result.append(f"Departing: {leg.departure_time.text}")
+	if leg.arrival_time is not None:
+		result.append(f"Arriving: {leg.arrival_time.text}")
+	return result
+
+
+def process_step(step: Step) -> list[str]:
+	"""
+	Formats a step of a route leg.
+
+	Args:
+		step: The step.
+
+	Returns:
+		The formatted lines.
+	"""
+	result: list[str] = []
+	text: list[str] = []
+	transit_details: TransitDetails = step.transit_details or EMPTY_TRANSIT_DETAILS
+	if transit_details.departure_time is not None:
+		text.append(f"At {transit_details.departure_time.text},")
+	if transit_details.line_short_name is not None or transit_details.line_name is not None:
+		line_name = " ".join((transit_details.line_short_name or "", transit_details.line_name or ""))
+		text.append(f"board {line_name}")
+	if transit_details.vehicle_name is not None:
+		text.append(transit_details.vehicle_name)
+	if transit_details.headsign is not None:
+		text.append(f"to {transit_details.headsign}")
+	if transit_details.departure_stop is not None:
+		text.append(f"from {transit_details.departure_stop}")
+	if transit_details.num_stops is not None:
+		text.append(f"\nTravel {transit_details.num_stops} stops,")
+	if step.travel_mode != "TRANSIT" and step.html_instructions is not None:
+		text.append("\n".join(instructions_to_text(step.html_instructions)))
+		result.append(" ".join(text).capitalize())
+		text.clear()
+	if step.distance is not None:
+		text.append(f"Travel {step.distance.text}")
+	if step.duration is not None:
+		text.append(f"(about {step.duration.text})")
+	if text:
+		result.append(" ".join(text).capitalize())
+		text.clear()
+	if transit_details.arrival_time is not None:
+		text.append(f"At {transit_details.arrival_time.text}")
+	if transit_details.arrival_stop is not None:
+		text.append(f"disembark at {transit_details.arrival_stop}")
+	if text:
+		result.append(" ".join(text).capitalize())
+	return result
+
+
+def process_sub_step(sub_step: Step) -> list[str]:
+	"""
+	Formats a sub step of a transit step.
+
+	Args:
+		sub_step: The sub step.
+
+	Returns:
+		The formatted lines.
+	"""
+	result: list[str] = []
+	text: list[str] = []
+	if sub_step.html_instructions is not None:
+		result.append("* " + "\n* ".join(instructions_to_text(sub_step.html_instructions)).capitalize())
+		if sub_step.distance is not None:
+			text.append(f"Travel {sub_step.distance.text}")
+		if sub_step.duration is not None:
+			text.append(f"(about {sub_step.duration.text})")
+		if text:
+			result.append("* " + " ".join(text).capitalize())
+	return result
+
+
+def iter_route_chunks(route: Route) -> Iterator[list[str]]:
+	"""
+	Formats the details of a route incrementally.
+
+	Args:
+		route: The route.
+
+	Yields:
+		The formatted lines of each leg, step, and sub step in turn, followed by the warnings.
+	"""
+	for leg in route.legs:
+		yield process_leg(leg)
+		for step in leg.steps:
+			yield process_step(step)
+			for sub_step in step.steps:
+				yield process_sub_step(sub_step)
+	if route.warnings is not None:
+		yield ["", "\n".join(route.warnings)]
+
+
+def process_route(route: Route) -> str:
+	"""
+	Formats the details of a route.
+
+	Args:
+		route: The route.
+
+	Returns:
+		The formatted route.
+	"""
+	return "\n".join(line for chunk in iter_route_chunks(route) for line in chunk).strip()
+
+
+class RouteDetails(object):
+	"""
+	Implements lazy, memoized formatting of the routes in a directions response.
+
+	The response is parsed once when the object is created, but routes are only
+	formatted the first time their details are requested, and their polylines are
+	only decoded the first time their geometry is requested.
+	"""
+
+	def __init__(self, response: Sequence[Mapping[str, Any]], similarity_threshold: float = 0.0) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			response: The directions response.
+			similarity_threshold: If positive, routes at least this similar to a preceding route are dropped.
+		"""
+		with span("results.parse"):
+			routes: list[Route] = parse_response(response)
+		with span("results.distinct"):
+			self._routes: list[Route] = distinct_routes(routes, similarity_threshold)
+		self.suppressed: int = len(routes) - len(self._routes)
+		self._details: list[Optional[str]] = [None] * len(self._routes)
+		self._geometries: Optional[list[RouteGeometry]] = None
+
+	def __len__(self) -> int:
+		return len(self._routes)
+
+	def __getitem__(self, index: int) -> str:
+		details: Optional[str] = self._details[index]
+		if details is None:
+			with span("results.format"):
+				details = process_route(self._routes[index])
+			self._details[index] = details
+		return details
+
+	def __iter__(self) -> Iterator[str]:
+		for index in range(len(self)):
+			yield self[index]
+
+	@property
+	def routes(self) -> list[Route]:
+		"""The parsed routes."""
+		return self._routes
+
+	def geometry(self, index: int) -> RouteGeometry:
+		"""
+		Retrieves the decoded path of a route.
+
+		The polylines of every route are decoded together, the first time the path of any route is requested.
+
+		Args:
+			index: The index of the route.
+
+		Returns:
+			The geometry.
+		"""
+		if self._geometries is None:
+			from .geometry import route_geometries
+
+			with span("results.geometry"):
+				self._geometries = route_geometries(self._routes)
+		return self._geometries[index]
+
+	def summaries(self) -> list[str]:
+		"""
+		Generates the summary of each route, without formatting the route details.
+
+		Returns:
+			The summaries, labeled with the road or line names that distinguish the routes.
+		"""
+		return route_labels(self._routes)
+
+	def iter_chunks(self, index: int) -> Iterator[list[str]]:
+		"""
+		Formats the details of a route incrementally, without memoizing them.
+
+		Args:
+			index: The index of the route.
+
+		Returns:
+			An iterator over the formatted lines of each leg and step.
+		"""
+		return iter_route_chunks(self._routes[index])
+
+	def store(self, index: int, details: str) -> None:
+		"""
+		Memoizes the details of a route that were formatted incrementally.
+
+		Args:
+			index: The index of the route.
+			details: The formatted route.
+		"""
+		self._details[index] = details
+
+	def is_formatted(self, index: int) -> bool:
+		"""
+		Determines whether the details of a route have already been formatted.
+
+		Args:
+			index: The index of the route.
+
+		Returns:
+			True if formatted, False otherwise.
+		"""
+		return self._details[index] is not None
+
+	def next_unformatted(self) -> Optional[int]:
+		"""
+		Finds the first route that has not been formatted yet.
+
+		Returns:
+			The index of the route, or None if every route has been formatted.
+		"""
+		for index, details in enumerate(self._details):
+			if details is None:
+				return index
+		return None
+
+
+def process_results(response: Sequence[Mapping[str, Any]]) -> list[str]:
+	"""
+	Formats the details of every route in a directions response.
+
+	Args:
+		response: The directions response.
+
+	Returns:
+		The formatted routes.
+	"""
+	return [process_route(route) for route in parse_response(response)]
@@ -0,0 +1,360 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Exports planned trips to plain text, JSON lines, GPX, and CSV files.
+
+Trips are written one at a time as they are planned, so a batch of any size can be exported without
+holding every itinerary in memory. Output is collected in a buffer and written to the file in large
+chunks, instead of with one small write per line.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import csv
+import html
+import json
+import os.path
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, Optional, TextIO
+
+# Local Modules:
+from .directions import instructions_to_text, iter_route_chunks, process_route
+from .metrics import increment, span
+from .models import Leg, Route, Step
+from .similarity import route_labels
+
+
+DEFAULT_CHUNK_SIZE: int = 64 * 1024  # Characters.
+DEFAULT_FORMAT: str = "txt"
+TRIP_SEPARATOR: str = "=" * 40
+
+
+def _escape(text: str) -> str:
+	# The xml package is excluded from the frozen build, so text is escaped with the html module.
+	return html.escape(text, quote=False)
+
+
+class ChunkedWriter(object):
+	"""
+	Implements a file like object that collects text and writes it to a file in chunks.
+	"""
+
+	def __init__(self, fileObj: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			fileObj: The file object to write to.
+			chunk_size: The number of characters collected before they are written to the file.
+		"""
+		self.fileObj: TextIO = fileObj
+		self.chunk_size: int = max(1, chunk_size)
+		self._buffer: list[str] = []
+		self._size: int = 0
+
+	def write(self, text: str) -> int:
+		"""
+		Adds text to the buffer, writing the buffer to the file once it is full.
+
+		Args:
+			text: The text.
+
+		Returns:
+			The number of characters added.
+		"""
+		self._buffer.append(text)
+		self._size += len(text)
+		if self._size >= self.chunk_size:
+			self._drain()
+		return len(text)
+
+	def flush(self) -> None:
+		"""Writes the buffer to the file, and flushes the file."""
+		self._drain()
+		self.fileObj.flush()
+
+	def _drain(self) -> None:
+		if self._buffer:
+			self.fileObj.write("".join(self._buffer))
+			self._buffer.clear()
+			self._size = 0
+
+
+class Exporter(object):
+	"""
+	Implements the base class for exporters.
+
+	Subclasses write the trips in their format by overriding write_trip, and may override
+	header and footer to write text before the first trip and after the last.
+	"""
+
+	extension: str = ""
+	description: str = ""
+
+	def __init__(self, fileObj: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			fileObj: The file object to write to. Files should be opened with newline="".
+			chunk_size: The number of characters collected before they are written to the file.
+		"""
+		self.output: ChunkedWriter = ChunkedWriter(fileObj, chunk_size)
+		self.trips: int = 0
+		self._closed: bool = False
+		self.output.write(self.header())
+
+	def __enter__(self) -> Exporter:
+		return self
+
+	def __exit__(self, *args: Any) -> None:
+		self.close()
+
+	def header(self) -> str:
+		"""
+		Generates the text written before the first trip.
+
+		Returns:
+			The text.
+		"""
+		return ""
+
+	def footer(self) -> str:
+		"""
+		Generates the text written after the last trip.
+
+		Returns:
+			The text.
+		"""
+		return ""
+
+	def write(self, trip_id: Any, routes: Sequence[Route], error: Optional[str] = None) -> None:
+		"""
+		Exports a trip.
+
+		Args:
+			trip_id: The ID of the trip.
+			routes: The routes that were found for the trip.
+			error: The reason the trip could not be planned, or None if it succeeded.
+		"""
+		with span("export.trip"):
+			self.write_trip(trip_id, routes, error)
+		self.trips += 1
+		increment("export.trips")
+
+	def write_trip(self, trip_id: Any, routes: Sequence[Route], error: Optional[str]) -> None:
+		"""
+		Writes a trip in the format of the exporter.
+
+		Args:
+			trip_id: The ID of the trip.
+			routes: The routes that were found for the trip.
+			error: The reason the trip could not be planned, or None if it succeeded.
+		"""
+		raise NotImplementedError
+
+	def flush(self) -> None:
+		"""Writes any buffered output to the file."""
+		self.output.flush()
+
+	def close(self) -> None:
+		"""Writes the footer and any buffered output. The file itself is left open."""
+		if not self._closed:
+			self._closed = True
+			self.output.write(self.footer())
+			self.flush()
+
+
+class TextExporter(Exporter):
+	"""Exports trips as the same text that is shown in the route details."""
+
+	extension: str = "txt"
+	description: str = "Text"
+
+	def write_trip(self, trip_id: Any, routes: Sequence[Route], error: Optional[str]) -> None:
+		write = self.output.write
+		if self.trips:
+			write(f"\n{TRIP_SEPARATOR}\n\n")
+		write(f"Trip {trip_id}\n")
+		if error is not None:
+			write(f"Error: {error}\n")
+		for label, route in zip(route_labels(routes), routes):
+			write(f"\n{label}\n")
+			# The chunks of each leg and step are written as they are formatted.
+			for chunk in iter_route_chunks(route):
+				for line in chunk:
+					write(line)
+					write("\n")
+
+
+class JsonLinesExporter(Exporter):
+	"""Exports each trip as a JSON object on its own line, in the same format as the batch command."""
+
+	extension: str = "jsonl"
+	description: str = "JSON Lines"
+
+	def write_trip(self, trip_id: Any, routes: Sequence[Route], error: Optional[str]) -> None:
+		details: list[str] = [process_route(route) for route in routes]
+		record: dict[str, Any] = {"id": trip_id, "routes": details, "error": error}
+		self.output.write(json.dumps(record) + "\n")
+
+
+class GpxExporter(Exporter):
+	"""
+	Exports the path of each route as a GPX track.
+
+	Paths are decoded from the polylines of the routes with NumPy, which is imported when first used.
+	"""
+
+	extension: str = "gpx"
+	description: str = "GPX"
+
+	def header(self) -> str:
+		return (
+			'<?xml version="1.0" encoding="UTF-8"?>\n'
+			+ '<gpx version="1.1" creator="Travel Directions" xmlns="http://www.topografix.com/GPX/1/1">\n'
+		)
+
+	def footer(self) -> str:
+		return "</gpx>\n"
+
+	def write_trip(self, trip_id: Any, routes: Sequence[Route], error: Optional[str]) -> None:
+		from .geometry import route_geometries
+
+		write = self.output.write
+		if error is not None:
+			write(f"<!-- Trip {_escape(str(trip_id)).replace('--', '- -')}: no routes. -->\n")
+		# The routes of a trip are decoded together.
+		for label, route, geometry in zip(route_labels(routes), routes, route_geometries(routes)):
+			write(f"<trk>\n<name>{_escape(f'Trip {trip_id}, {label}')}</name>\n")
+			if route.summary:
+				write(f"<desc>{_escape(route.summary)}</desc>\n")
+			write("<trkseg>\n")
+			write(
+				"".join(
+					f'<trkpt lat="{latitude:.5f}" lon="{longitude:.5f}"/>\n'
+					for latitude, longitude in geometry.coordinates.tolist()
+				)
+			)
+			write("</trkseg>\n</trk>\n")
+
+
+class CsvExporter(Exporter):
+	"""Exports a table with a row for each step and sub step of every route."""
+
+	extension: str = "csv"
+	description: str = "CSV"
+	FIELDS: tuple[str, ...] = (
+		"trip",
+		"route",
+		"leg",
+		"step",
+		"sub_step",
+		"travel_mode",
+		"instructions",
+		"distance",
+		"distance_meters",
+		"duration",
+		"duration_seconds",
+		"error",
+	)
+
+	def __init__(self, fileObj: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+		super().__init__(fileObj, chunk_size)
+		self._writer: Any = csv.writer(self.output)
+		self._writer.writerow(self.FIELDS)
+
+	@staticmethod
+	def _step_row(step: Step) -> list[Any]:
+		instructions: str = ""
+		if step.html_instructions is not None:
+			instructions = " ".join(text.strip() for text in instructions_to_text(step.html_instructions))
+		return [
+			step.travel_mode,
+			instructions.strip(),
+			step.distance.text if step.distance is not None else "",
+			step.distance.value if step.distance is not None else "",
+			step.duration.text if step.duration is not None else "",
+			step.duration.value if step.duration is not None else "",
+			"",
+		]
+
+	def _rows(self, trip_id: Any, route: int, leg: int, data: Leg) -> Iterator[list[Any]]:
+		for counter, step in enumerate(data.steps, 1):
+			yield [trip_id, route, leg, counter, "", *self._step_row(step)]
+			for sub_counter, sub_step in enumerate(step.steps, 1):
+				yield [trip_id, route, leg, counter, sub_counter, *self._step_row(sub_step)]
+
+	def write_trip(self, trip_id: Any, routes: Sequence[Route], error: Optional[str]) -> None:
+		if error is not None:
+			self._writer.writerow([trip_id, "", "", "", "", "", "", "", "", "", "", error])
+		for route_counter, route in enumerate(routes, 1):
+			for leg_counter, leg in enumerate(route.legs, 1):
+				self._writer.writerows(self._rows(trip_id, route_counter, leg_counter, leg))
+
+
+EXPORTERS: dict[str, type[Exporter]] = {
+	exporter.extension: exporter for exporter in (TextExporter, JsonLinesExporter, GpxExporter, CsvExporter)
+}
+
+
+def export_format(path: str, default: str = DEFAULT_FORMAT) -> str:
+	"""
+	Determines the export format from the extension of a file name.
+
+	Args:
+		path: The file name.
+		default: The format used if the extension is not recognized.
+
+	Returns:
+		The format.
+	"""
+	extension: str = os.path.splitext(path)[1].lower().lstrip(".")
+	return extension if extension in EXPORTERS else default
+
+
+def create_exporter(
+	fileObj: TextIO, fmt: str = DEFAULT_FORMAT, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Exporter:
+	"""
+	Creates an exporter.
+
+	Args:
+		fileObj: The file object to write to. Files should be opened with newline="".
+		fmt: The format, one of the keys of EXPORTERS.
+		chunk_size: The number of characters collected before they are written to the file.
+
+	Returns:
+		The exporter.
+
+	Raises:
+		ValueError: The format is not supported.
+	"""
+	if fmt not in EXPORTERS:
+		raise ValueError(f"Unsupported export format: {fmt}")
+	return EXPORTERS[fmt](fileObj, chunk_size)
+
+
+def export_trips(
+	trips: Iterable[tuple[Any, Sequence[Route], Optional[str]]], fileObj: TextIO, fmt: str = DEFAULT_FORMAT
+) -> int:
+	"""
+	Exports trips, one at a time.
+
+	Args:
+		trips: The ID, routes, and error of each trip.
+		fileObj: The file object to write to. Files should be opened with newline="".
+		fmt: The format, one of the keys of EXPORTERS.
+
+	Returns:
+		The number of trips that were exported.
+	"""
+	with create_exporter(fileObj, fmt) as exporter:
+		for trip_id, routes, error in trips:
+			exporter.write(trip_id, routes, error)
+	return exporter.trips
@@ -0,0 +1,202 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import logging
+import threading
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+# Local Modules:
+from .cache import cache_key
+from .metrics import record
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+DEFAULT_WORKERS: int = 4
+DEFAULT_QUERIES_PER_SECOND: float = 10.0
+
+
+class RateLimiter(object):
+	"""
+	Implements a thread safe token bucket rate limiter.
+	"""
+
+	def __init__(self, rate: float, burst: float = 1.0) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			rate: The number of tokens added to the bucket per second, or 0 for no limit.
+			burst: The maximum number of tokens the bucket can hold.
+		"""
+		self.rate: float = rate
+		self.capacity: float = max(1.0, burst)
+		self._tokens: float = self.capacity
+		self._updated: float = time.monotonic()
+		self._lock: threading.Lock = threading.Lock()
+
+	def acquire(self) -> float:
+		"""
+		Blocks until a token is available, and consumes it.
+
+		Returns:
+			The number of seconds spent waiting.
+		"""
+		if self.rate <= 0:
+			return 0.0
+		waited: float = 0.0
+		while True:
+			with self._lock:
+				now: float = time.monotonic()
+				self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+				self._updated = now
+				if self._tokens >= 1.0:
+					self._tokens -= 1.0
+					return waited
+				delay: float = (1.0 - self._tokens) / self.rate
+			time.sleep(delay)
+			waited += delay
+
+
+class FetchPool(object):
+	"""
+	Implements a bounded pool of fetch workers.
+
+	Requests are rate limited, identical requests that are in flight at the same
+	time share a single fetch, and a request submitted to a group supersedes the
+	previous request in that group.
+	"""
+
+	def __init__(
+		self,
+		fetch: Callable[[dict[str, Any]], Any],
+		workers: int = DEFAULT_WORKERS,
+		queries_per_second: float = DEFAULT_QUERIES_PER_SECOND,
+		key: Callable[[Mapping[str, Any]], str] = cache_key,
+		limiter: Optional[RateLimiter] = None,
+	) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			fetch: A callable that performs a request, given its parameters.
+			workers: The maximum number of concurrent requests.
+			queries_per_second: The maximum sustained request rate, or 0 for no limit.
+			key: A callable that generates the de-duplication key for request parameters.
+			limiter: A rate limiter shared with other pools, in which case queries_per_second is ignored.
+		"""
+		self._fetch: Callable[[dict[str, Any]], Any] = fetch
+		self._key: Callable[[Mapping[str, Any]], str] = key
+		self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+			max_workers=max(1, workers), thread_name_prefix="fetch"
+		)
+		self.limiter: RateLimiter = (
+			limiter if limiter is not None else RateLimiter(queries_per_second, burst=max(1, workers))
+		)
+		self._lock: threading.RLock = threading.RLock()
+		self._in_flight: dict[str, tuple[Future[Any], list[Future[Any]]]] = {}
+		self._latest: dict[str, Future[Any]] = {}
+
+	def submit(self, params: Mapping[str, Any], group: Optional[str] = None) -> Future[Any]:
+		"""
+		Submits a request.
+
+		Args:
+			params: The request parameters.
+			group: If given, the previous request submitted to the same group is cancelled,
+				or its result discarded if it is already running.
+
+		Returns:
+			A future for the result of the request.
+		"""
+		key: str = self._key(params)
+		future: Future[Any] = Future()
+		with self._lock:
+			if group is not None:
+				previous: Optional[Future[Any]] = self._latest.get(group)
+				self._latest[group] = future
+				if previous is not None and previous.cancel():
+					logger.debug("Superseded the previous request in group %s.", group)
+			entry: Optional[tuple[Future[Any], list[Future[Any]]]] = self._in_flight.get(key)
+			if entry is None:
+				task: Future[Any] = self._executor.submit(self._run, dict(params), time.perf_counter())
+				self._in_flight[key] = (task, [future])
+				task.add_done_callback(lambda task: self._on_task_done(key, task))
+			else:
+				logger.debug("Sharing an identical request that is already in flight.")
+				entry[1].append(future)
+		future.add_done_callback(lambda future: self._on_future_done(key, future))
+		return future
+
+	def is_latest(self, future: Future[Any], group: str) -> bool:
+		"""
+		Determines whether a future belongs to the most recent request in a group.
+
+		Args:
+			future: The future returned by submit.
+			group: The group.
+
+		Returns:
+			True if the future has not been superseded, False otherwise.
+		"""
+		with self._lock:
+			return self._latest.get(group) is future
+
+	def shutdown(self, wait: bool = True) -> None:
+		"""
+		Cancels pending requests and stops the workers.
+
+		Args:
+			wait: True if running requests should be waited for, False otherwise.
+		"""
+		with self._lock:
+			futures: list[Future[Any]] = [
+				future for _, subscribers in self._in_flight.values() for future in subscribers
+			]
+		for future in futures:
+			future.cancel()
+		self._executor.shutdown(wait=wait)
+
+	def _run(self, params: dict[str, Any], submitted: float) -> Any:
+		record("fetch.queue_wait", time.perf_counter() - submitted)
+		record("fetch.rate_limit_wait", self.limiter.acquire())
+		return self._fetch(params)
+
+	def _on_task_done(self, key: str, task: Future[Any]) -> None:
+		with self._lock:
+			entry: Optional[tuple[Future[Any], list[Future[Any]]]] = self._in_flight.get(key)
+			if entry is None or entry[0] is not task:
+				return None
+			del self._in_flight[key]
+			subscribers: list[Future[Any]] = list(entry[1])
+		for future in subscribers:
+			if not future.set_running_or_notify_cancel():
+				continue  # Superseded or cancelled by the caller.
+			elif task.cancelled():
+				future.set_exception(RuntimeError("The request was cancelled."))
+			elif task.exception() is not None:
+				future.set_exception(task.exception())
+			else:
+				future.set_result(task.result())
+
+	def _on_future_done(self, key: str, future: Future[Any]) -> None:
+		if not future.cancelled():
+			return None
+		with self._lock:
+			entry: Optional[tuple[Future[Any], list[Future[Any]]]] = self._in_flight.get(key)
+			if entry is None or future not in entry[1]:
+				return None
+			entry[1].remove(future)
+			if not entry[1]:
+				# Nobody is waiting for the result, so don't spend a request on it if it hasn't started.
+				entry[0].cancel()
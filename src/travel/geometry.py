@@ -0,0 +1,251 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Decodes the encoded polylines of routes into coordinate arrays, and measures and simplifies them.
+
+Decoding works on whole arrays of characters at once, and any number of polylines may be decoded
+together, so that the geometry of thousands of routes can be computed without a loop per character.
+Coordinates are (latitude, longitude) pairs in degrees.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+from collections.abc import Sequence
+from typing import Optional
+
+# Third-party Modules:
+import numpy as np
+
+# Local Modules:
+from .models import Route
+
+
+EARTH_RADIUS: float = 6_371_008.8  # The mean radius of the Earth in meters.
+POLYLINE_PRECISION: float = 1e5  # Coordinates are encoded as integer multiples of 1e-5 degrees.
+
+
+def decode_polylines(encoded: Sequence[str]) -> list[np.ndarray]:
+	"""
+	Decodes several encoded polylines at once.
+
+	Args:
+		encoded: The polylines, in the Encoded Polyline Algorithm Format.
+
+	Returns:
+		An array of shape (n, 2) with the coordinates of each polyline.
+
+	Raises:
+		ValueError: A polyline is malformed.
+	"""
+	if not encoded:
+		return []
+	try:
+		text: bytes = "".join(encoded).encode("ascii")
+	except UnicodeEncodeError:
+		raise ValueError("Polylines may only contain printable ASCII characters.") from None
+	data: np.ndarray = np.frombuffer(text, dtype=np.uint8).astype(np.int64) - 63
+	if np.any((data < 0) | (data > 63)):
+		raise ValueError("Polylines may only contain printable ASCII characters.")
+	lengths: np.ndarray = np.fromiter((len(item) for item in encoded), dtype=np.int64, count=len(encoded))
+	boundaries: np.ndarray = np.cumsum(lengths)
+	# Each value is encoded as chunks of 5 bits, least significant first. The 0x20 bit
+	# is set on every chunk except the last.
+	ends: np.ndarray = (data & 0x20) == 0
+	if not ends[boundaries[lengths > 0] - 1].all():
+		raise ValueError("Polyline ends in the middle of a value.")
+	starts: np.ndarray = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+	positions: np.ndarray = np.arange(data.size) - starts[np.cumsum(ends) - ends]
+	values: np.ndarray = np.bitwise_or.reduceat((data & 0x1F) << (5 * positions), starts) if data.size else data
+	# Undo the zig-zag encoding of signed values.
+	deltas: np.ndarray = np.where(values & 1, ~(values >> 1), values >> 1)
+	counts: np.ndarray = np.diff(np.concatenate(([0], np.cumsum(ends)))[np.concatenate(([0], boundaries))])
+	if np.any(counts % 2):
+		raise ValueError("Polyline has a latitude without a longitude.")
+	pairs: np.ndarray = counts // 2
+	# Each coordinate is encoded as the difference from the previous coordinate in the same polyline.
+	# The running total is taken over every polyline at once, and the total at the end of the
+	# previous polyline is subtracted.
+	totals: np.ndarray = np.cumsum(deltas.reshape(-1, 2), axis=0)
+	previous: np.ndarray = np.concatenate((np.zeros((1, 2), dtype=np.int64), totals))[np.cumsum(pairs) - pairs]
+	coordinates: np.ndarray = (totals - np.repeat(previous, pairs, axis=0)) / POLYLINE_PRECISION
+	return np.split(coordinates, np.cumsum(pairs)[:-1])
+
+
+def decode_polyline(encoded: str) -> np.ndarray:
+	"""
+	Decodes an encoded polyline.
+
+	Args:
+		encoded: The polyline, in the Encoded Polyline Algorithm Format.
+
+	Returns:
+		An array of shape (n, 2) with the coordinates.
+	"""
+	return decode_polylines([encoded])[0]
+
+
+def haversine(coordinates: np.ndarray) -> np.ndarray:
+	"""
+	Calculates the great circle distance between consecutive coordinates.
+
+	Args:
+		coordinates: An array of shape (n, 2).
+
+	Returns:
+		An array of n - 1 distances in meters.
+	"""
+	radians: np.ndarray = np.radians(np.asarray(coordinates, dtype=float).reshape(-1, 2))
+	latitudes: np.ndarray = radians[:, 0]
+	half: np.ndarray = np.diff(radians, axis=0) / 2
+	a: np.ndarray = (
+		np.sin(half[:, 0]) ** 2 + np.cos(latitudes[:-1]) * np.cos(latitudes[1:]) * np.sin(half[:, 1]) ** 2
+	)
+	distances: np.ndarray = 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+	return distances
+
+
+def path_length(coordinates: np.ndarray) -> float:
+	"""
+	Calculates the length of a path.
+
+	Args:
+		coordinates: An array of shape (n, 2).
+
+	Returns:
+		The length in meters.
+	"""
+	return float(haversine(coordinates).sum())
+
+
+def bounding_box(coordinates: np.ndarray) -> Optional[tuple[float, float, float, float]]:
+	"""
+	Finds the smallest latitude and longitude box that contains a path.
+
+	Args:
+		coordinates: An array of shape (n, 2).
+
+	Returns:
+		The south, west, north, and east edges, or None if there are no coordinates.
+	"""
+	coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+	if not coordinates.size:
+		return None
+	south, west = coordinates.min(axis=0)
+	north, east = coordinates.max(axis=0)
+	return float(south), float(west), float(north), float(east)
+
+
+def _project(coordinates: np.ndarray) -> np.ndarray:
+	# An equirectangular projection to meters, which is accurate over the extent of a route.
+	radians: np.ndarray = np.radians(coordinates)
+	scale: float = float(np.cos(radians[:, 0].mean())) if radians.size else 1.0
+	return np.column_stack((radians[:, 1] * scale, radians[:, 0])) * EARTH_RADIUS
+
+
+def _segment_distances(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+	# The distances from each point to the closest point on the segment from start to end.
+	segment: np.ndarray = end - start
+	length: float = float(segment @ segment)
+	nearest: np.ndarray = points - start
+	if length > 0:
+		along: np.ndarray = np.clip(nearest @ segment / length, 0.0, 1.0)
+		nearest = nearest - along[:, np.newaxis] * segment
+	distances: np.ndarray = np.hypot(nearest[:, 0], nearest[:, 1])
+	return distances
+
+
+def simplify(coordinates: np.ndarray, tolerance: float) -> np.ndarray:
+	"""
+	Removes points from a path with the Douglas-Peucker algorithm.
+
+	Args:
+		coordinates: An array of shape (n, 2).
+		tolerance: The maximum distance in meters between the path and its simplification.
+
+	Returns:
+		The coordinates that were kept, which always include the first and last.
+	"""
+	coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+	if len(coordinates) < 3 or tolerance <= 0:
+		return coordinates
+	points: np.ndarray = _project(coordinates)
+	keep: np.ndarray = np.zeros(len(points), dtype=bool)
+	keep[[0, -1]] = True
+	# The recursion is unrolled with a stack, and the distances within each span are computed at once.
+	stack: list[tuple[int, int]] = [(0, len(points) - 1)]
+	while stack:
+		first, last = stack.pop()
+		if last - first < 2:
+			continue
+		distances: np.ndarray = _segment_distances(points[first + 1 : last], points[first], points[last])
+		farthest: int = int(distances.argmax())
+		if distances[farthest] > tolerance:
+			split: int = first + 1 + farthest
+			keep[split] = True
+			stack.append((first, split))
+			stack.append((split, last))
+	simplified: np.ndarray = coordinates[keep]
+	return simplified
+
+
+class RouteGeometry(object):
+	"""The decoded path of a route, along with its length and bounds."""
+
+	__slots__: tuple[str, ...] = ("coordinates", "length", "bounds")
+
+	def __init__(self, coordinates: np.ndarray) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			coordinates: An array of shape (n, 2) with the path of the route.
+		"""
+		self.coordinates: np.ndarray = coordinates
+		self.length: float = path_length(coordinates)
+		self.bounds: Optional[tuple[float, float, float, float]] = bounding_box(coordinates)
+
+	def __len__(self) -> int:
+		return len(self.coordinates)
+
+	def __repr__(self) -> str:
+		return f"{type(self).__name__}({len(self)} points, {self.length:.0f} m)"
+
+
+def _route_polylines(route: Route) -> list[str]:
+	# The polylines of the steps follow the roads more closely than the overview polyline.
+	polylines: list[str] = [step.polyline for leg in route.legs for step in leg.steps if step.polyline]
+	if not polylines and route.overview_polyline:
+		polylines.append(route.overview_polyline)
+	return polylines
+
+
+def route_geometries(routes: Sequence[Route], tolerance: float = 0.0) -> list[RouteGeometry]:
+	"""
+	Decodes the paths of several routes at once.
+
+	Args:
+		routes: The routes.
+		tolerance: If positive, the paths are simplified so they are within this many meters of the original.
+
+	Returns:
+		The geometry of each route. Routes without polylines have an empty path.
+	"""
+	polylines: list[list[str]] = [_route_polylines(route) for route in routes]
+	decoded: list[np.ndarray] = decode_polylines([item for route in polylines for item in route])
+	geometries: list[RouteGeometry] = []
+	position: int = 0
+	for route in polylines:
+		parts: list[np.ndarray] = decoded[position : position + len(route)]
+		position += len(route)
+		coordinates: np.ndarray = np.concatenate(parts) if parts else np.empty((0, 2))
+		if len(coordinates) > 1:
+			# Each step starts where the previous step ended, so the repeated points are dropped.
+			repeated: np.ndarray = np.all(coordinates[1:] == coordinates[:-1], axis=1)
+			coordinates = coordinates[~np.concatenate(([False], repeated))]
+		geometries.append(RouteGeometry(simplify(coordinates, tolerance)))
+	return geometries
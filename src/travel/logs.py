@@ -0,0 +1,140 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+A logging pipeline that writes to the log file from a background thread.
+
+Records are passed to a queue by the thread that logged them, and formatted and written by a listener
+thread, so that the UI event loop and the fetch pool never wait on file I/O.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import atexit
+import gzip
+import logging
+import os
+import queue
+import shutil
+from collections.abc import Mapping
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Optional, Union
+
+
+LOG_FILE: str = "debug.log"
+LOG_FORMAT: str = '{levelname}: from {name} in {threadName}: "{message}" @ {asctime}.{msecs:0f}'
+LOG_DATE_FORMAT: str = "%m/%d/%Y %H:%M:%S"
+DEFAULT_MAX_BYTES: int = 1024 * 1024
+DEFAULT_BACKUP_COUNT: int = 5
+# Arguments of these types can not change after they are logged, so merging them into the message can be
+# left to the listener thread.
+IMMUTABLE_TYPES: tuple[type, ...] = (str, int, float, complex, bool, bytes, type(None))
+
+
+_listener: Optional[QueueListener] = None
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+	"""
+	Implements a rotating file handler that compresses rotated files with gzip.
+
+	Rotated files are named debug.log.1.gz, debug.log.2.gz, and so on, with 1 being the most recent.
+	"""
+
+	def __init__(self, *args: Any, **kwargs: Any) -> None:
+		super().__init__(*args, **kwargs)
+		self.namer = self._name_rotated
+		self.rotator = self._compress
+
+	@staticmethod
+	def _name_rotated(name: str) -> str:
+		return f"{name}.gz"
+
+	@staticmethod
+	def _compress(source: str, destination: str) -> None:
+		with open(source, "rb") as inFile, gzip.open(destination, "wb") as outFile:
+			shutil.copyfileobj(inFile, outFile)
+		os.remove(source)
+
+
+def _is_immutable(value: Any) -> bool:
+	if isinstance(value, tuple):
+		return all(_is_immutable(item) for item in value)
+	return isinstance(value, IMMUTABLE_TYPES)
+
+
+class DeferredQueueHandler(QueueHandler):
+	"""
+	Implements a queue handler that leaves formatting to the listener thread where it is safe to do so.
+
+	The standard QueueHandler formats every record before queueing it, so that it can be pickled.
+	The queue here never leaves the process, so a record whose arguments are all immutable, such as
+	strings and numbers, is queued as is, and the cost of merging them into the message is paid by the
+	listener instead of the logging thread. Other arguments, such as dicts and lists, could be changed by
+	another thread before the listener reads them, so they are merged into the message immediately.
+	Exception information is always formatted immediately, so that tracebacks and their frames are
+	not kept alive by the queue.
+	"""
+
+	def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+		if record.args and not _is_immutable(record.args):
+			record.msg = record.getMessage()
+			record.args = None
+		if record.exc_info:
+			if not record.exc_text:
+				record.exc_text = logging.Formatter().formatException(record.exc_info)
+			record.exc_info = None
+		return record
+
+
+def stopLogging() -> None:
+	"""Writes any queued records, and stops the listener thread."""
+	global _listener
+	if _listener is not None:
+		_listener.stop()
+		for handler in _listener.handlers:
+			handler.close()
+		_listener = None
+
+
+def startLogging(level: Union[str, int], settings: Mapping[str, Any]) -> QueueListener:
+	"""
+	Routes records from the root logger through a queue to a rotating log file.
+
+	The level is set on the root logger, so that records below it are rejected by
+	Logger.isEnabledFor before they are created.
+
+	Args:
+		level: The minimum level of records to log.
+		settings: The general section of the configuration.
+
+	Returns:
+		The listener, which has been started.
+	"""
+	global _listener
+	stopLogging()
+	logFile = CompressingRotatingFileHandler(
+		settings.get("log_file", LOG_FILE),
+		mode="a",
+		maxBytes=max(0, settings.get("log_max_bytes", DEFAULT_MAX_BYTES)),
+		backupCount=max(0, settings.get("log_backup_count", DEFAULT_BACKUP_COUNT)),
+		encoding="utf-8",
+		delay=True,
+	)
+	logFile.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT, style="{"))
+	records: queue.SimpleQueue[Any] = queue.SimpleQueue()
+	root: logging.Logger = logging.getLogger()
+	for handler in root.handlers[:]:
+		root.removeHandler(handler)
+		handler.close()
+	root.addHandler(DeferredQueueHandler(records))
+	root.setLevel(level)
+	_listener = QueueListener(records, logFile)
+	_listener.start()
+	atexit.unregister(stopLogging)
+	atexit.register(stopLogging)
+	return _listener
@@ -8,64 +8,67 @@ from __future__ import annotations
 
 # Built-in Modules:
 import calendar
+import itertools
 import logging
 import os
 import platform
+import threading
+import time
 import traceback
-from collections.abc import Callable, Mapping, Sequence
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Future
 from contextlib import suppress
 from datetime import datetime
-from threading import Thread
-from typing import Any, Optional, Union
+from typing import TYPE_CHECKING, Any, Optional, Union
 
 # Third-party Modules:
-import certifi
-import dateutil.tz
-import googlemaps
 import wx
-import wx.lib.dialogs
-from bs4 import BeautifulSoup
-from googlemaps.exceptions import ApiError, HTTPError, Timeout, TransportError
-from speechlight import speech
-from wx.adv import SOUND_ASYNC, Sound
 
 # Local Modules:
-from . import APP_AUTHOR, APP_AUTHOR_EMAIL, APP_NAME, __version__
+from . import APP_AUTHOR, APP_AUTHOR_EMAIL, APP_NAME, __version__, setupLogging
+from .addressbook import AddressBook, create_address_book
+from .cache import DEFAULT_TTL, DirectionsCache, create_cache
 from .config import Config
+from .directions import (
+	MAX_WAYPOINTS,
+	TRANSIT_MODES,
+	TRANSIT_ROUTING_PREFERENCES,
+	DirectionsError,
+	RouteDetails,
+	build_params,
+	create_client,
+	error_message,
+	fetch_directions,
+	prewarm,
+	update_client,
+)
+from .export import EXPORTERS, export_format, export_trips
+from .fetch import DEFAULT_QUERIES_PER_SECOND, DEFAULT_WORKERS, FetchPool
+from .metrics import Metrics, create_metrics, increment, record, span
+from .resilience import CircuitOpenError, Resilience, create_resilience
+from .similarity import DEFAULT_THRESHOLD
+from .speech import SpeechQueue, create_speech_queue
+from .store import DEFAULT_PREFETCH_AGE, NotStoredError, RouteStore, StoredResponse, create_store, format_age
 from .utils import getDataPath, isFrozen
 
 
-logger: logging.Logger = logging.getLogger(__name__)
-
-
-SYSTEM_PLATFORM: str = platform.system()
+if TYPE_CHECKING:  # pragma: no cover
+	# Tracking uses NumPy, so it is imported when first used.
+	from .tracking import TrackingEvent, TrackingSession
 
 
-if SYSTEM_PLATFORM == "Darwin":
-	from Cocoa import NSSound
+logger: logging.Logger = logging.getLogger(__name__)
 
 
-if isFrozen():
-	logger.debug("Program is a binary build.")
-	os.environ["REQUESTS_CA_BUNDLE"] = certifi.where()
-else:
-	logger.debug("Program is running from source.")
+STARTUP_TIME: float = time.perf_counter()
+SYSTEM_PLATFORM: str = platform.system()
 
 
-MULTIPLE_CHOICE_SOUND: Union[str, None]
-try:
-	MULTIPLE_CHOICE_SOUND = getDataPath("sounds", "multiple_choice.wav")
-	with open(MULTIPLE_CHOICE_SOUND, "rb"):
-		pass
-	logger.debug("Loaded multiple choice sound.")
-except IOError:
-	logger.debug("Unable to load multiple choice sound. Continuing.")
-	MULTIPLE_CHOICE_SOUND = None
+MULTIPLE_CHOICE_SOUND: str = getDataPath("sounds", "multiple_choice.wav")
 
 
 WINDOW_WIDTH: int = 600
 WINDOW_HEIGHT: int = 480
-logger.debug(f"Loading with default window size of {WINDOW_WIDTH}/{WINDOW_HEIGHT}.")
 
 ABOUT_TEXT: str = f"""
 By {APP_AUTHOR} <{APP_AUTHOR_EMAIL}>
@@ -77,7 +80,34 @@ If you did not receive a copy of the product source code, please send a request
 to the person or persons from which you obtained these product binaries.
 """.lstrip()
 
-HTML_PARSER: str = "html.parser"
+SEARCH_GROUP: str = "search"
+CONFIG_POLL_INTERVAL: int = 2000  # Milliseconds between checks for changes to the configuration file.
+STREAM_BATCH_SIZE: int = 20  # Number of legs or steps appended to the output area per event loop iteration.
+SUMMARY_INTERVAL: int = 20  # Number of searches between performance summaries in the log.
+ANNOUNCE_CHUNKS: int = 2  # The summary of the first leg of a route and its first step are announced.
+
+
+class AddressCompleter(wx.TextCompleterSimple):  # type: ignore[misc, no-any-unimported]
+	"""Suggests addresses from the address book as they are typed."""
+
+	def __init__(self, address_book: AddressBook, separator: Optional[str] = None) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			address_book: The address book.
+			separator: The character separating multiple addresses in the text field, if any.
+		"""
+		super().__init__()
+		self.address_book: AddressBook = address_book
+		self.separator: Optional[str] = separator
+
+	def GetCompletions(self, prefix: str) -> list[str]:
+		head: str = ""
+		if self.separator is not None and self.separator in prefix:
+			head, prefix = prefix.rsplit(self.separator, 1)
+			head += self.separator
+		return [head + text for text in self.address_book.suggest(prefix)]
 
 
 class MainFrame(wx.Frame):  # type: ignore[misc, no-any-unimported]
@@ -88,8 +118,14 @@ class MainFrame(wx.Frame):  # type: ignore[misc, no-any-unimported]
 		self.menu_file = wx.Menu()
 		self.menu_help = wx.Menu()
 		self.menu_bar.Append(self.menu_file, "&File")
+		self.menu_offline = self.menu_file.AppendCheckItem(wx.ID_ANY, "Work &Offline")
+		self.menu_bind(self.menu_offline, self.on_offline)
+		self.menu_tracking = self.menu_file.AppendCheckItem(wx.ID_ANY, "&Track Position")
+		self.menu_bind(self.menu_tracking, self.on_tracking)
+		self.menu_bind(self.menu_file.Append(wx.ID_ANY, "&Export..."), self.on_export)
 		self.menu_bind(self.menu_file.Append(wx.ID_ANY, "E&xit"), self.on_exit)
 		self.menu_bar.Append(self.menu_help, "&Help")
+		self.menu_bind(self.menu_help.Append(wx.ID_ANY, "&Performance"), self.on_performance)
 		self.menu_bind(self.menu_help.Append(wx.ID_ANY, "&About {}".format(APP_NAME)), self.on_about)
 		self.panel = wx.Panel(self, wx.ID_ANY)
 		self.panel.SetBackgroundColour("MEDIUM FOREST GREEN")
@@ -263,21 +299,76 @@ class MainFrame(wx.Frame):  # type: ignore[misc, no-any-unimported]
 		self.Show()
 		self.status_bar.SetStatusText(" ")
 		logger.debug("GUI initialized.")
-		cfg = Config()
-		api_key: str = cfg.get("maps_client", {}).get("key", "")
-		api_timeout: int = cfg.get("maps_client", {}).get("timeout", 20)
-		del cfg
-		rkwargs: dict[str, Any] = {}
-		if api_key.strip():
-			self.gmaps = googlemaps.Client(key=api_key, timeout=api_timeout, requests_kwargs=rkwargs)
-		else:
-			logger.debug("API key not found.")
-			self.notify("error", "API key not found. See the ReadMe for instructions on how to obtain one.")
-			self.Destroy()
+		self.config: Config = Config.shared()
+		maps_client_cfg: dict[str, Any] = self.config.get("maps_client", {})
+		cache_cfg: dict[str, Any] = self.config.get("cache", {})
+		self.metrics: Metrics = create_metrics(self.config.get("metrics", {}))
+		# The screen reader libraries are loaded by the speech thread while the rest of the program starts.
+		self.speech: SpeechQueue = create_speech_queue(self.config.get("speech", {}))
+		self.speech.start()
+		self._searches: int = 0
+		self._last_params: Union[dict[str, Any], None] = None
+		self._tracking: Union[TrackingSession, None] = None
+		self._search_started: Union[float, None] = None
+		# The maps client is created in the background, so that the window can respond while its
+		# dependencies are imported. Requests wait for it in the fetch pool worker threads.
+		self._client: Future[Any] = Future()
+		threading.Thread(
+			target=self._create_client, args=(maps_client_cfg,), name="create_client", daemon=True
+		).start()
+		self._sounds: dict[str, Any] = {}
+		self.results: RouteDetails = RouteDetails([])
+		self._stream: Union[Iterator[list[str]], None] = None
+		self.cache: Union[DirectionsCache, None] = create_cache(cache_cfg)
+		self._matrix_cache: Union[DirectionsCache, None] = None
+		self._matrix_cache_lock: threading.Lock = threading.Lock()
+		offline_cfg: dict[str, Any] = self.config.get("offline", {})
+		self.store: Union[RouteStore, None] = create_store(offline_cfg)
+		self.offline: bool = self.store is not None and offline_cfg.get("start_offline", False)
+		self.menu_offline.Check(self.offline)
+		self.menu_offline.Enable(self.store is not None)
+		self.address_book: Union[AddressBook, None] = create_address_book(self.config.get("address_book", {}))
+		if self.address_book is not None:
+			self.origin_area.AutoComplete(AddressCompleter(self.address_book))
+			self.destination_area.AutoComplete(AddressCompleter(self.address_book))
+			self.waypoints_area.AutoComplete(AddressCompleter(self.address_book, separator="|"))
+		self.resilience: Resilience = create_resilience(
+			self.config.get("resilience", {}), workers=maps_client_cfg.get("workers", DEFAULT_WORKERS)
+		)
+		self.fetch_pool: FetchPool = FetchPool(
+			self._retrieve,
+			workers=maps_client_cfg.get("workers", DEFAULT_WORKERS),
+			queries_per_second=maps_client_cfg.get("queries_per_second", DEFAULT_QUERIES_PER_SECOND),
+		)
+		self.config_timer = wx.Timer(self)
+		self.Bind(wx.EVT_TIMER, self.on_config_timer, self.config_timer)
+		self.config_timer.Start(CONFIG_POLL_INTERVAL)
+
+	@property
+	def gmaps(self) -> Any:
+		"""The maps client, waiting for it to be created if necessary."""
+		return self._client.result()
+
+	def _create_client(self, settings: dict[str, Any]) -> None:
+		# Called from a background thread.
+		try:
+			# Failed requests are retried by the resilience policy, instead of by the client as well.
+			client: Any = create_client(settings, retry=False)
+		except Exception as e:
+			# The future must be resolved, or requests would wait for the client forever.
+			logger.debug("Unable to create the maps client: %s", e)
+			self._client.set_exception(e)
+			wx.CallAfter(self._on_client_error, e)
 			return None
-		self.tz_utc = dateutil.tz.tzutc()
-		self.tz_local = dateutil.tz.tzlocal()
-		self.results: list[str] = []
+		self._client.set_result(client)
+		logger.debug("Maps client created.")
+		if settings.get("prewarm", True):
+			prewarm(client)
+		wx.CallAfter(self.prefetch)
+
+	def _on_client_error(self, error: Exception) -> None:
+		self.notify("error", str(error))
+		self.on_exit(None)
 
 	def menu_bind(self, item: Any, handler: Callable[[Any], None]) -> None:
 		self.Bind(wx.EVT_MENU, handler, item)
@@ -302,25 +393,38 @@ class MainFrame(wx.Frame):  # type: ignore[misc, no-any-unimported]
 				self, message=msg_text, caption=msg_title, style=wx.ICON_INFORMATION | wx.OK
 			)
 		elif msg_type == "scrolled":
-			notify_box = wx.lib.dialogs.ScrolledMessageDialog(self, msg_text, msg_title)
+			from wx.lib.dialogs import ScrolledMessageDialog
+
+			notify_box = ScrolledMessageDialog(self, msg_text, msg_title)
 		if notify_box.ShowModal() == wx.ID_OK:
 			notify_box.Destroy()
 		return None
 
 	def play_sound(self, filename: Optional[str] = None) -> None:
-		if filename is None:
+		"""Plays a sound file, loading it the first time it is played."""
+		if filename is None or not os.path.isfile(filename):
 			logger.debug("Unable to play sound file.")
 			return None
 		elif SYSTEM_PLATFORM == "Darwin":
 			# Use Cocoa for playing sounds on Mac.
+			from Cocoa import NSSound
+
 			sound = NSSound.alloc()
 			sound.initWithContentsOfFile_byReference_(filename, True)
 			sound.play()
 		else:
-			with suppress(NotImplementedError):
+			from wx.adv import SOUND_ASYNC, Sound
+
+			if filename not in self._sounds:
 				snd = Sound()
-				if snd.Create(filename):
-					snd.Play(SOUND_ASYNC)
+				with suppress(NotImplementedError):
+					if not snd.Create(filename):
+						snd = None
+				self._sounds[filename] = snd
+				logger.debug("Loaded sound file: %s", filename)
+			if self._sounds[filename] is not None:
+				with suppress(NotImplementedError):
+					self._sounds[filename].Play(SOUND_ASYNC)
 
 	def on_about(self, event: Any) -> None:
 		"""Displays the about dialog."""
@@ -330,8 +434,155 @@ class MainFrame(wx.Frame):  # type: ignore[misc, no-any-unimported]
 			f"About {APP_NAME}",
 		)
 
+	def on_performance(self, event: Any) -> None:
+		"""Displays a summary of how long each stage of a search has taken."""
+		self.notify("scrolled", "\n".join(self.metrics.format_summary()), "Performance")
+
+	def on_config_timer(self, event: Any) -> None:
+		"""Applies changes to the configuration file without restarting."""
+		if not self.config.refresh():
+			return None
+		logger.debug("Configuration reloaded.")
+		maps_client_cfg: dict[str, Any] = self.config.get("maps_client", {})
+		self.fetch_pool.limiter.rate = maps_client_cfg.get("queries_per_second", DEFAULT_QUERIES_PER_SECOND)
+		if self._client.done() and self._client.exception() is None:
+			update_client(self._client.result(), maps_client_cfg)
+		for cache in (self.cache, self._matrix_cache):
+			if cache is not None:
+				cache.ttl = self.config.get("cache", {}).get("ttl", DEFAULT_TTL)
+		self.prefetch()
+
+	def on_offline(self, event: Any) -> None:
+		"""Switches between answering searches from the server and from saved directions."""
+		self.offline = self.menu_offline.IsChecked()
+		self.speech.say("Working offline." if self.offline else "Working online.", True)
+		if not self.offline:
+			self.prefetch()
+
+	def on_export(self, event: Any) -> None:
+		"""Exports the routes of the current trip to a file."""
+		if not self.results:
+			self.notify("error", "You must plan a trip before exporting it.")
+			return None
+		formats: list[str] = list(EXPORTERS)
+		wildcard: str = "|".join(f"{EXPORTERS[fmt].description} (*.{fmt})|*.{fmt}" for fmt in formats)
+		with wx.FileDialog(
+			self, "Export Trip", wildcard=wildcard, style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
+		) as dialog:
+			if dialog.ShowModal() == wx.ID_CANCEL:
+				return None
+			path: str = dialog.GetPath()
+			fmt: str = export_format(path, default=formats[dialog.GetFilterIndex()])
+		trip_id: Any = 1
+		if self._last_params is not None:
+			trip_id = f"{self._last_params['origin']} to {self._last_params['destination']}"
+		try:
+			with open(path, "w", encoding="utf-8", newline="") as fileObj:
+				export_trips([(trip_id, self.results.routes, None)], fileObj, fmt)
+		except OSError as e:
+			self.notify("error", f"Unable to export the trip: {e.strerror or e}")
+			return None
+		self.speech.say("Trip exported.", True)
+
+	def on_tracking(self, event: Any) -> None:
+		"""Starts or stops following the selected route with position fixes."""
+		if not self.menu_tracking.IsChecked():
+			self._stop_tracking()
+			self.speech.say("Tracking stopped.", True)
+			return None
+		elif not self.results:
+			self.menu_tracking.Check(False)
+			self.notify("error", "You must plan a trip before tracking your position.")
+			return None
+		# NumPy is only needed for tracking, so it is imported when first used.
+		from .tracking import SIMULATED_SOURCE, TrackingSession, create_tracker, open_source
+
+		tracking_cfg: dict[str, Any] = self.config.get("tracking", {})
+		index: int = max(0, self.routes.GetSelection())
+		try:
+			tracker = create_tracker(self.results.routes[index], tracking_cfg)
+			fixes, fileObj = open_source(
+				tracking_cfg.get("source", SIMULATED_SOURCE), self.results.geometry(index).coordinates, tracking_cfg
+			)
+		except ValueError as e:
+			self.menu_tracking.Check(False)
+			self.notify("error", str(e))
+			return None
+		except OSError as e:
+			self.menu_tracking.Check(False)
+			self.notify("error", f"Unable to read position fixes: {e.strerror}")
+			return None
+		self._tracking = TrackingSession(
+			tracker, fixes, lambda event: wx.CallAfter(self._on_tracking_event, event), fileObj
+		)
+		self._tracking.start()
+		self.speech.say("Tracking started.", True)
+
+	def _stop_tracking(self) -> None:
+		if self._tracking is not None:
+			self._tracking.stop()
+			self._tracking = None
+		self.menu_tracking.Check(False)
+
+	def _follow_route(self, index: int) -> None:
+		"""Switches the route being tracked, such as when another route is selected, or after re-routing."""
+		if self._tracking is None or not self.results:
+			return None
+		from .tracking import create_tracker
+
+		try:
+			self._tracking.tracker = create_tracker(self.results.routes[index], self.config.get("tracking", {}))
+		except ValueError as e:
+			self._stop_tracking()
+			self.notify("error", str(e))
+
+	def _on_tracking_event(self, event: TrackingEvent) -> None:
+		if self._tracking is None:
+			return None  # Tracking was stopped while the event was queued.
+		self.speech.say(event.text, True)
+		if event.kind == event.ARRIVED:
+			self._stop_tracking()
+		elif event.kind == event.OFF_ROUTE and self._last_params is not None:
+			from .tracking import reroute_params
+
+			# The new route is retrieved like any other search, and followed once it arrives.
+			self._last_params = reroute_params(self._last_params, event.fix, event.leg)
+			future: Future[Any] = self.fetch_pool.submit(self._last_params, group=SEARCH_GROUP)
+			future.add_done_callback(lambda future: wx.CallAfter(self._on_retrieved, future))
+
+	def prefetch(self) -> None:
+		"""Retrieves the routine trips from the configuration in the background, so they are available offline."""
+		if self.store is None or self.offline or not self._client.done() or self._client.exception():
+			return None
+		from .batch import trip_params
+
+		offline_cfg: dict[str, Any] = self.config.get("offline", {})
+		max_age: float = offline_cfg.get("prefetch_age", DEFAULT_PREFETCH_AGE)
+		for trip in offline_cfg.get("prefetch", []):
+			try:
+				params: dict[str, Any] = trip_params(trip)
+			except DirectionsError as e:
+				logger.warning(f"Ignoring invalid trip to prefetch: {e}")
+				continue
+			if not self.store.is_fresh(params, max_age):
+				self.fetch_pool.submit(params)
+
 	def on_exit(self, event: Any) -> None:
 		"""Exits the program."""
+		self.config_timer.Stop()
+		self.fetch_pool.shutdown(wait=False)
+		self.resilience.shutdown()
+		self._stop_tracking()
+		self.speech.stop(timeout=1)
+		for cache in (self.cache, self._matrix_cache):
+			if cache is not None:
+				cache.flush()
+		if self.address_book is not None:
+			self.address_book.flush()
+		if self.store is not None:
+			self.store.close()
+		self.metrics.log_summary()
+		self.metrics.export_to(None)
 		self.Destroy()
 		logger.debug("GUI destroyed.")
 
@@ -468,11 +719,14 @@ class MainFrame(wx.Frame):  # type: ignore[misc, no-any-unimported]
 	def on_route_changed(self, event: Any) -> None:
 		"""Update the details box when the selection is changed."""
 		i: int = event.GetSelection()
-		self.output_area.SetValue(self.results[i])
+		self.speech.interrupt()  # The announcement of the previously selected route is no longer relevant.
+		self._show_route(i)
+		self._follow_route(i)
 
 	def on_search(self, event: Any) -> None:
 		"""Performs a directions search."""
-		self.results.clear()
+		self.results = RouteDetails([])
+		self._stream = None
 		self.label_routes.Disable()
 		self.routes.Disable()
 		self.routes.Clear()
@@ -486,8 +740,7 @@ class MainFrame(wx.Frame):  # type: ignore[misc, no-any-unimported]
 			return None
 		mode: str = self.modes.GetString(self.modes.GetSelection()).lower()
 		waypoints: list[str] = [point.strip() for point in self.waypoints_area.GetValue().split("|")]
-		if waypoints:
-			optimize_waypoints: bool = self.optimize_waypoints.IsChecked()
+		optimize_waypoints: bool = self.optimize_waypoints.IsChecked()
 		avoid: list[str] = []
 		if self.avoid_highways.IsChecked():
 			avoid.append("highways")
@@ -505,159 +758,154 @@ class MainFrame(wx.Frame):  # type: ignore[misc, no-any-unimported]
 		self.avoid_tolls.SetValue(False)
 		self.avoid_ferries.SetValue(False)
 		self.avoid_indoor.SetValue(False)
-		speech.say("Planning Trip.", True)
-		params: dict[str, Any] = {
-			"origin": origin,
-			"destination": destination,
-			"mode": mode,
-			"alternatives": True,
-			"language": "en",
-			"region": "us",
-			"units": "imperial",  # Can also be "metric".
-		}
-		if mode == "transit":
-			selection: int
-			if self.depart_arrive.GetSelection():
-				selection = self.depart_arrive.GetSelection() - 1
-				depart_arrive: str = ("departure_time", "arrival_time")[selection]
-				dt = self.selected_datetime().replace(tzinfo=self.tz_local).astimezone(self.tz_utc)
-				params[depart_arrive] = calendar.timegm(dt.utctimetuple())
-			else:
-				params["departure_time"] = None
-			# Travel Mode:
-			# bus indicates that the calculated route should prefer travel by bus.
-			# subway indicates that the calculated route should prefer travel by subway.
-			# train indicates that the calculated route should prefer travel by train.
-			# tram indicates that the calculated route should prefer travel by tram and light rail.
-			# rail indicates that the calculated route should prefer travel by train, tram, light rail, and subway.
-			# This is equivalent to transit_mode=train|tram|subway.
-			if self.transit_mode.GetSelection():
-				selection = self.transit_mode.GetSelection() - 1
-				transit_mode: str = ("bus", "rail")[selection]
-				params["transit_mode"] = transit_mode
-			if self.transit_routing_preference.GetSelection():
-				selection = self.transit_routing_preference.GetSelection() - 1
-				routing_preference: str = ("less_walking", "fewer_transfers")[selection]
-				params["transit_routing_preference"] = routing_preference
-		else:
-			if waypoints:
-				params["waypoints"] = waypoints
-				params["optimize_waypoints"] = optimize_waypoints
-			if avoid:
-				params["avoid"] = avoid
+		self.speech.say("Planning Trip.", True)
+		departure_time: Union[datetime, None] = None
+		arrival_time: Union[datetime, None] = None
+		if self.depart_arrive.GetSelection() == 1:
+			departure_time = self.selected_datetime()
+		elif self.depart_arrive.GetSelection() == 2:
+			arrival_time = self.selected_datetime()
+		selection: int
+		transit_mode: Union[str, None] = None
+		if self.transit_mode.GetSelection():
+			selection = self.transit_mode.GetSelection() - 1
+			transit_mode = TRANSIT_MODES[selection]
+		routing_preference: Union[str, None] = None
+		if self.transit_routing_preference.GetSelection():
+			selection = self.transit_routing_preference.GetSelection() - 1
+			routing_preference = TRANSIT_ROUTING_PREFERENCES[selection]
+		with span("search.build"):
+			params: dict[str, Any] = build_params(
+				origin,
+				destination,
+				mode,
+				waypoints=waypoints,
+				optimize_waypoints=optimize_waypoints,
+				avoid=avoid,
+				departure_time=departure_time,
+				arrival_time=arrival_time,
+				transit_mode=transit_mode,
+				transit_routing_preference=routing_preference,
+			)
+		self._search_started = time.perf_counter()
+		self._last_params = params
+		self._searches += 1
+		if self._searches % SUMMARY_INTERVAL == 0:
+			self.metrics.log_summary()
 		self.modes.SetSelection(0)
 		self.on_mode_changed(event.GetEventObject())
-		t: Thread = Thread(target=self._retrieve, kwargs=params)
-		t.start()
+		future: Future[Any] = self.fetch_pool.submit(params, group=SEARCH_GROUP)
+		future.add_done_callback(lambda future: wx.CallAfter(self._on_retrieved, future))
+
+	def _retrieve(self, params: dict[str, Any]) -> Any:
+		# Called from a fetch pool worker thread.
+		from googlemaps.exceptions import Timeout, TransportError
+
+		if self.store is None:
+			return self._retrieve_online(params)[0]
+		elif self.offline:
+			stored: Union[StoredResponse, None] = self.store.get(params)
+			if stored is None:
+				raise NotStoredError("No saved directions match this search.")
+			return stored
+		try:
+			response, cached = self._retrieve_online(params)
+		except (Timeout, TransportError, CircuitOpenError):
+			stored = self.store.get(params)
+			if stored is None:
+				raise
+			logger.debug("Unable to reach the server. Using saved directions.")
+			return stored
+		if response and not cached:
+			# The typed addresses are stored, since they can not be resolved to place IDs offline.
+			# Responses from the cache were stored when they were received, and storing them again
+			# would make them seem newer than they are.
+			self.store.put(params, response)
+		return response
+
+	def _retrieve_online(self, params: dict[str, Any]) -> tuple[Any, bool]:
+		# Called from a fetch pool worker thread.
+		# Returns the response, and True if it came from the cache.
+		if self.address_book is not None:
+			addresses: list[str] = [params["origin"], params["destination"], *params.get("waypoints", [])]
+			params = self.address_book.resolve_params(params, self.gmaps.geocode)
+			self.address_book.record_use(addresses)
+		if len(params.get("waypoints", ())) > MAX_WAYPOINTS:
+			# NumPy is only needed for routes with many waypoints, so it is imported when first used.
+			from .optimizer import plan_route
+
+			maps_client_cfg: dict[str, Any] = self.config.get("maps_client", {})
+			route: Any = plan_route(
+				self.gmaps,
+				params,
+				self.cache,
+				self._get_matrix_cache(),
+				workers=maps_client_cfg.get("workers", DEFAULT_WORKERS),
+				limiter=self.fetch_pool.limiter,
+				resilience=self.resilience,
+			)
+			# The optimized route is assembled from the responses of several searches.
+			return route, False
+		return fetch_directions(self.gmaps, params, self.cache, self.resilience)
+
+	def _get_matrix_cache(self) -> Union[DirectionsCache, None]:
+		# Called from a fetch pool worker thread.
+		from .matrix import create_matrix_cache
+
+		with self._matrix_cache_lock:
+			if self._matrix_cache is None:
+				self._matrix_cache = create_matrix_cache(self.config.get("cache", {}))
+			return self._matrix_cache
 
-	def _retrieve(self, **kwargs: Any) -> None:
+	def _on_retrieved(self, future: Future[Any]) -> None:
+		from googlemaps.exceptions import ApiError, HTTPError, Timeout, TransportError
+
+		if future.cancelled() or not self.fetch_pool.is_latest(future, SEARCH_GROUP):
+			logger.debug("Discarding the results of a superseded search.")
+			return None
 		try:
-			response = self.gmaps.directions(**kwargs)
-		except Timeout:
-			self.notify("error", "The server failed to respond.")
-		except (ApiError, HTTPError, TransportError) as e:
-			self.notify("error", e.message)
+			response: Any = future.result()
+		except (NotStoredError, CircuitOpenError) as e:
+			self.notify("error", str(e))
+		except DirectionsError:
+			return None  # The client could not be created, and the user has already been notified.
+		except (ApiError, HTTPError, Timeout, TransportError) as e:
+			increment("api.errors")
+			self.notify("error", error_message(e))
 		else:
-			wx.CallAfter(self._process_results, response)
-
-	def _process_leg(self, leg: Mapping[str, Any]) -> list[str]:
-		result: list[str] = []
-		text: list[str] = []
-		result.append(f"From: {leg['start_address']}\nTo: {leg['end_address']}")
-		if "distance" in leg:
-			text.append(f"Total Distance: {leg['distance']['text']}")
-		if "duration" in leg:
-			text.append(f"({leg['duration']['text']})")
-		if text:
-			result.append(" ".join(text))
-		if "departure_time" in leg:
-			result.append(f"Departing: {leg['departure_time']['text']}")
-		if "arrival_time" in leg:
-			result.append(f"Arriving: {leg['arrival_time']['text']}")
-		return result
-
-	def _process_step(self, step: Mapping[str, Any]) -> list[str]:
-		result: list[str] = []
-		text: list[str] = []
-		transit_details: dict[str, Any] = step.get("transit_details", {})
-		line: dict[str, Any] = transit_details.get("line", {})
-		vehicle: dict[str, Any] = line.get("vehicle", {})
-		if "departure_time" in transit_details:
-			text.append(f"At {transit_details['departure_time']['text']},")
-		if "short_name" in line or "name" in line:
-			line_name = " ".join((line.get("short_name", ""), line.get("name", "")))
-			text.append(f"board {line_name}")
-		if "name" in vehicle:
-			text.append(vehicle["name"])
-		if "headsign" in transit_details:
-			text.append(f"to {transit_details['headsign']}")
-		if "departure_stop" in transit_details:
-			text.append(f"from {transit_details['departure_stop']['name']}")
-		if "num_stops" in transit_details:
-			text.append(f"\nTravel {transit_details['num_stops']} stops,")
-		if step["travel_mode"] != "TRANSIT" and "html_instructions" in step:
-			html_instructions: str = step["html_instructions"].replace("<b>", "").replace("</b>", "")
-			text.append(
-				"\n".join(str(i) for i in BeautifulSoup(html_instructions, HTML_PARSER).findAll(text=True))
-			)
-			result.append(" ".join(text).capitalize())
-			text.clear()
-		if "distance" in step:
-			text.append(f"Travel {step['distance']['text']}")
-		if "duration" in step:
-			text.append(f"(about {step['duration']['text']})")
-		if text:
-			result.append(" ".join(text).capitalize())
-			text.clear()
-		if "arrival_time" in transit_details:
-			text.append(f"At {transit_details['arrival_time']['text']}")
-		if "arrival_stop" in transit_details:
-			text.append(f"disembark at {transit_details['arrival_stop']['name']}")
-		if text:
-			result.append(" ".join(text).capitalize())
-		return result
-
-	def _process_sub_step(self, sub_step: Mapping[str, Any]) -> list[str]:
-		result: list[str] = []
-		text: list[str] = []
-		if "html_instructions" in sub_step:
-			html_instructions: str = sub_step["html_instructions"].replace("<b>", "").replace("</b>", "")
-			result.append(
-				"* "
-				+ "\n* ".join(
-					str(i) for i in BeautifulSoup(html_instructions, HTML_PARSER).findAll(text=True)
-				).capitalize()
-			)
-			if "distance" in sub_step:
-				text.append(f"Travel {sub_step['distance']['text']}")
-			if "duration" in sub_step:
-				text.append(f"(about {sub_step['duration']['text']})")
-			if text:
-				result.append("* " + " ".join(text).capitalize())
-		return result
-
-	def _process_results(self, response: Sequence[Any]) -> None:
-		summaries: list[str] = []
-		details: list[str]
-		for route_counter, route in enumerate(response):
-			summaries.append(f"Route {route_counter + 1}")
-			details = []
-			for leg in route["legs"]:
-				details.extend(self._process_leg(leg))
-				for step in leg["steps"]:
-					details.extend(self._process_step(step))
-					for sub_step in step.get("steps", []):
-						details.extend(self._process_sub_step(sub_step))
-			if "warnings" in route:
-				details.append("")
-				details.append("\n".join(route["warnings"]))
-			self.results.append("\n".join(details).strip())
-		speech.say(f"{len(self.results)} Route{'' if len(self.results) == 1 else 's'} found.")
+			if isinstance(response, StoredResponse):
+				staleness: str = f"Saved {format_age(response.age)} ago"
+				if not response.exact:
+					staleness += " for a different time"
+				self._process_results(response.response, f"{staleness}.")
+			else:
+				self._process_results(response)
+
+	def _process_results(self, response: Sequence[Any], staleness: str = "") -> None:
+		with span("ui.process_results"):
+			self._show_results(response, staleness)
+		if self._search_started is not None:
+			# From pressing search until the first route is displayed.
+			record("search.total", time.perf_counter() - self._search_started)
+			self._search_started = None
+
+	def _show_results(self, response: Sequence[Any], staleness: str) -> None:
+		# Only the first route is formatted up front. The rest are formatted when
+		# selected, or while the program is otherwise idle, whichever comes first.
+		threshold: float = self.config.get("results", {}).get("similarity_threshold", DEFAULT_THRESHOLD)
+		self.results = RouteDetails(response, threshold)
+		self.status_bar.SetStatusText(f"Offline. {staleness}" if staleness else " ")
+		found: str = f"{len(self.results)} Route{'' if len(self.results) == 1 else 's'} found."
+		if self.results.suppressed:
+			suppressed: int = self.results.suppressed
+			found += f" {suppressed} similar route{'' if suppressed == 1 else 's'} hidden."
+		self.speech.say(f"{found} {staleness}" if staleness else found, True)
 		if not self.results:
 			return None
-		self.routes.SetItems(summaries)
+		self.routes.SetItems(self.results.summaries())
 		self.routes.SetSelection(0)
-		self.output_area.SetValue(self.results[0])
+		self._show_route(0, announce=True)
+		self._follow_route(0)
 		self.label_output_area.Enable()
 		self.output_area.Enable()
 		if len(self.results) > 1:
@@ -668,17 +916,94 @@ class MainFrame(wx.Frame):  # type: ignore[misc, no-any-unimported]
 		else:
 			self.output_area.SetFocus()
 
+	def _show_route(self, index: int, announce: bool = False) -> None:
+		"""Displays the details of a route, streaming them in if they have not been formatted yet."""
+		if self.results.is_formatted(index):
+			self._stream = None
+			self.output_area.SetValue(self.results[index])
+			return None
+		self.output_area.Clear()
+		chunks: Iterator[list[str]] = self.results.iter_chunks(index)
+		self._stream = chunks
+		self._append_chunks(self.results, index, chunks, [], announce)
+
+	def _announce(self, index: int, lines: list[str]) -> None:
+		"""Speaks the label of a route, followed by the first lines of its details."""
+		self.speech.say("\n".join((self.routes.GetString(index), *lines)))
+		if self._search_started is not None:
+			# From pressing search until the first instruction is queued to be spoken.
+			record("search.first_speech", time.perf_counter() - self._search_started)
+
+	def _append_chunks(
+		self,
+		results: RouteDetails,
+		index: int,
+		chunks: Iterator[list[str]],
+		lines: list[str],
+		announce: bool = False,
+	) -> None:
+		"""Appends a batch of formatted chunks to the output area, then yields to the event loop."""
+		if chunks is not self._stream:
+			return None  # Another route was selected, or a new search replaced these results.
+		batch: list[str] = []
+		consumed: int = 0
+		with span("ui.format_stream"):
+			for chunk in itertools.islice(chunks, STREAM_BATCH_SIZE):
+				batch.extend(chunk)
+				consumed += 1
+				if announce and consumed == ANNOUNCE_CHUNKS:
+					# Spoken before the rest of the batch is formatted or displayed.
+					self._announce(index, batch)
+					announce = False
+		if announce and batch:
+			self._announce(index, batch)  # The route has fewer chunks than are announced.
+		if batch:
+			with span("ui.update"):
+				text: str = "\n".join(batch)
+				self.output_area.AppendText(f"\n{text}" if lines else text)
+			lines.extend(batch)
+		if consumed:
+			wx.CallAfter(self._append_chunks, results, index, chunks, lines)
+		else:
+			self._stream = None
+			results.store(index, "\n".join(lines).strip())
+			wx.CallAfter(self._format_remaining, results)
+
+	def _format_remaining(self, results: RouteDetails) -> None:
+		"""Formats one route that has not been viewed yet, then yields to the event loop."""
+		if results is not self.results or self._stream is not None:
+			# A new search has replaced these results, or a route is being streamed, in which
+			# case formatting resumes once it finishes.
+			return None
+		index: Union[int, None] = results.next_unformatted()
+		if index is not None:
+			results[index]  # Formats and memoizes the route.
+			wx.CallAfter(self._format_remaining, results)
+
 
 def main() -> None:
+	if isFrozen():
+		logger.debug("Program is a binary build.")
+		import certifi
+
+		os.environ["REQUESTS_CA_BUNDLE"] = certifi.where()
+	else:
+		logger.debug("Program is running from source.")
+	logger.debug("Loading with default window size of %d/%d.", WINDOW_WIDTH, WINDOW_HEIGHT)
 	app = wx.App(redirect=False)
 	window = MainFrame(None, title=APP_NAME, size=(WINDOW_WIDTH, WINDOW_HEIGHT))
 	app.SetTopWindow(window)
 	window.Center()
 	window.ShowFullScreen(True, wx.FULLSCREEN_NOTOOLBAR)
+	# The time is measured in the callback, once the event loop is running.
+	wx.CallAfter(
+		lambda: logger.debug("Interactive after %.3f seconds.", time.perf_counter() - STARTUP_TIME)
+	)
 	app.MainLoop()
 
 
 def run() -> None:
+	setupLogging()
 	try:
 		logging.debug("Initializing")
 		main()
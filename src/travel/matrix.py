@@ -0,0 +1,493 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Travel times and distances between many origins and many destinations.
+
+Matrices are split into blocks that respect the element limits of the Distance Matrix API,
+the blocks are fetched concurrently, and each origin / destination pair is cached individually,
+so overlapping matrices only request the pairs that have not been seen before.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import argparse
+import csv
+import logging
+import sys
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Optional, TextIO, Union
+
+# Third-party Modules:
+import numpy as np
+from googlemaps.exceptions import ApiError, HTTPError, Timeout, TransportError
+
+# Local Modules:
+from .cache import DEFAULT_TIME_BUCKET, DEFAULT_TTL, DirectionsCache
+from .config import Config
+from .directions import (
+	MODES,
+	TRANSIT_MODES,
+	TRANSIT_ROUTING_PREFERENCES,
+	DirectionsError,
+	create_client,
+	error_message,
+	to_timestamp,
+)
+from .fetch import DEFAULT_QUERIES_PER_SECOND, DEFAULT_WORKERS, FetchPool, RateLimiter
+from .utils import getDataPath
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+MATRIX_CACHE_FILE: str = "matrix_cache.json"
+DEFAULT_MAX_CELLS: int = 10000
+# The limits of the Distance Matrix API for a single request.
+MAX_ORIGINS: int = 25
+MAX_DESTINATIONS: int = 25
+MAX_ELEMENTS: int = 100
+VALUES: tuple[str, ...] = ("duration", "distance")
+# Unlike the Directions API, the Distance Matrix API does not accept indoor.
+MATRIX_AVOID: tuple[str, ...] = ("tolls", "highways", "ferries")
+
+
+def build_matrix_params(
+	mode: str = "driving",
+	avoid: Optional[str] = None,
+	departure_time: Union[datetime, int, float, None] = None,
+	arrival_time: Union[datetime, int, float, None] = None,
+	transit_mode: Optional[str] = None,
+	transit_routing_preference: Optional[str] = None,
+) -> dict[str, Any]:
+	"""
+	Builds the keyword arguments for googlemaps.Client.distance_matrix, excluding the locations.
+
+	Args:
+		mode: One of driving, walking, bicycling, or transit.
+		avoid: A feature to avoid. Ignored for transit.
+		departure_time: The time to depart, or None to depart now.
+		arrival_time: The time to arrive by. Only used for transit, takes precedence over departure_time.
+		transit_mode: Either bus or rail, or None for both.
+		transit_routing_preference: Either less_walking or fewer_transfers, or None for the best route.
+
+	Returns:
+		The request parameters.
+
+	Raises:
+		DirectionsError: Invalid arguments were supplied.
+	"""
+	mode = mode.strip().lower()
+	if mode not in MODES:
+		raise DirectionsError(f"Invalid travel mode: {mode}")
+	params: dict[str, Any] = {"mode": mode, "language": "en", "region": "us", "units": "imperial"}
+	if mode == "transit":
+		if arrival_time is not None:
+			params["arrival_time"] = to_timestamp(arrival_time)
+		elif departure_time is not None:
+			params["departure_time"] = to_timestamp(departure_time)
+		if transit_mode:
+			if transit_mode not in TRANSIT_MODES:
+				raise DirectionsError(f"Invalid transit mode: {transit_mode}")
+			params["transit_mode"] = transit_mode
+		if transit_routing_preference:
+			if transit_routing_preference not in TRANSIT_ROUTING_PREFERENCES:
+				raise DirectionsError(f"Invalid transit routing preference: {transit_routing_preference}")
+			params["transit_routing_preference"] = transit_routing_preference
+	else:
+		if departure_time is not None:
+			# Durations in traffic are only returned when a departure time is given.
+			params["departure_time"] = to_timestamp(departure_time)
+		if avoid:
+			if avoid not in MATRIX_AVOID:
+				raise DirectionsError(f"Invalid feature to avoid: {avoid}")
+			params["avoid"] = avoid
+	return params
+
+
+def chunk_matrix(
+	origins: int,
+	destinations: int,
+	max_origins: int = MAX_ORIGINS,
+	max_destinations: int = MAX_DESTINATIONS,
+	max_elements: int = MAX_ELEMENTS,
+) -> Iterator[tuple[range, range]]:
+	"""
+	Splits a matrix into blocks that may each be retrieved with a single request.
+
+	Args:
+		origins: The number of origins.
+		destinations: The number of destinations.
+		max_origins: The maximum number of origins per request.
+		max_destinations: The maximum number of destinations per request.
+		max_elements: The maximum number of origin / destination pairs per request.
+
+	Yields:
+		The indices of the origins and destinations in each block.
+	"""
+	if origins <= 0 or destinations <= 0:
+		return None
+	columns: int = max(1, min(destinations, max_destinations, max_elements))
+	rows: int = max(1, min(origins, max_origins, max_elements // columns))
+	for row in range(0, origins, rows):
+		for column in range(0, destinations, columns):
+			yield range(row, min(row + rows, origins)), range(column, min(column + columns, destinations))
+
+
+def cell_params(params: Mapping[str, Any], origin: str, destination: str) -> dict[str, Any]:
+	"""
+	Builds the parameters that identify a single cell of a matrix in the cache.
+
+	Args:
+		params: The matrix request parameters, excluding the locations.
+		origin: The origin of the cell.
+		destination: The destination of the cell.
+
+	Returns:
+		The cell parameters.
+	"""
+	return {**params, "origin": origin, "destination": destination}
+
+
+def create_matrix_cache(settings: Mapping[str, Any]) -> Optional[DirectionsCache]:
+	"""
+	Creates a cache for matrix cells.
+
+	Args:
+		settings: The cache section of the configuration.
+
+	Returns:
+		The cache, or None if caching is disabled.
+	"""
+	if not settings.get("enabled", True):
+		return None
+	return DirectionsCache(
+		getDataPath(MATRIX_CACHE_FILE),
+		ttl=settings.get("ttl", DEFAULT_TTL),
+		max_entries=settings.get("matrix_max_entries", DEFAULT_MAX_CELLS),
+		time_bucket=settings.get("time_bucket", DEFAULT_TIME_BUCKET),
+	)
+
+
+class DistanceMatrix(object):
+	"""
+	Holds the travel times and distances between origins and destinations.
+
+	Durations are in seconds and distances in meters. Pairs without a route are NaN.
+	"""
+
+	def __init__(self, origins: Sequence[str], destinations: Sequence[str]) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			origins: The origins, one per row.
+			destinations: The destinations, one per column.
+		"""
+		self.origins: list[str] = list(origins)
+		self.destinations: list[str] = list(destinations)
+		shape: tuple[int, int] = (len(self.origins), len(self.destinations))
+		self.durations: np.ndarray = np.full(shape, np.nan)
+		self.distances: np.ndarray = np.full(shape, np.nan)
+		self.statuses: list[list[str]] = [[""] * shape[1] for _ in range(shape[0])]
+
+	@property
+	def shape(self) -> tuple[int, int]:
+		"""The number of origins and destinations."""
+		return len(self.origins), len(self.destinations)
+
+	def set_cell(self, row: int, column: int, element: Mapping[str, Any]) -> None:
+		"""
+		Stores an element of a distance matrix response.
+
+		Args:
+			row: The index of the origin.
+			column: The index of the destination.
+			element: The element. The duration in traffic is used when present.
+		"""
+		status: str = element.get("status", "UNKNOWN_ERROR")
+		self.statuses[row][column] = status
+		self.durations[row, column] = self.distances[row, column] = np.nan
+		if status != "OK":
+			return None
+		duration: Optional[Mapping[str, Any]] = element.get("duration_in_traffic") or element.get("duration")
+		if duration is not None:
+			self.durations[row, column] = duration["value"]
+		if "distance" in element:
+			self.distances[row, column] = element["distance"]["value"]
+
+	def values(self, by: str = "duration") -> np.ndarray:
+		"""
+		Retrieves the durations or distances.
+
+		Args:
+			by: Either duration or distance.
+
+		Returns:
+			The array, with one row per origin and one column per destination.
+
+		Raises:
+			ValueError: An unknown value was requested.
+		"""
+		if by == "duration":
+			return self.durations
+		elif by == "distance":
+			return self.distances
+		raise ValueError(f"Unknown matrix value: {by}")
+
+	def nearest_origins(self, destination: int, k: int = 1, by: str = "duration") -> list[tuple[int, float]]:
+		"""
+		Finds the origins closest to a destination.
+
+		Args:
+			destination: The index of the destination.
+			k: The maximum number of origins to return.
+			by: Either duration or distance.
+
+		Returns:
+			The indices of the origins and their durations or distances, closest first.
+			Origins without a route are excluded.
+		"""
+		return self._nearest(self.values(by)[:, destination], k)
+
+	def nearest_destinations(self, origin: int, k: int = 1, by: str = "duration") -> list[tuple[int, float]]:
+		"""
+		Finds the destinations closest to an origin.
+
+		Args:
+			origin: The index of the origin.
+			k: The maximum number of destinations to return.
+			by: Either duration or distance.
+
+		Returns:
+			The indices of the destinations and their durations or distances, closest first.
+			Destinations without a route are excluded.
+		"""
+		return self._nearest(self.values(by)[origin, :], k)
+
+	@staticmethod
+	def _nearest(vector: np.ndarray, k: int) -> list[tuple[int, float]]:
+		if k <= 0 or not vector.size:
+			return []
+		if k < vector.size:
+			# Partitioning first avoids sorting the whole row or column when only a few are needed.
+			candidates: np.ndarray = np.argpartition(vector, k - 1)[:k]
+		else:
+			candidates = np.arange(vector.size)
+		ordered: np.ndarray = candidates[np.argsort(vector[candidates], kind="stable")]
+		return [(int(index), float(vector[index])) for index in ordered if not np.isnan(vector[index])]
+
+	def write_csv(self, fileObj: TextIO) -> None:
+		"""
+		Writes the matrix as CSV, with one row per origin / destination pair.
+
+		Args:
+			fileObj: The file object to write to.
+		"""
+		writer = csv.writer(fileObj)
+		writer.writerow(("origin", "destination", "status", "duration", "distance"))
+		for row, origin in enumerate(self.origins):
+			for column, destination in enumerate(self.destinations):
+				duration: float = self.durations[row, column]
+				distance: float = self.distances[row, column]
+				writer.writerow(
+					(
+						origin,
+						destination,
+						self.statuses[row][column],
+						"" if np.isnan(duration) else int(duration),
+						"" if np.isnan(distance) else int(distance),
+					)
+				)
+
+
+def _block_requests(
+	matrix: DistanceMatrix, missing: np.ndarray, params: Mapping[str, Any]
+) -> Iterator[tuple[list[int], list[int], dict[str, Any]]]:
+	for block_rows, block_columns in chunk_matrix(*matrix.shape):
+		block: np.ndarray = missing[block_rows.start : block_rows.stop, block_columns.start : block_columns.stop]
+		if not block.any():
+			continue
+		# Only the origins and destinations of the block that have uncached pairs are requested.
+		rows: list[int] = [block_rows.start + int(index) for index in np.flatnonzero(block.any(axis=1))]
+		columns: list[int] = [block_columns.start + int(index) for index in np.flatnonzero(block.any(axis=0))]
+		request: dict[str, Any] = {
+			**params,
+			"origins": [matrix.origins[row] for row in rows],
+			"destinations": [matrix.destinations[column] for column in columns],
+		}
+		yield rows, columns, request
+
+
+def _store_response(
+	matrix: DistanceMatrix,
+	rows: Sequence[int],
+	columns: Sequence[int],
+	response: Mapping[str, Any],
+	params: Mapping[str, Any],
+) -> list[tuple[dict[str, Any], Any]]:
+	cells: list[tuple[dict[str, Any], Any]] = []
+	for row, response_row in zip(rows, response.get("rows", [])):
+		for column, element in zip(columns, response_row.get("elements", [])):
+			matrix.set_cell(row, column, element)
+			# Pairs without a route are cached too, but transient failures are not.
+			if element.get("status") in ("OK", "ZERO_RESULTS", "NOT_FOUND"):
+				cells.append((cell_params(params, matrix.origins[row], matrix.destinations[column]), element))
+	return cells
+
+
+def get_matrix(
+	origins: Sequence[str],
+	destinations: Sequence[str],
+	params: Mapping[str, Any],
+	fetch: Callable[..., Any],
+	cache: Optional[DirectionsCache] = None,
+	workers: int = DEFAULT_WORKERS,
+	queries_per_second: float = DEFAULT_QUERIES_PER_SECOND,
+	limiter: Optional[RateLimiter] = None,
+) -> DistanceMatrix:
+	"""
+	Retrieves travel times and distances between every origin and destination.
+
+	Only the pairs that are not cached are requested. Blocks that fail are reported
+	in the statuses of their cells, and the remaining blocks are still retrieved.
+
+	Args:
+		origins: The origins.
+		destinations: The destinations.
+		params: The request parameters, excluding the locations, as built by build_matrix_params.
+		fetch: A callable that performs a distance matrix request, such as googlemaps.Client.distance_matrix.
+		cache: The cache for individual cells, or None to always query the server.
+		workers: The maximum number of concurrent requests.
+		queries_per_second: The maximum sustained request rate, or 0 for no limit.
+		limiter: A rate limiter shared with other requests, in which case queries_per_second is ignored.
+
+	Returns:
+		The matrix.
+	"""
+	matrix: DistanceMatrix = DistanceMatrix(origins, destinations)
+	missing: np.ndarray = np.ones(matrix.shape, dtype=bool)
+	if cache is not None:
+		for row, origin in enumerate(matrix.origins):
+			for column, destination in enumerate(matrix.destinations):
+				element: Optional[Mapping[str, Any]] = cache.get(cell_params(params, origin, destination))
+				if element is not None:
+					matrix.set_cell(row, column, element)
+					missing[row, column] = False
+	pool: FetchPool = FetchPool(lambda request: fetch(**request), workers, queries_per_second, limiter=limiter)
+	try:
+		pending: list[tuple[list[int], list[int], Future[Any]]] = [
+			(rows, columns, pool.submit(request))
+			for rows, columns, request in _block_requests(matrix, missing, params)
+		]
+		for rows, columns, future in pending:
+			try:
+				response: Mapping[str, Any] = future.result()
+			except (ApiError, HTTPError, Timeout, TransportError) as e:
+				logger.warning(f"Unable to retrieve part of the distance matrix: {error_message(e)}")
+				for row in rows:
+					for column in columns:
+						matrix.statuses[row][column] = error_message(e)
+				continue
+			cells: list[tuple[dict[str, Any], Any]] = _store_response(matrix, rows, columns, response, params)
+			if cache is not None and cells:
+				cache.put_many(cells)
+	finally:
+		pool.shutdown()
+	return matrix
+
+
+def read_locations(fileObj: TextIO) -> list[str]:
+	"""
+	Reads locations from a file, one per line.
+
+	Args:
+		fileObj: The file object to read from.
+
+	Returns:
+		The locations, excluding blank lines.
+	"""
+	return [line.strip() for line in fileObj if line.strip()]
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+	"""
+	Runs the distance matrix command.
+
+	Args:
+		args: The command line arguments, or None to use sys.argv.
+
+	Returns:
+		The exit status.
+	"""
+	parser = argparse.ArgumentParser(
+		prog="travel matrix", description="Finds travel times between many origins and destinations."
+	)
+	parser.add_argument("origins", help="A file of origins, one per line.")
+	parser.add_argument("destinations", help="A file of destinations, one per line.")
+	parser.add_argument("-o", "--output", help="The file to write CSV results to. Defaults to stdout.")
+	parser.add_argument("-m", "--mode", choices=MODES, default="driving", help="The travel mode.")
+	parser.add_argument("-a", "--avoid", choices=MATRIX_AVOID, help="A feature to avoid.")
+	parser.add_argument("-d", "--departure-time", type=int, help="The departure time as a Unix timestamp.")
+	parser.add_argument(
+		"-k",
+		"--nearest",
+		type=int,
+		help="Instead of the full matrix, print the nearest origins to each destination.",
+	)
+	parser.add_argument("-b", "--by", choices=VALUES, default="duration", help="The value to rank by.")
+	parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent requests.")
+	parser.add_argument(
+		"-q",
+		"--queries-per-second",
+		type=float,
+		default=DEFAULT_QUERIES_PER_SECOND,
+		help="The maximum request rate.",
+	)
+	parser.add_argument("--no-cache", action="store_true", help="Do not use the matrix cache.")
+	options = parser.parse_args(args)
+	with open(options.origins, "r", encoding="utf-8") as fileObj:
+		origins: list[str] = read_locations(fileObj)
+	with open(options.destinations, "r", encoding="utf-8") as fileObj:
+		destinations: list[str] = read_locations(fileObj)
+	cfg = Config.shared()
+	maps_client_cfg: dict[str, Any] = cfg.get("maps_client", {})
+	cache_cfg: dict[str, Any] = cfg.get("cache", {})
+	del cfg
+	try:
+		params: dict[str, Any] = build_matrix_params(
+			options.mode, avoid=options.avoid, departure_time=options.departure_time
+		)
+		client = create_client(maps_client_cfg)
+	except DirectionsError as e:
+		print(e, file=sys.stderr)
+		return 1
+	cache: Optional[DirectionsCache] = None if options.no_cache else create_matrix_cache(cache_cfg)
+	matrix: DistanceMatrix = get_matrix(
+		origins, destinations, params, client.distance_matrix, cache, options.workers, options.queries_per_second
+	)
+	if cache is not None:
+		cache.flush()
+	outputObj: TextIO = open(options.output, "w", encoding="utf-8", newline="") if options.output else sys.stdout
+	try:
+		if options.nearest:
+			writer = csv.writer(outputObj)
+			writer.writerow(("destination", "rank", "origin", options.by))
+			for column, destination in enumerate(matrix.destinations):
+				nearest: list[tuple[int, float]] = matrix.nearest_origins(column, options.nearest, options.by)
+				for rank, (row, value) in enumerate(nearest, 1):
+					writer.writerow((destination, rank, matrix.origins[row], int(value)))
+		else:
+			matrix.write_csv(outputObj)
+	finally:
+		if outputObj is not sys.stdout:
+			outputObj.close()
+	failed: int = sum(status != "OK" for row in matrix.statuses for status in row)
+	print(f"{matrix.durations.size - failed} pairs found, {failed} without a route.", file=sys.stderr)
+	return 0 if not failed else 2
@@ -0,0 +1,257 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Lightweight timing and counting of the stages of a search.
+
+Durations are kept in a rolling window per stage, from which percentiles are summarized.
+Every measurement may also be appended to a JSON lines file for offline analysis.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import json
+import logging
+import math
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import AbstractContextManager, contextmanager
+from typing import Any, Optional, TextIO
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+DEFAULT_WINDOW: int = 500  # Measurements kept per stage.
+PERCENTILES: tuple[int, ...] = (50, 95, 99)
+
+
+def create_metrics(settings: Mapping[str, Any]) -> Metrics:
+	"""
+	Configures the shared metrics.
+
+	Args:
+		settings: The metrics section of the configuration.
+
+	Returns:
+		The shared metrics.
+	"""
+	metrics: Metrics = Metrics.shared()
+	metrics.enabled = settings.get("enabled", True)
+	metrics.window = max(1, settings.get("window", DEFAULT_WINDOW))
+	metrics.export_to(settings.get("export"))
+	return metrics
+
+
+def percentile(values: Sequence[float], rank: float) -> float:
+	"""
+	Finds a percentile of some values, using the nearest rank method.
+
+	Args:
+		values: The values, sorted in ascending order.
+		rank: The percentile, from 0 to 100.
+
+	Returns:
+		The value at the percentile, or NaN if there are no values.
+	"""
+	if not values:
+		return math.nan
+	index: int = max(0, math.ceil(rank / 100 * len(values)) - 1)
+	return values[min(index, len(values) - 1)]
+
+
+class Metrics(object):
+	"""
+	Implements thread safe collection of stage durations and event counts.
+	"""
+
+	_shared: Optional[Metrics] = None
+	_shared_lock: threading.Lock = threading.Lock()
+
+	def __init__(self, window: int = DEFAULT_WINDOW, enabled: bool = True) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			window: The number of most recent durations to keep for each stage.
+			enabled: True if measurements should be recorded, False otherwise.
+		"""
+		self.window: int = window
+		self.enabled: bool = enabled
+		self._lock: threading.Lock = threading.Lock()
+		self._durations: dict[str, deque[float]] = {}
+		self._counters: Counter[str] = Counter()
+		self._export: Optional[TextIO] = None
+
+	@classmethod
+	def shared(cls) -> Metrics:
+		"""
+		Retrieves the metrics shared by the whole program.
+
+		Returns:
+			The shared metrics.
+		"""
+		with cls._shared_lock:
+			if cls._shared is None:
+				cls._shared = cls()
+			return cls._shared
+
+	def export_to(self, filename: Optional[str]) -> None:
+		"""
+		Appends every measurement to a JSON lines file.
+
+		Args:
+			filename: The path of the file, or None to stop exporting.
+		"""
+		with self._lock:
+			if self._export is not None:
+				self._export.close()
+				self._export = None
+			if filename:
+				try:
+					self._export = open(filename, "a", encoding="utf-8")
+				except IOError as e:
+					logger.warning(f"Unable to export metrics to {filename}: {e.strerror}")
+
+	def record(self, name: str, seconds: float) -> None:
+		"""
+		Records the duration of a stage.
+
+		Args:
+			name: The name of the stage.
+			seconds: The duration.
+		"""
+		if not self.enabled:
+			return None
+		with self._lock:
+			durations: Optional[deque[float]] = self._durations.get(name)
+			if durations is None or durations.maxlen != self.window:
+				durations = self._durations[name] = deque(durations or (), maxlen=self.window)
+			durations.append(seconds)
+			self._write({"time": time.time(), "name": name, "duration": seconds})
+
+	def increment(self, name: str, count: int = 1) -> None:
+		"""
+		Increases a counter.
+
+		Args:
+			name: The name of the counter.
+			count: The amount to increase it by.
+		"""
+		if not self.enabled:
+			return None
+		with self._lock:
+			self._counters[name] += count
+			self._write({"time": time.time(), "name": name, "count": count})
+
+	@contextmanager
+	def span(self, name: str) -> Iterator[None]:
+		"""
+		Times the code within a with statement.
+
+		Args:
+			name: The name of the stage.
+
+		Yields:
+			Nothing.
+		"""
+		start: float = time.perf_counter()
+		try:
+			yield None
+		finally:
+			self.record(name, time.perf_counter() - start)
+
+	def summary(self) -> dict[str, Any]:
+		"""
+		Summarizes the measurements.
+
+		Returns:
+			The number of measurements and the percentiles in seconds for each stage, and the counters.
+		"""
+		with self._lock:
+			durations: dict[str, list[float]] = {name: sorted(values) for name, values in self._durations.items()}
+			counters: dict[str, int] = dict(self._counters)
+		stages: dict[str, dict[str, Any]] = {}
+		for name, values in sorted(durations.items()):
+			stages[name] = {"count": len(values)}
+			for rank in PERCENTILES:
+				stages[name][f"p{rank}"] = percentile(values, rank)
+		return {"stages": stages, "counters": dict(sorted(counters.items()))}
+
+	def format_summary(self) -> list[str]:
+		"""
+		Formats the summary for display.
+
+		Returns:
+			One line per stage and counter.
+		"""
+		summary: dict[str, Any] = self.summary()
+		lines: list[str] = []
+		for name, stage in summary["stages"].items():
+			ranks: str = ", ".join(f"p{rank} {stage[f'p{rank}'] * 1000:.1f} ms" for rank in PERCENTILES)
+			lines.append(f"{name}: {ranks} ({stage['count']} samples)")
+		lines.extend(f"{name}: {count}" for name, count in summary["counters"].items())
+		return lines or ["No measurements yet."]
+
+	def log_summary(self) -> None:
+		"""Writes the summary to the log."""
+		if logger.isEnabledFor(logging.INFO):
+			logger.info("Performance summary:\n%s", "\n".join(self.format_summary()))
+
+	def reset(self) -> None:
+		"""Discards all measurements."""
+		with self._lock:
+			self._durations.clear()
+			self._counters.clear()
+
+	def _write(self, record: dict[str, Any]) -> None:
+		# Called with the lock held.
+		if self._export is None:
+			return None
+		try:
+			self._export.write(json.dumps(record) + "\n")
+			self._export.flush()
+		except IOError as e:  # pragma: no cover
+			logger.warning(f"Unable to export metrics: {e.strerror}")
+			self._export = None
+
+
+def span(name: str) -> AbstractContextManager[None]:
+	"""
+	Times the code within a with statement, using the shared metrics.
+
+	Args:
+		name: The name of the stage.
+
+	Returns:
+		The context manager.
+	"""
+	return Metrics.shared().span(name)
+
+
+def increment(name: str, count: int = 1) -> None:
+	"""
+	Increases a counter in the shared metrics.
+
+	Args:
+		name: The name of the counter.
+		count: The amount to increase it by.
+	"""
+	Metrics.shared().increment(name, count)
+
+
+def record(name: str, seconds: float) -> None:
+	"""
+	Records the duration of a stage in the shared metrics.
+
+	Args:
+		name: The name of the stage.
+		seconds: The duration.
+	"""
+	Metrics.shared().record(name, seconds)
@@ -0,0 +1,265 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+A local stand-in for the Directions API, for offline load and latency testing.
+
+Run with `python -m travel.mockserver`, then set maps_client.base_url in the
+configuration to the address the server prints. Any well formed API key is accepted.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from collections.abc import Callable, Mapping, Sequence
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Union
+from urllib.parse import parse_qs, urlsplit
+
+# Local Modules:
+from .samples import SAMPLES
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+DIRECTIONS_PATH: str = "/maps/api/directions/json"
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8765
+
+
+def sample_responder(query: Mapping[str, str]) -> Sequence[Mapping[str, Any]]:
+	"""
+	Chooses a synthetic response that resembles what the real server would return for a query.
+
+	Args:
+		query: The query string parameters of the request.
+
+	Returns:
+		The routes.
+	"""
+	mode: str = query.get("mode", "driving")
+	if mode == "transit":
+		return SAMPLES["transit"]()
+	elif mode in ("walking", "bicycling"):
+		return SAMPLES["short_walk"]()
+	elif query.get("alternatives") == "true":
+		return SAMPLES["alternatives"]()
+	return SAMPLES["long_drive"]()
+
+
+def load_recordings(filenames: Sequence[str]) -> Callable[[Mapping[str, str]], Sequence[Mapping[str, Any]]]:
+	"""
+	Loads recorded responses for replaying.
+
+	Each file may contain either the list of routes returned by googlemaps.Client.directions,
+	or the complete JSON body returned by the API.
+	Requests are mapped to recordings by their origin and destination, so that
+	the same request always receives the same response.
+
+	Args:
+		filenames: The paths of the recordings.
+
+	Returns:
+		A callable that chooses a recording for a query.
+
+	Raises:
+		ValueError: No recordings were given.
+	"""
+	recordings: list[Sequence[Mapping[str, Any]]] = []
+	for filename in filenames:
+		with open(filename, "r", encoding="utf-8") as fileObj:
+			data: Any = json.load(fileObj)
+		recordings.append(data["routes"] if isinstance(data, Mapping) else data)
+	if not recordings:
+		raise ValueError("At least one recording is required.")
+
+	def responder(query: Mapping[str, str]) -> Sequence[Mapping[str, Any]]:
+		seed: bytes = f"{query.get('origin', '')}|{query.get('destination', '')}".encode("utf-8")
+		return recordings[zlib.crc32(seed) % len(recordings)]
+
+	return responder
+
+
+class MockDirectionsServer(ThreadingHTTPServer):
+	"""
+	Implements an HTTP server that answers directions requests with synthetic or recorded responses.
+
+	Failures are injected at random, in order to exercise the error handling of the client.
+	HTTP 500 responses are retried by googlemaps.Client until its retry timeout expires,
+	after which it raises Timeout. Denied requests raise ApiError, and dropped
+	connections raise TransportError. Quota exceeded responses are retried by
+	the client, like they would be against the real server.
+	"""
+
+	daemon_threads: bool = True
+
+	def __init__(
+		self,
+		address: tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT),
+		responder: Callable[[Mapping[str, str]], Sequence[Mapping[str, Any]]] = sample_responder,
+		latency: float = 0.0,
+		jitter: float = 0.0,
+		error_rate: float = 0.0,
+		denied_rate: float = 0.0,
+		drop_rate: float = 0.0,
+		quota_rate: float = 0.0,
+		seed: Optional[int] = None,
+	) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			address: The host and port to listen on. Use port 0 to choose a free port.
+			responder: A callable that chooses the routes for a query.
+			latency: The mean number of seconds to wait before responding.
+			jitter: The standard deviation of the latency in seconds.
+			error_rate: The fraction of requests that receive an HTTP 500 response.
+			denied_rate: The fraction of requests that receive a REQUEST_DENIED status.
+			drop_rate: The fraction of requests whose connection is closed without a response.
+			quota_rate: The fraction of requests that receive an OVER_QUERY_LIMIT status.
+			seed: The seed for the random number generator, or None for a random seed.
+		"""
+		super().__init__(address, DirectionsRequestHandler)
+		self.responder: Callable[[Mapping[str, str]], Sequence[Mapping[str, Any]]] = responder
+		self.latency: float = latency
+		self.jitter: float = jitter
+		self.error_rate: float = error_rate
+		self.denied_rate: float = denied_rate
+		self.drop_rate: float = drop_rate
+		self.quota_rate: float = quota_rate
+		self.counts: Counter[str] = Counter()
+		self._random: random.Random = random.Random(seed)
+		self._lock: threading.Lock = threading.Lock()
+
+	@property
+	def base_url(self) -> str:
+		"""The value for maps_client.base_url that points a client at this server."""
+		host, port = self.server_address[:2]
+		return f"http://{host!s}:{port}"
+
+	def choose_outcome(self) -> tuple[str, float]:
+		"""
+		Chooses how to answer a request.
+
+		Returns:
+			The outcome, and the number of seconds to wait before answering.
+		"""
+		with self._lock:
+			delay: float = self.latency
+			if self.jitter:
+				delay = max(0.0, self._random.gauss(self.latency, self.jitter))
+			roll: float = self._random.random()
+			outcome: str = "ok"
+			for name, rate in (
+				("error", self.error_rate),
+				("denied", self.denied_rate),
+				("drop", self.drop_rate),
+				("quota", self.quota_rate),
+			):
+				if roll < rate:
+					outcome = name
+					break
+				roll -= rate
+			self.counts[outcome] += 1
+		return outcome, delay
+
+
+class DirectionsRequestHandler(BaseHTTPRequestHandler):
+	"""Handles requests to the mock directions server."""
+
+	server: MockDirectionsServer
+	protocol_version: str = "HTTP/1.1"
+
+	def log_message(self, format: str, *args: Any) -> None:
+		logger.debug(format, *args)
+
+	def send_json(self, status: int, body: Union[Mapping[str, Any], str]) -> None:
+		data: bytes = (body if isinstance(body, str) else json.dumps(body)).encode("utf-8")
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json; charset=UTF-8")
+		self.send_header("Content-Length", str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+
+	def do_GET(self) -> None:
+		url = urlsplit(self.path)
+		if url.path != DIRECTIONS_PATH:
+			self.send_json(404, {"status": "NOT_FOUND", "error_message": f"Unknown path: {url.path}"})
+			return None
+		query: dict[str, str] = {key: values[-1] for key, values in parse_qs(url.query).items()}
+		outcome, delay = self.server.choose_outcome()
+		if delay:
+			time.sleep(delay)
+		if outcome == "error":
+			self.send_json(500, "Internal Server Error")
+		elif outcome == "denied":
+			self.send_json(200, {"status": "REQUEST_DENIED", "error_message": "Simulated denied request."})
+		elif outcome == "drop":
+			self.close_connection = True
+		elif outcome == "quota":
+			self.send_json(200, {"status": "OVER_QUERY_LIMIT", "error_message": "Simulated quota exceeded."})
+		else:
+			routes: Sequence[Mapping[str, Any]] = self.server.responder(query)
+			self.send_json(200, {"status": "OK" if routes else "ZERO_RESULTS", "routes": routes})
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+	"""
+	Runs the mock server command.
+
+	Args:
+		args: The command line arguments, or None to use sys.argv.
+
+	Returns:
+		The exit status.
+	"""
+	parser = argparse.ArgumentParser(
+		prog="travel.mockserver", description="Serves mock directions responses."
+	)
+	parser.add_argument("recordings", nargs="*", help="Recorded JSON responses to replay instead of samples.")
+	parser.add_argument("--host", default=DEFAULT_HOST, help="The address to listen on.")
+	parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help="The port to listen on.")
+	parser.add_argument("-l", "--latency", type=float, default=0.0, help="Mean response latency in seconds.")
+	parser.add_argument("-j", "--jitter", type=float, default=0.0, help="Latency standard deviation.")
+	parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of HTTP 500 responses.")
+	parser.add_argument("--denied-rate", type=float, default=0.0, help="Fraction of denied requests.")
+	parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of dropped connections.")
+	parser.add_argument("--quota-rate", type=float, default=0.0, help="Fraction of quota exceeded responses.")
+	parser.add_argument("--seed", type=int, help="Seed for reproducible latencies and failures.")
+	options = parser.parse_args(args)
+	server: MockDirectionsServer = MockDirectionsServer(
+		(options.host, options.port),
+		load_recordings(options.recordings) if options.recordings else sample_responder,
+		latency=options.latency,
+		jitter=options.jitter,
+		error_rate=options.error_rate,
+		denied_rate=options.denied_rate,
+		drop_rate=options.drop_rate,
+		quota_rate=options.quota_rate,
+		seed=options.seed,
+	)
+	print(f"Serving mock directions at {server.base_url}")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+		print(", ".join(f"{outcome}: {count}" for outcome, count in sorted(server.counts.items())))
+	return 0
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
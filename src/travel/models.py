@@ -0,0 +1,299 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
+
+
+def _points(data: Optional[Mapping[str, Any]]) -> Optional[str]:
+	# Polylines are given as {"points": "<encoded polyline>"}.
+	return None if data is None else data.get("points")
+
+
+class Model(object):
+	"""
+	Implements the base class for the compact, slotted representations of a directions response.
+
+	Only the fields that are used by the program are kept. Unused fields, such as bounds and copyrights,
+	are dropped when a response is parsed. Polylines are kept in their compact encoded form, and are
+	only decoded by the geometry module when needed.
+	"""
+
+	__slots__: tuple[str, ...] = ()
+
+	def __eq__(self, other: object) -> bool:
+		if type(self) is not type(other):
+			return NotImplemented
+		return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+	def __repr__(self) -> str:
+		fields: str = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+		return f"{type(self).__name__}({fields})"
+
+
+class Quantity(Model):
+	"""A value from a directions response, along with its human readable text."""
+
+	__slots__: tuple[str, ...] = ("text", "value")
+
+	def __init__(self, text: str, value: Any = None) -> None:
+		self.text: str = text
+		self.value: Any = value
+
+	@classmethod
+	def from_dict(cls, data: Optional[Mapping[str, Any]]) -> Optional[Quantity]:
+		"""
+		Parses a distance, duration, or time.
+
+		Args:
+			data: The dict from the directions response, or None if the field was absent.
+
+		Returns:
+			The quantity, or None if the field was absent.
+		"""
+		if data is None:
+			return None
+		return cls(data["text"], data.get("value"))
+
+
+class TransitDetails(Model):
+	"""The transit specific details of a step."""
+
+	__slots__: tuple[str, ...] = (
+		"departure_time",
+		"arrival_time",
+		"departure_stop",
+		"arrival_stop",
+		"headsign",
+		"num_stops",
+		"line_short_name",
+		"line_name",
+		"vehicle_name",
+	)
+
+	def __init__(
+		self,
+		departure_time: Optional[Quantity] = None,
+		arrival_time: Optional[Quantity] = None,
+		departure_stop: Optional[str] = None,
+		arrival_stop: Optional[str] = None,
+		headsign: Optional[str] = None,
+		num_stops: Optional[int] = None,
+		line_short_name: Optional[str] = None,
+		line_name: Optional[str] = None,
+		vehicle_name: Optional[str] = None,
+	) -> None:
+		self.departure_time: Optional[Quantity] = departure_time
+		self.arrival_time: Optional[Quantity] = arrival_time
+		self.departure_stop: Optional[str] = departure_stop
+		self.arrival_stop: Optional[str] = arrival_stop
+		self.headsign: Optional[str] = headsign
+		self.num_stops: Optional[int] = num_stops
+		self.line_short_name: Optional[str] = line_short_name
+		self.line_name: Optional[str] = line_name
+		self.vehicle_name: Optional[str] = vehicle_name
+
+	@classmethod
+	def from_dict(cls, data: Mapping[str, Any]) -> TransitDetails:
+		"""
+		Parses the transit details of a step.
+
+		Args:
+			data: The transit_details dict from the directions response.
+
+		Returns:
+			The transit details.
+		"""
+		line: Mapping[str, Any] = data.get("line", {})
+		departure_stop: Optional[Mapping[str, Any]] = data.get("departure_stop")
+		arrival_stop: Optional[Mapping[str, Any]] = data.get("arrival_stop")
+		return cls(
+			departure_time=Quantity.from_dict(data.get("departure_time")),
+			arrival_time=Quantity.from_dict(data.get("arrival_time")),
+			departure_stop=departure_stop["name"] if departure_stop is not None else None,
+			arrival_stop=arrival_stop["name"] if arrival_stop is not None else None,
+			headsign=data.get("headsign"),
+			num_stops=data.get("num_stops"),
+			line_short_name=line.get("short_name"),
+			line_name=line.get("name"),
+			vehicle_name=line.get("vehicle", {}).get("name"),
+		)
+
+
+class Step(Model):
+	"""A step of a route leg, or a sub step of a transit step."""
+
+	__slots__: tuple[str, ...] = (
+		"travel_mode",
+		"html_instructions",
+		"distance",
+		"duration",
+		"transit_details",
+		"steps",
+		"polyline",
+	)
+
+	def __init__(
+		self,
+		travel_mode: str,
+		html_instructions: Optional[str] = None,
+		distance: Optional[Quantity] = None,
+		duration: Optional[Quantity] = None,
+		transit_details: Optional[TransitDetails] = None,
+		steps: Sequence[Step] = (),
+		polyline: Optional[str] = None,
+	) -> None:
+		self.travel_mode: str = travel_mode
+		self.html_instructions: Optional[str] = html_instructions
+		self.distance: Optional[Quantity] = distance
+		self.duration: Optional[Quantity] = duration
+		self.transit_details: Optional[TransitDetails] = transit_details
+		self.steps: tuple[Step, ...] = tuple(steps)
+		self.polyline: Optional[str] = polyline
+
+	@classmethod
+	def from_dict(cls, data: Mapping[str, Any]) -> Step:
+		"""
+		Parses a step.
+
+		Args:
+			data: The step dict from the directions response.
+
+		Returns:
+			The step.
+		"""
+		transit_details: Optional[Mapping[str, Any]] = data.get("transit_details")
+		return cls(
+			travel_mode=data.get("travel_mode", ""),
+			html_instructions=data.get("html_instructions"),
+			distance=Quantity.from_dict(data.get("distance")),
+			duration=Quantity.from_dict(data.get("duration")),
+			transit_details=None if transit_details is None else TransitDetails.from_dict(transit_details),
+			steps=[cls.from_dict(step) for step in data.get("steps", ())],
+			polyline=_points(data.get("polyline")),
+		)
+
+
+class Leg(Model):
+	"""A leg of a route, from the origin or a waypoint, to the next waypoint or the destination."""
+
+	__slots__: tuple[str, ...] = (
+		"start_address",
+		"end_address",
+		"distance",
+		"duration",
+		"departure_time",
+		"arrival_time",
+		"steps",
+	)
+
+	def __init__(
+		self,
+		start_address: str,
+		end_address: str,
+		distance: Optional[Quantity] = None,
+		duration: Optional[Quantity] = None,
+		departure_time: Optional[Quantity] = None,
+		arrival_time: Optional[Quantity] = None,
+		steps: Sequence[Step] = (),
+	) -> None:
+		self.start_address: str = start_address
+		self.end_address: str = end_address
+		self.distance: Optional[Quantity] = distance
+		self.duration: Optional[Quantity] = duration
+		self.departure_time: Optional[Quantity] = departure_time
+		self.arrival_time: Optional[Quantity] = arrival_time
+		self.steps: tuple[Step, ...] = tuple(steps)
+
+	@classmethod
+	def from_dict(cls, data: Mapping[str, Any]) -> Leg:
+		"""
+		Parses a leg.
+
+		Args:
+			data: The leg dict from the directions response.
+
+		Returns:
+			The leg.
+		"""
+		return cls(
+			start_address=data["start_address"],
+			end_address=data["end_address"],
+			distance=Quantity.from_dict(data.get("distance")),
+			duration=Quantity.from_dict(data.get("duration")),
+			departure_time=Quantity.from_dict(data.get("departure_time")),
+			arrival_time=Quantity.from_dict(data.get("arrival_time")),
+			steps=[Step.from_dict(step) for step in data.get("steps", ())],
+		)
+
+
+class Route(Model):
+	"""A route from a directions response."""
+
+	__slots__: tuple[str, ...] = ("summary", "legs", "warnings", "overview_polyline")
+
+	def __init__(
+		self,
+		summary: str = "",
+		legs: Sequence[Leg] = (),
+		warnings: Optional[Sequence[str]] = None,
+		overview_polyline: Optional[str] = None,
+	) -> None:
+		self.summary: str = summary
+		self.legs: tuple[Leg, ...] = tuple(legs)
+		self.warnings: Optional[tuple[str, ...]] = tuple(warnings) if warnings is not None else None
+		self.overview_polyline: Optional[str] = overview_polyline
+
+	@classmethod
+	def from_dict(cls, data: Mapping[str, Any]) -> Route:
+		"""
+		Parses a route.
+
+		Args:
+			data: The route dict from the directions response.
+
+		Returns:
+			The route.
+		"""
+		warnings: Optional[Sequence[str]] = data.get("warnings")
+		return cls(
+			summary=data.get("summary", ""),
+			legs=[Leg.from_dict(leg) for leg in data["legs"]],
+			warnings=warnings,
+			overview_polyline=_points(data.get("overview_polyline")),
+		)
+
+	@property
+	def duration(self) -> Optional[int]:
+		"""The total duration of the route in seconds, or None if unknown."""
+		values: list[Any] = [leg.duration.value if leg.duration is not None else None for leg in self.legs]
+		if not values or None in values:
+			return None
+		return int(sum(values))
+
+	@property
+	def distance(self) -> Optional[int]:
+		"""The total distance of the route in meters, or None if unknown."""
+		values: list[Any] = [leg.distance.value if leg.distance is not None else None for leg in self.legs]
+		if not values or None in values:
+			return None
+		return int(sum(values))
+
+
+def parse_response(response: Sequence[Mapping[str, Any]]) -> list[Route]:
+	"""
+	Parses a directions response.
+
+	Args:
+		response: The directions response.
+
+	Returns:
+		The routes.
+	"""
+	return [Route.from_dict(route) for route in response]
@@ -0,0 +1,323 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Routes through more waypoints than the Directions API accepts in a single request.
+
+When the order of the waypoints may be rearranged, a travel time matrix between every
+stop is retrieved, and the order is found locally with a nearest neighbour tour that is
+improved by 2-opt and Or-opt moves. The tour is then split into consecutive requests
+that are retrieved concurrently, and their legs are stitched into a single route.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import logging
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Optional
+
+# Third-party Modules:
+import numpy as np
+
+# Local Modules:
+from .cache import DirectionsCache
+from .directions import MAX_WAYPOINTS, get_directions
+from .fetch import DEFAULT_QUERIES_PER_SECOND, DEFAULT_WORKERS, FetchPool, RateLimiter
+from .matrix import MATRIX_AVOID, build_matrix_params, get_matrix
+
+
+if TYPE_CHECKING:  # pragma: no cover
+	import googlemaps
+
+	from .resilience import Resilience
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+MAX_SEGMENT_LENGTH: int = 3  # The longest run of stops that Or-opt moves.
+MAX_PASSES: int = 1000
+IMPROVEMENT_TOLERANCE: float = 1e-9
+
+
+def _prepare_costs(costs: np.ndarray) -> np.ndarray:
+	costs = np.array(costs, dtype=float)
+	finite: np.ndarray = np.isfinite(costs)
+	# Unreachable pairs are made more expensive than any tour that avoids them.
+	penalty: float = (float(costs[finite].sum()) if finite.any() else 0.0) + 1.0
+	costs[~finite] = penalty
+	np.fill_diagonal(costs, 0.0)
+	return costs
+
+
+def tour_cost(order: Sequence[int], costs: np.ndarray) -> float:
+	"""
+	Calculates the cost of visiting stops in order.
+
+	Args:
+		order: The indices of the stops.
+		costs: The cost of travelling from each stop (rows) to each other stop (columns).
+
+	Returns:
+		The sum of the costs between consecutive stops.
+	"""
+	indices: np.ndarray = np.asarray(order, dtype=int)
+	return float(costs[indices[:-1], indices[1:]].sum())
+
+
+def nearest_neighbour(costs: np.ndarray) -> list[int]:
+	"""
+	Builds a tour from the first stop to the last by repeatedly visiting the closest unvisited stop.
+
+	Args:
+		costs: The cost of travelling from each stop (rows) to each other stop (columns).
+
+	Returns:
+		The indices of the stops in order. The first and last stops are fixed.
+	"""
+	count: int = len(costs)
+	if count <= 2:
+		return list(range(count))
+	visited: np.ndarray = np.zeros(count, dtype=bool)
+	visited[[0, count - 1]] = True
+	order: list[int] = [0]
+	for _ in range(count - 2):
+		current: int = int(np.argmin(np.where(visited, np.inf, costs[order[-1]])))
+		visited[current] = True
+		order.append(current)
+	order.append(count - 1)
+	return order
+
+
+def two_opt_move(order: Sequence[int], costs: np.ndarray) -> Optional[list[int]]:
+	"""
+	Finds the segment reversal that improves a tour the most.
+
+	Costs may be asymmetric, so the change in cost of travelling the reversed segment
+	backwards is included. Every candidate move is evaluated at once.
+
+	Args:
+		order: The indices of the stops. The first and last stops are fixed.
+		costs: The cost of travelling from each stop (rows) to each other stop (columns).
+
+	Returns:
+		The improved tour, or None if no reversal improves it.
+	"""
+	tour: np.ndarray = np.asarray(order, dtype=int)
+	if len(tour) < 4:
+		return None
+	forward: np.ndarray = np.concatenate(([0.0], np.cumsum(costs[tour[:-1], tour[1:]])))
+	backward: np.ndarray = np.concatenate(([0.0], np.cumsum(costs[tour[1:], tour[:-1]])))
+	positions: np.ndarray = np.arange(1, len(tour) - 1)
+	first: np.ndarray = positions[:, np.newaxis]  # The first position of the reversed segment.
+	last: np.ndarray = positions[np.newaxis, :]  # The last position of the reversed segment.
+	before, start, end, after = tour[first - 1], tour[first], tour[last], tour[last + 1]
+	delta: np.ndarray = (
+		costs[before, end]
+		+ costs[start, after]
+		- costs[before, start]
+		- costs[end, after]
+		+ (backward[last] - backward[first])
+		- (forward[last] - forward[first])
+	)
+	delta[last <= first] = np.inf
+	index: int = int(np.argmin(delta))
+	if not delta.flat[index] < -IMPROVEMENT_TOLERANCE:
+		return None
+	row, column = np.unravel_index(index, delta.shape)
+	i: int = int(positions[row])
+	j: int = int(positions[column])
+	return [*tour[:i].tolist(), *tour[i : j + 1][::-1].tolist(), *tour[j + 1 :].tolist()]
+
+
+def or_opt_move(order: Sequence[int], costs: np.ndarray) -> Optional[list[int]]:
+	"""
+	Finds the relocation of a short run of stops that improves a tour the most.
+
+	Args:
+		order: The indices of the stops. The first and last stops are fixed.
+		costs: The cost of travelling from each stop (rows) to each other stop (columns).
+
+	Returns:
+		The improved tour, or None if no relocation improves it.
+	"""
+	tour: np.ndarray = np.asarray(order, dtype=int)
+	best: tuple[float, int, int, int] = (-IMPROVEMENT_TOLERANCE, 0, 0, 0)
+	edges: np.ndarray = np.arange(len(tour) - 1)[np.newaxis, :]  # Insert between edges and edges + 1.
+	for length in range(1, min(MAX_SEGMENT_LENGTH, len(tour) - 3) + 1):
+		starts: np.ndarray = np.arange(1, len(tour) - length)[:, np.newaxis]
+		before, head = tour[starts - 1], tour[starts]
+		tail, after = tour[starts + length - 1], tour[starts + length]
+		removed: np.ndarray = costs[before, head] + costs[tail, after] - costs[before, after]
+		left, right = tour[edges], tour[edges + 1]
+		inserted: np.ndarray = costs[left, head] + costs[tail, right] - costs[left, right]
+		delta: np.ndarray = inserted - removed
+		# Edges touching the run of stops can not receive it.
+		delta[(edges >= starts - 1) & (edges < starts + length)] = np.inf
+		index: int = int(np.argmin(delta))
+		if delta.flat[index] < best[0]:
+			row, column = np.unravel_index(index, delta.shape)
+			best = (float(delta.flat[index]), int(starts[row, 0]), length, int(edges[0, column]))
+	if best[0] >= -IMPROVEMENT_TOLERANCE:
+		return None
+	_, start, length, edge = best
+	run: list[int] = tour[start : start + length].tolist()
+	remaining: list[int] = tour[:start].tolist() + tour[start + length :].tolist()
+	# The edge index refers to the original tour, so it shifts if it followed the run.
+	position: int = edge + 1 if edge < start else edge + 1 - length
+	return remaining[:position] + run + remaining[position:]
+
+
+def optimize_order(costs: np.ndarray, max_passes: int = MAX_PASSES) -> list[int]:
+	"""
+	Finds a short tour from the first stop to the last that visits every other stop once.
+
+	Args:
+		costs: The cost of travelling from each stop (rows) to each other stop (columns).
+			Missing costs may be NaN.
+		max_passes: The maximum number of improving moves to make.
+
+	Returns:
+		The indices of the stops in order. The first and last stops are fixed.
+	"""
+	costs = _prepare_costs(costs)
+	order: list[int] = nearest_neighbour(costs)
+	for _ in range(max_passes):
+		improved: Optional[list[int]] = two_opt_move(order, costs)
+		if improved is None:
+			improved = or_opt_move(order, costs)
+		if improved is None:
+			break
+		order = improved
+	return order
+
+
+def split_tour(stops: Sequence[str], max_waypoints: int = MAX_WAYPOINTS) -> list[list[str]]:
+	"""
+	Splits a tour into consecutive parts that each fit in a single directions request.
+
+	Args:
+		stops: The origin, waypoints, and destination in order.
+		max_waypoints: The maximum number of waypoints per request.
+
+	Returns:
+		The parts. The last stop of each part is the first stop of the next.
+	"""
+	step: int = max(1, max_waypoints + 1)
+	return [list(stops[index : index + step + 1]) for index in range(0, max(1, len(stops) - 1), step)]
+
+
+def stitch_routes(
+	responses: Sequence[Sequence[Mapping[str, Any]]], waypoint_order: Sequence[int]
+) -> list[dict[str, Any]]:
+	"""
+	Joins the first route of consecutive directions responses into a single route.
+
+	Args:
+		responses: The directions responses, in the order they are travelled.
+		waypoint_order: The order the original waypoints are visited in.
+
+	Returns:
+		A directions response with one route, or no routes if any part has no route.
+	"""
+	if not responses or not all(responses):
+		return []
+	routes: list[Mapping[str, Any]] = [response[0] for response in responses]
+	summaries: list[str] = [route["summary"] for route in routes if route.get("summary")]
+	warnings: list[str] = [warning for route in routes for warning in route.get("warnings", ())]
+	return [
+		{
+			"summary": ", ".join(dict.fromkeys(summaries)),
+			"legs": [leg for route in routes for leg in route["legs"]],
+			"warnings": list(dict.fromkeys(warnings)),
+			"copyrights": routes[0].get("copyrights", ""),
+			"waypoint_order": list(waypoint_order),
+		}
+	]
+
+
+def plan_route(  # type: ignore[no-any-unimported]
+	client: googlemaps.Client,
+	params: Mapping[str, Any],
+	cache: Optional[DirectionsCache] = None,
+	matrix_cache: Optional[DirectionsCache] = None,
+	max_waypoints: int = MAX_WAYPOINTS,
+	workers: int = DEFAULT_WORKERS,
+	queries_per_second: float = DEFAULT_QUERIES_PER_SECOND,
+	limiter: Optional[RateLimiter] = None,
+	resilience: Optional[Resilience] = None,
+) -> Any:
+	"""
+	Retrieves directions through any number of waypoints.
+
+	Requests within the waypoint limit are passed to the server unchanged. Larger requests are sent
+	from pools of their own, since waiting on the pool the caller runs in could deadlock it, but
+	they may share its rate limiter.
+
+	Args:
+		client: The maps client.
+		params: The keyword arguments for googlemaps.Client.directions.
+		cache: The directions cache, or None to always query the server.
+		matrix_cache: The cache for travel times between stops, or None to always query the server.
+		max_waypoints: The maximum number of waypoints per request.
+		workers: The maximum number of concurrent requests.
+		queries_per_second: The maximum sustained request rate, or 0 for no limit.
+		limiter: A rate limiter shared with other requests, in which case queries_per_second is ignored.
+		resilience: The policy for retrying and hedging each request, or None to send them once.
+
+	Returns:
+		The directions response.
+	"""
+	waypoints: list[str] = list(params.get("waypoints", ()))
+	if len(waypoints) <= max_waypoints:
+		return get_directions(client, params, cache, resilience)
+	stops: list[str] = [params["origin"], *waypoints, params["destination"]]
+	order: list[int] = list(range(len(stops)))
+	if params.get("optimize_waypoints"):
+		# The Distance Matrix API only accepts one feature to avoid, and not every feature the
+		# Directions API does. The matrix only decides the order of the stops, so the rest are ignored.
+		avoid: list[str] = [item for item in params.get("avoid", ()) if item in MATRIX_AVOID]
+		matrix_params: dict[str, Any] = build_matrix_params(
+			params.get("mode", "driving"), avoid=avoid[0] if len(avoid) == 1 else None
+		)
+
+		def distance_matrix(**kwargs: Any) -> Any:
+			if resilience is None:
+				return client.distance_matrix(**kwargs)
+			return resilience.call(lambda: client.distance_matrix(**kwargs))
+
+		matrix = get_matrix(
+			stops, stops, matrix_params, distance_matrix, matrix_cache, workers, queries_per_second, limiter
+		)
+		order = optimize_order(matrix.durations)
+		logger.debug("Optimized the order of %d waypoints.", len(waypoints))
+	parts: list[list[str]] = split_tour([stops[index] for index in order], max_waypoints)
+	pool: FetchPool = FetchPool(
+		lambda part_params: get_directions(client, part_params, cache, resilience),
+		workers,
+		queries_per_second,
+		limiter=limiter,
+	)
+	try:
+		futures: list[Future[Any]] = [
+			pool.submit(
+				{
+					**params,
+					"origin": part[0],
+					"destination": part[-1],
+					"waypoints": part[1:-1],
+					"optimize_waypoints": False,
+					"alternatives": False,
+				}
+			)
+			for part in parts
+		]
+		responses: list[Any] = [future.result() for future in futures]
+	finally:
+		pool.shutdown()
+	return stitch_routes(responses, [index - 1 for index in order[1:-1]])
@@ -0,0 +1,316 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Retries, hedged requests, and a circuit breaker, for keeping searches responsive on unreliable networks.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+# Local Modules:
+from .directions import DirectionsError
+from .fetch import DEFAULT_WORKERS
+from .metrics import increment, percentile
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+DEFAULT_ATTEMPTS: int = 2
+DEFAULT_BACKOFF_BASE: float = 0.5  # Seconds.
+DEFAULT_BACKOFF_MAX: float = 8.0  # Seconds.
+DEFAULT_HEDGE_PERCENTILE: float = 95.0
+DEFAULT_HEDGE_MIN_SAMPLES: int = 20
+DEFAULT_LATENCY_WINDOW: int = 200
+DEFAULT_FAILURE_THRESHOLD: int = 5
+DEFAULT_RESET_TIMEOUT: float = 30.0  # Seconds.
+
+
+class CircuitOpenError(DirectionsError):
+	"""Raised instead of sending a request, while the server is considered to be down."""
+
+
+def create_resilience(settings: Mapping[str, Any], workers: int = DEFAULT_WORKERS) -> Resilience:
+	"""
+	Creates a resilience policy.
+
+	Args:
+		settings: The resilience section of the configuration.
+		workers: The maximum number of concurrent requests.
+
+	Returns:
+		The policy.
+	"""
+	return Resilience(
+		attempts=settings.get("attempts", DEFAULT_ATTEMPTS),
+		backoff_base=settings.get("backoff_base", DEFAULT_BACKOFF_BASE),
+		backoff_max=settings.get("backoff_max", DEFAULT_BACKOFF_MAX),
+		hedge=settings.get("hedge", False),
+		hedge_percentile=settings.get("hedge_percentile", DEFAULT_HEDGE_PERCENTILE),
+		breaker=CircuitBreaker(
+			settings.get("failure_threshold", DEFAULT_FAILURE_THRESHOLD),
+			settings.get("reset_timeout", DEFAULT_RESET_TIMEOUT),
+		),
+		workers=workers,
+	)
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+	"""
+	Calculates how long to wait before retrying, using exponential backoff with full jitter.
+
+	The jitter spreads out the retries of clients that failed at the same time,
+	so they do not all hit the server again at once.
+
+	Args:
+		attempt: The number of attempts that have failed, starting from 1.
+		base: The upper bound of the first delay.
+		maximum: The upper bound of any delay.
+
+	Returns:
+		A random delay in seconds, between 0 and the lesser of maximum and base * 2 ** (attempt - 1).
+	"""
+	return random.uniform(0, min(maximum, base * 2 ** max(0, attempt - 1)))
+
+
+def is_transient(error: BaseException) -> bool:
+	"""
+	Determines whether a request that failed may succeed if it is retried.
+
+	Args:
+		error: The exception raised by the maps client.
+
+	Returns:
+		True for timeouts, connection errors, and server errors, False otherwise. Exceeding the query
+		quota is not transient, since retrying only uses more of it.
+	"""
+	from googlemaps.exceptions import HTTPError, Timeout, TransportError, _OverQueryLimit
+
+	if isinstance(error, _OverQueryLimit):
+		return False
+	elif isinstance(error, HTTPError):
+		return int(getattr(error, "status_code", 0)) >= 500
+	return isinstance(error, (Timeout, TransportError))
+
+
+class CircuitBreaker(object):
+	"""
+	Implements a thread safe circuit breaker.
+
+	After a number of consecutive transient failures, the circuit opens, and requests fail immediately
+	instead of waiting for the server to time out. Once the reset timeout passes, a single trial request
+	is allowed through. The circuit closes if it succeeds, and opens again if it fails.
+	"""
+
+	def __init__(
+		self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT
+	) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			failure_threshold: The number of consecutive failures that open the circuit, or 0 to never open it.
+			reset_timeout: The number of seconds the circuit stays open before a trial request.
+		"""
+		self.failure_threshold: int = failure_threshold
+		self.reset_timeout: float = reset_timeout
+		self._failures: int = 0
+		self._opened: Optional[float] = None
+		self._trial: bool = False
+		self._lock: threading.Lock = threading.Lock()
+
+	@property
+	def is_open(self) -> bool:
+		"""True if requests are currently being rejected, False otherwise."""
+		with self._lock:
+			return self._opened is not None and (
+				self._trial or time.monotonic() - self._opened < self.reset_timeout
+			)
+
+	def allow(self) -> None:
+		"""
+		Checks whether a request may be sent.
+
+		Raises:
+			CircuitOpenError: The circuit is open.
+		"""
+		with self._lock:
+			if self._opened is None:
+				return None
+			remaining: float = self.reset_timeout - (time.monotonic() - self._opened)
+			if remaining <= 0 and not self._trial:
+				self._trial = True  # Half open. This request is the trial.
+				return None
+		increment("resilience.rejected")
+		raise CircuitOpenError(
+			"The server is not responding. Searches will be sent again in "
+			+ f"{max(1, math.ceil(remaining))} seconds."
+		)
+
+	def record_success(self) -> None:
+		"""Closes the circuit."""
+		with self._lock:
+			if self._opened is not None:
+				logger.debug("Circuit closed.")
+			self._failures = 0
+			self._opened = None
+			self._trial = False
+
+	def record_failure(self) -> None:
+		"""Counts a transient failure, opening the circuit if there have been too many in a row."""
+		with self._lock:
+			self._failures += 1
+			if self._trial or (
+				self._opened is None and 0 < self.failure_threshold <= self._failures
+			):
+				logger.debug("Circuit opened after %d consecutive failures.", self._failures)
+				increment("resilience.circuit_opened")
+				self._opened = time.monotonic()
+				self._trial = False
+
+
+class Resilience(object):
+	"""
+	Implements a policy for sending requests to an unreliable server.
+
+	Transient failures are retried with jittered exponential backoff. Optionally, if a request takes
+	longer than most recent requests, an identical hedge request is sent, and whichever finishes first
+	is used. A circuit breaker stops requests from being sent while the server is down.
+	"""
+
+	def __init__(
+		self,
+		attempts: int = DEFAULT_ATTEMPTS,
+		backoff_base: float = DEFAULT_BACKOFF_BASE,
+		backoff_max: float = DEFAULT_BACKOFF_MAX,
+		hedge: bool = False,
+		hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+		breaker: Optional[CircuitBreaker] = None,
+		workers: int = DEFAULT_WORKERS,
+	) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			attempts: The maximum number of times a request is sent.
+			backoff_base: The upper bound in seconds of the delay before the first retry.
+			backoff_max: The upper bound in seconds of the delay before any retry.
+			hedge: True if slow requests should be hedged, False otherwise.
+			hedge_percentile: The percentile of recent request durations after which a request is hedged.
+			breaker: The circuit breaker, or None to use one with the default settings.
+			workers: The maximum number of concurrent requests, used to size the pool of hedging threads.
+		"""
+		self.attempts: int = max(1, attempts)
+		self.backoff_base: float = backoff_base
+		self.backoff_max: float = backoff_max
+		self.hedge: bool = hedge
+		self.hedge_percentile: float = hedge_percentile
+		self.breaker: CircuitBreaker = breaker if breaker is not None else CircuitBreaker()
+		self._workers: int = max(1, workers)
+		self._latencies: deque[float] = deque(maxlen=DEFAULT_LATENCY_WINDOW)
+		self._lock: threading.Lock = threading.Lock()
+		self._executor: Optional[ThreadPoolExecutor] = None
+
+	def hedge_delay(self) -> Optional[float]:
+		"""
+		Calculates how long to wait for a request before hedging it.
+
+		Returns:
+			The delay in seconds, or None if hedging is disabled or there are too few recent requests to tell.
+		"""
+		if not self.hedge:
+			return None
+		with self._lock:
+			if len(self._latencies) < DEFAULT_HEDGE_MIN_SAMPLES:
+				return None
+			latencies: list[float] = sorted(self._latencies)
+		return percentile(latencies, self.hedge_percentile)
+
+	def call(self, request: Callable[[], Any]) -> Any:
+		"""
+		Sends a request according to the policy.
+
+		Args:
+			request: A callable that sends the request and returns the response.
+
+		Returns:
+			The response.
+
+		Raises:
+			CircuitOpenError: The server is considered to be down, so the request was not sent.
+		"""
+		attempt: int = 0
+		while True:
+			self.breaker.allow()
+			attempt += 1
+			try:
+				response: Any = self._send(request)
+			except Exception as e:
+				if not is_transient(e):
+					self.breaker.record_success()  # The server responded.
+					raise
+				self.breaker.record_failure()
+				if attempt >= self.attempts or self.breaker.is_open:
+					raise
+				delay: float = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+				logger.debug("Retrying in %.2f seconds after a transient failure: %s", delay, e)
+				increment("resilience.retries")
+				time.sleep(delay)
+			else:
+				self.breaker.record_success()
+				return response
+
+	def shutdown(self) -> None:
+		"""Stops the hedging threads, without waiting for requests that lost a race to finish."""
+		with self._lock:
+			if self._executor is not None:
+				self._executor.shutdown(wait=False)
+				self._executor = None
+
+	def _timed(self, request: Callable[[], Any]) -> Any:
+		start: float = time.perf_counter()
+		response: Any = request()
+		with self._lock:
+			self._latencies.append(time.perf_counter() - start)
+		return response
+
+	def _send(self, request: Callable[[], Any]) -> Any:
+		delay: Optional[float] = self.hedge_delay()
+		if delay is None:
+			return self._timed(request)
+		with self._lock:
+			if self._executor is None:
+				# A primary and a hedge for each concurrent request.
+				self._executor = ThreadPoolExecutor(max_workers=self._workers * 2, thread_name_prefix="hedge")
+			executor: ThreadPoolExecutor = self._executor
+		primary: Future[Any] = executor.submit(self._timed, request)
+		done, pending = wait((primary,), timeout=delay)
+		if not done:
+			logger.debug("Hedging a request that has taken longer than %.2f seconds.", delay)
+			increment("resilience.hedges")
+			pending.add(executor.submit(self._timed, request))
+		error: Optional[BaseException] = None
+		while pending or done:
+			for future in done:
+				error = future.exception()
+				if error is None:
+					return future.result()
+			if not pending:
+				break
+			done, pending = wait(pending, return_when=FIRST_COMPLETED)
+		assert error is not None
+		raise error
@@ -0,0 +1,211 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Synthetic directions responses, modeled on responses recorded from the Directions API.
+
+The responses are generated deterministically, so that benchmarks and offline tests
+always exercise the same data without bundling large recordings.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+from collections.abc import Callable
+from typing import Any
+
+
+MANEUVERS: tuple[str, ...] = (
+	"Head <b>north</b> on <b>Main St</b> toward <b>1st Ave</b>",
+	"Turn <b>right</b> onto <b>Oak St</b>",
+	"Turn <b>left</b> onto <b>Elm St</b><div style=\"font-size:0.9em\">Pass by the pharmacy</div>",
+	"Keep <b>left</b> at the fork to continue on <b>State Route 9</b>",
+	"Take exit <b>14</b> toward <b>Downtown</b>",
+	"Merge onto <b>I-90 W</b><div style=\"font-size:0.9em\">Toll road</div>",
+	"Slight <b>right</b> to stay on <b>Pine St</b>&nbsp;&amp; continue",
+	"At the roundabout, take the <b>2nd</b> exit onto <b>Harbor Blvd</b>",
+)
+STOP_LOCATION: dict[str, float] = {"lat": 40.0, "lng": -75.0}
+DESTINATION_NOTE: str = "<div style=\"font-size:0.9em\">Destination will be on the right</div>"
+
+
+def _quantity(text: str, value: int) -> dict[str, Any]:
+	return {"text": text, "value": value}
+
+
+def _distance(meters: int) -> dict[str, Any]:
+	if meters < 160:
+		return _quantity(f"{round(meters * 3.281)} ft", meters)
+	return _quantity(f"{meters / 1609.344:.1f} mi", meters)
+
+
+def _duration(seconds: int) -> dict[str, Any]:
+	return _quantity(f"{max(1, seconds // 60)} mins", seconds)
+
+
+def _time(timestamp: int) -> dict[str, Any]:
+	hours, minutes = divmod(timestamp // 60 % 1440, 60)
+	return {"text": f"{hours % 12 or 12}:{minutes:02d} {'am' if hours < 12 else 'pm'}", "value": timestamp}
+
+
+def _step(index: int, travel_mode: str, meters: int, seconds: int) -> dict[str, Any]:
+	return {
+		"travel_mode": travel_mode,
+		"html_instructions": MANEUVERS[index % len(MANEUVERS)],
+		"distance": _distance(meters),
+		"duration": _duration(seconds),
+		"polyline": {"points": "a~l~Fjk~uOwHJy@P"},
+		"start_location": {"lat": 40.0 + index / 1000, "lng": -75.0 - index / 1000},
+		"end_location": {"lat": 40.0 + (index + 1) / 1000, "lng": -75.0 - (index + 1) / 1000},
+	}
+
+
+def _leg(start: str, end: str, steps: list[dict[str, Any]], **extra: Any) -> dict[str, Any]:
+	if steps:
+		steps[-1] = {**steps[-1], "html_instructions": steps[-1]["html_instructions"] + DESTINATION_NOTE}
+	return {
+		"start_address": start,
+		"end_address": end,
+		"distance": _distance(sum(step["distance"]["value"] for step in steps)),
+		"duration": _duration(sum(step["duration"]["value"] for step in steps)),
+		"steps": steps,
+		**extra,
+	}
+
+
+def _route(summary: str, legs: list[dict[str, Any]], warnings: list[str]) -> dict[str, Any]:
+	return {
+		"summary": summary,
+		"legs": legs,
+		"warnings": warnings,
+		"overview_polyline": {"points": "a~l~Fjk~uOwHJy@P"},
+		"copyrights": "Map data ©2024",
+		"waypoint_order": [],
+	}
+
+
+def short_walk() -> list[dict[str, Any]]:
+	"""
+	Generates a short walking route with a handful of steps.
+
+	Returns:
+		The directions response.
+	"""
+	steps: list[dict[str, Any]] = [
+		_step(index, "WALKING", 80 + index * 25, 60 + index * 20) for index in range(4)
+	]
+	return [
+		_route(
+			"Main St",
+			[_leg("100 Main St, Springfield", "City Hall, Springfield", steps)],
+			["Walking directions are in beta. Use caution."],
+		)
+	]
+
+
+def long_drive() -> list[dict[str, Any]]:
+	"""
+	Generates a long driving route through two waypoints, with many steps per leg.
+
+	Returns:
+		The directions response.
+	"""
+	stops: tuple[str, ...] = ("Springfield", "Shelbyville", "Capital City", "Ogdenville")
+	legs: list[dict[str, Any]] = [
+		_leg(
+			stops[leg_counter],
+			stops[leg_counter + 1],
+			[
+				_step(leg_counter * 60 + index, "DRIVING", 400 + index * 150, 30 + index * 10)
+				for index in range(60)
+			],
+		)
+		for leg_counter in range(len(stops) - 1)
+	]
+	return [_route("I-90 W", legs, [])]
+
+
+def transit() -> list[dict[str, Any]]:
+	"""
+	Generates a multi-leg transit route, where each walking step has many sub steps.
+
+	Returns:
+		The directions response.
+	"""
+	legs: list[dict[str, Any]] = []
+	departure: int = 1_700_000_000
+	for leg_counter in range(2):
+		steps: list[dict[str, Any]] = []
+		for index in range(8):
+			if index % 2 == 0:
+				walk: dict[str, Any] = _step(index, "WALKING", 500, 400)
+				walk["html_instructions"] = f"Walk to Stop {leg_counter}{index}"
+				walk["steps"] = [_step(index + sub, "WALKING", 40, 30) for sub in range(12)]
+				steps.append(walk)
+			else:
+				ride: dict[str, Any] = _step(index, "TRANSIT", 5000, 900)
+				ride["html_instructions"] = f"Bus towards Terminal {index}"
+				ride["transit_details"] = {
+					"departure_time": _time(departure),
+					"arrival_time": _time(departure + 900),
+					"departure_stop": {"name": f"Stop {leg_counter}{index - 1}", "location": STOP_LOCATION},
+					"arrival_stop": {"name": f"Stop {leg_counter}{index + 1}", "location": STOP_LOCATION},
+					"headsign": f"Terminal {index}",
+					"num_stops": 7 + index,
+					"line": {
+						"short_name": str(40 + index),
+						"name": "Crosstown",
+						"vehicle": {"name": "Bus", "type": "BUS"},
+						"agencies": [{"name": "Springfield Transit", "url": "http://example.com"}],
+					},
+				}
+				ride["steps"] = []
+				steps.append(ride)
+				departure += 1200
+		legs.append(
+			_leg(
+				f"Station {leg_counter}",
+				f"Station {leg_counter + 1}",
+				steps,
+				departure_time=_time(departure - 4800),
+				arrival_time=_time(departure),
+			)
+		)
+	return [_route("", legs, ["Walking directions are in beta. Use caution."])]
+
+
+def alternatives() -> list[dict[str, Any]]:
+	"""
+	Generates a driving response with six alternative routes.
+
+	Returns:
+		The directions response.
+	"""
+	return [
+		_route(
+			f"Route {route_counter}",
+			[
+				_leg(
+					"Springfield",
+					"Shelbyville",
+					[
+						_step(route_counter + index, "DRIVING", 300 + index * 100, 25 + index * 5)
+						for index in range(30 + route_counter * 5)
+					],
+				)
+			],
+			["This route has tolls."] if route_counter % 2 else [],
+		)
+		for route_counter in range(6)
+	]
+
+
+SAMPLES: dict[str, Callable[[], list[dict[str, Any]]]] = {
+	"short_walk": short_walk,
+	"long_drive": long_drive,
+	"transit": transit,
+	"alternatives": alternatives,
+}
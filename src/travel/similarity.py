@@ -0,0 +1,156 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Detects alternative routes that are nearly the same, so that only distinct routes are listed.
+
+Each route is reduced to a set of tokens, made of consecutive pairs of its steps, which capture the
+sequence of maneuvers, and the encoded polylines of its steps, which capture the roads travelled.
+A MinHash signature of fixed size is computed from the tokens, so that the similarity of two routes
+is estimated by comparing their signatures, regardless of the number of steps in either route.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import random
+import re
+import zlib
+from collections.abc import Iterator, Sequence
+from typing import Optional
+
+# Local Modules:
+from .models import Route, Step, TransitDetails
+
+
+DEFAULT_THRESHOLD: float = 0.8  # Routes at least this similar are considered duplicates.
+SIGNATURE_SIZE: int = 64
+MAX_LABEL_NAMES: int = 3
+MERSENNE_PRIME: int = (1 << 61) - 1
+TAG_PATTERN: re.Pattern[str] = re.compile(r"<[^>]*>|\s+")
+# The coefficients of the universal hash functions, fixed so that signatures are reproducible.
+_rng: random.Random = random.Random(0)
+HASH_COEFFICIENTS: tuple[tuple[int, int], ...] = tuple(
+	(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(SIGNATURE_SIZE)
+)
+del _rng
+
+
+def _step_token(step: Step) -> str:
+	details: str = ""
+	if step.transit_details is not None:
+		details = f"{step.transit_details.line_short_name}|{step.transit_details.line_name}"
+	instructions: str = TAG_PATTERN.sub(" ", step.html_instructions or "").strip().lower()
+	return f"{step.travel_mode}|{instructions}|{details}"
+
+
+def route_tokens(route: Route) -> set[str]:
+	"""
+	Reduces a route to the tokens that are compared for similarity.
+
+	Args:
+		route: The route.
+
+	Returns:
+		The tokens.
+	"""
+	steps: list[Step] = [step for leg in route.legs for step in leg.steps]
+	maneuvers: list[str] = [_step_token(step) for step in steps]
+	tokens: set[str] = {f"s:{first}>{second}" for first, second in zip(maneuvers, maneuvers[1:])}
+	if len(maneuvers) == 1:
+		tokens.add(f"s:{maneuvers[0]}")
+	tokens.update(f"p:{step.polyline}" for step in steps if step.polyline)
+	return tokens
+
+
+def signature(tokens: set[str]) -> tuple[int, ...]:
+	"""
+	Computes the MinHash signature of a set of tokens.
+
+	Args:
+		tokens: The tokens.
+
+	Returns:
+		The minimum of each hash function over the tokens, or an empty tuple if there are no tokens.
+	"""
+	if not tokens:
+		return ()
+	values: list[int] = [zlib.crc32(token.encode("utf-8")) for token in tokens]
+	return tuple(min((a * value + b) % MERSENNE_PRIME for value in values) for a, b in HASH_COEFFICIENTS)
+
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+	"""
+	Estimates the Jaccard similarity of the token sets of two routes from their signatures.
+
+	Args:
+		first: The signature of the first route.
+		second: The signature of the second route.
+
+	Returns:
+		The similarity, from 0 for routes with nothing in common to 1 for identical routes.
+	"""
+	if not first or not second:
+		return 0.0
+	return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+def distinct_routes(routes: Sequence[Route], threshold: float = DEFAULT_THRESHOLD) -> list[Route]:
+	"""
+	Removes routes that are nearly the same as a preceding route.
+
+	Routes are listed by the server in order of preference, so the first of any near-duplicates is kept.
+
+	Args:
+		routes: The routes.
+		threshold: The similarity at which a route is considered a duplicate, or 0 to keep every route.
+
+	Returns:
+		The distinct routes, in their original order.
+	"""
+	if threshold <= 0 or len(routes) < 2:
+		return list(routes)
+	kept: list[tuple[Route, tuple[int, ...]]] = []
+	for route in routes:
+		current: tuple[int, ...] = signature(route_tokens(route))
+		if not any(similarity(current, other) >= threshold for _, other in kept):
+			kept.append((route, current))
+	return [route for route, _ in kept]
+
+
+def _names(route: Route) -> Iterator[str]:
+	# Transit routes are known by their lines, and other routes by the main roads in their summary.
+	transit: bool = False
+	for leg in route.legs:
+		for step in leg.steps:
+			details: Optional[TransitDetails] = step.transit_details
+			if details is not None and (details.line_short_name or details.line_name):
+				transit = True
+				yield str(details.line_short_name or details.line_name)
+	if not transit:
+		yield from (name.strip() for name in route.summary.split(",") if name.strip())
+
+
+def route_labels(routes: Sequence[Route]) -> list[str]:
+	"""
+	Labels routes with the road or line names that distinguish them from each other.
+
+	Args:
+		routes: The routes.
+
+	Returns:
+		A label for each route, such as "Route 2, via I-90 W". Names shared by every route are left out.
+	"""
+	names: list[list[str]] = [list(dict.fromkeys(_names(route))) for route in routes]
+	shared: set[str] = set.intersection(*(set(item) for item in names)) if len(names) > 1 else set()
+	labels: list[str] = []
+	for counter, route_names in enumerate(names, 1):
+		distinguishing: list[str] = [name for name in route_names if name not in shared]
+		label: str = f"Route {counter}"
+		if distinguishing:
+			label += ", via " + ", ".join(distinguishing[:MAX_LABEL_NAMES])
+		labels.append(label)
+	return labels
@@ -0,0 +1,247 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Speaks messages from a background thread, in short utterances that can be interrupted.
+
+Loading the screen reader libraries and passing text to them happens on the speech thread, so the UI
+event loop never waits on either. Text is split into utterances of a sentence or a line at most, and
+utterances are handed to the screen reader at about the rate they are spoken, so that messages which
+are no longer relevant can be dropped before they are heard.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import logging
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Mapping
+from typing import Any, Optional
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_LENGTH: int = 150  # Characters per utterance.
+DEFAULT_WORDS_PER_MINUTE: int = 300
+SENTENCE_PATTERN: re.Pattern[str] = re.compile(r"(?<=[.!?])\s+")
+PUNCTUATION_PATTERN: re.Pattern[str] = re.compile(r"[,;:]\s+")
+SPACE_PATTERN: re.Pattern[str] = re.compile(r"\s+")
+
+
+def load_speech() -> Any:
+	"""
+	Imports the speech module, which is slow since it loads the screen reader libraries.
+
+	Returns:
+		The speech object from speechlight.
+	"""
+	from speechlight import speech
+
+	return speech
+
+
+def create_speech_queue(settings: Mapping[str, Any]) -> SpeechQueue:
+	"""
+	Creates a speech queue.
+
+	Args:
+		settings: The speech section of the configuration.
+
+	Returns:
+		The queue, which has not been started.
+	"""
+	return SpeechQueue(
+		max_length=settings.get("max_utterance_length", DEFAULT_MAX_LENGTH),
+		words_per_minute=settings.get("words_per_minute", DEFAULT_WORDS_PER_MINUTE),
+	)
+
+
+def _split_long(text: str, max_length: int) -> list[str]:
+	# Splits at the last punctuation that keeps the first part within the limit, or the last space if
+	# there is no punctuation.
+	parts: list[str] = []
+	while len(text) > max_length:
+		end: int = 0
+		for pattern in (PUNCTUATION_PATTERN, SPACE_PATTERN):
+			for match in pattern.finditer(text, 0, max_length + 1):
+				end = match.start() + 1 if pattern is PUNCTUATION_PATTERN else match.start()
+			if end > 0:
+				break
+		else:
+			end = max_length  # A single word longer than the limit.
+		parts.append(text[:end].strip())
+		text = text[end:].strip()
+	if text:
+		parts.append(text)
+	return parts
+
+
+def split_utterances(text: str, max_length: int = DEFAULT_MAX_LENGTH) -> list[str]:
+	"""
+	Splits text into utterances.
+
+	Args:
+		text: The text.
+		max_length: The maximum number of characters in an utterance, or 0 for no limit.
+
+	Returns:
+		The lines and sentences of the text, with any that are longer than max_length split at punctuation
+		or spaces. Blank lines are dropped.
+	"""
+	utterances: list[str] = []
+	for line in text.splitlines():
+		for sentence in SENTENCE_PATTERN.split(line.strip()):
+			if not sentence:
+				continue
+			elif max_length > 0:
+				utterances.extend(_split_long(sentence, max_length))
+			else:
+				utterances.append(sentence)
+	return utterances
+
+
+def speaking_time(utterance: str, words_per_minute: int) -> float:
+	"""
+	Estimates how long an utterance takes to speak.
+
+	Args:
+		utterance: The utterance.
+		words_per_minute: The speech rate, or 0 if unknown.
+
+	Returns:
+		The duration in seconds, or 0 if the speech rate is unknown.
+	"""
+	if words_per_minute <= 0:
+		return 0.0
+	return len(utterance.split()) * 60.0 / words_per_minute
+
+
+class SpeechQueue(object):
+	"""
+	Implements a queue of utterances that are spoken in order by a background thread.
+	"""
+
+	def __init__(
+		self,
+		backend: Optional[Callable[[], Any]] = None,
+		max_length: int = DEFAULT_MAX_LENGTH,
+		words_per_minute: int = DEFAULT_WORDS_PER_MINUTE,
+	) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			backend: A callable returning an object with say(text, interrupt) and silence() methods,
+				which is called once by the speech thread. Defaults to load_speech.
+			max_length: The maximum number of characters in an utterance, or 0 for no limit.
+			words_per_minute: The rate at which utterances are handed to the screen reader,
+				or 0 to hand them over as soon as they are queued.
+		"""
+		self.max_length: int = max_length
+		self.words_per_minute: int = words_per_minute
+		self._backend: Callable[[], Any] = backend if backend is not None else load_speech
+		self._pending: deque[tuple[str, bool]] = deque()
+		self._condition: threading.Condition = threading.Condition()
+		self._speaking_until: float = 0.0
+		self._silence: bool = False
+		self._stopped: bool = False
+		self._thread: Optional[threading.Thread] = None
+
+	def __len__(self) -> int:
+		with self._condition:
+			return len(self._pending)
+
+	def start(self) -> None:
+		"""Starts the speech thread, which begins by loading the screen reader libraries."""
+		with self._condition:
+			if self._thread is None:
+				self._stopped = False
+				self._thread = threading.Thread(target=self._run, name="speech", daemon=True)
+				self._thread.start()
+
+	def stop(self, timeout: Optional[float] = None) -> None:
+		"""
+		Stops the speech thread, dropping any utterances that have not been spoken.
+
+		Args:
+			timeout: The number of seconds to wait for the thread to finish, or None to wait indefinitely.
+		"""
+		with self._condition:
+			self._stopped = True
+			self._pending.clear()
+			self._condition.notify_all()
+			thread: Optional[threading.Thread] = self._thread
+			self._thread = None
+		if thread is not None and thread is not threading.current_thread():
+			thread.join(timeout)
+
+	def say(self, text: str, interrupt: bool = False) -> None:
+		"""
+		Queues text to be spoken.
+
+		Args:
+			text: The text.
+			interrupt: True if queued utterances and current speech should be dropped, False otherwise.
+		"""
+		utterances: list[str] = split_utterances(text, self.max_length)
+		with self._condition:
+			if interrupt:
+				self._pending.clear()
+			# Only the first utterance interrupts, so the rest are spoken after it.
+			self._pending.extend(
+				(utterance, interrupt and not counter) for counter, utterance in enumerate(utterances)
+			)
+			self._condition.notify_all()
+
+	def interrupt(self) -> None:
+		"""Drops queued utterances, and silences the screen reader if an utterance may still be playing."""
+		with self._condition:
+			self._pending.clear()
+			if time.monotonic() < self._speaking_until:
+				self._silence = True
+				self._speaking_until = 0.0
+			self._condition.notify_all()
+
+	def _next(self) -> Optional[tuple[str, bool]]:
+		# Waits until the next utterance is due, returning None if the thread should stop.
+		# An utterance that interrupts is due immediately, others once the previous has been spoken.
+		with self._condition:
+			while not self._stopped:
+				if self._silence:
+					self._silence = False
+					return "", True
+				remaining: float = self._speaking_until - time.monotonic()
+				if self._pending and (self._pending[0][1] or remaining <= 0):
+					utterance, interrupt = self._pending.popleft()
+					self._speaking_until = time.monotonic() + speaking_time(utterance, self.words_per_minute)
+					return utterance, interrupt
+				self._condition.wait(remaining if self._pending else None)
+			return None
+
+	def _run(self) -> None:
+		try:
+			speech: Any = self._backend()
+		except Exception:
+			logger.exception("Unable to load speech.")
+			speech = None
+		while True:
+			item: Optional[tuple[str, bool]] = self._next()
+			if item is None:
+				break
+			elif speech is None:
+				continue  # The utterance is dropped.
+			utterance, interrupt = item
+			try:
+				if utterance:
+					speech.say(utterance, interrupt)
+				else:
+					speech.silence()
+			except Exception:
+				logger.exception("Unable to speak.")
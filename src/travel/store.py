@@ -0,0 +1,214 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+A local store of previously retrieved directions, for answering searches without a network connection.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Optional
+
+# Local Modules:
+from .cache import TIME_PARAMS, cache_key
+from .directions import DirectionsError
+from .models import Model
+from .utils import getDataPath
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+STORE_FILE: str = "routes.sqlite3"
+STORE_VERSION: int = 2
+DEFAULT_MAX_ENTRIES: int = 1000
+DEFAULT_PREFETCH_AGE: float = 3600.0  # Seconds.
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS routes (
+	key TEXT PRIMARY KEY,
+	route TEXT NOT NULL,
+	fetched REAL NOT NULL,
+	response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS routes_lookup ON routes (route, fetched);
+"""
+
+
+class NotStoredError(DirectionsError):
+	"""Raised when working offline, and no saved directions match a search."""
+
+
+def create_store(settings: Mapping[str, Any]) -> Optional[RouteStore]:
+	"""
+	Creates a route store.
+
+	Args:
+		settings: The offline section of the configuration.
+
+	Returns:
+		The store, or None if it is disabled.
+	"""
+	if not settings.get("enabled", True):
+		return None
+	try:
+		return RouteStore(max_entries=settings.get("max_entries", DEFAULT_MAX_ENTRIES))
+	except sqlite3.Error as e:
+		logger.warning(f"Unable to open the route store: {e}")
+		return None
+
+
+def format_age(seconds: float) -> str:
+	"""
+	Describes how long ago something happened.
+
+	Args:
+		seconds: The number of seconds since it happened.
+
+	Returns:
+		The age in the largest whole unit.
+	"""
+	for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+		count: int = int(seconds // size)
+		if count:
+			return f"{count} {unit}{'' if count == 1 else 's'}"
+	return "less than a minute"
+
+
+class StoredResponse(Model):
+	"""A directions response from the store, along with when it was retrieved."""
+
+	__slots__: tuple[str, ...] = ("response", "fetched", "exact")
+
+	def __init__(self, response: Any, fetched: float, exact: bool = True) -> None:
+		self.response: Any = response
+		self.fetched: float = fetched
+		self.exact: bool = exact  # False if the response was for a different departure or arrival time.
+
+	@property
+	def age(self) -> float:
+		"""The number of seconds since the response was retrieved."""
+		return max(0.0, time.time() - self.fetched)
+
+
+class RouteStore(object):
+	"""
+	Implements a persistent store of directions responses in an SQLite database.
+
+	Responses are also indexed by their request without the departure and arrival times, so that a
+	search can be answered with the most recent response for the same route when the server can not be
+	reached, even if the time differs.
+	"""
+
+	def __init__(self, filename: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			filename: The path of the database, or None to use the default location in the data directory.
+			max_entries: The maximum number of responses to keep before removing the oldest.
+		"""
+		self.filename: str = filename if filename is not None else getDataPath(STORE_FILE)
+		self.max_entries: int = max_entries
+		self._lock: threading.Lock = threading.Lock()
+		# The connection is shared by the fetch pool worker threads, and serialized by the lock.
+		self._connection: sqlite3.Connection = sqlite3.connect(self.filename, check_same_thread=False)
+		with self._lock, self._connection:
+			if self._connection.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+				self._connection.execute("DROP TABLE IF EXISTS routes")
+				self._connection.execute(f"PRAGMA user_version = {STORE_VERSION}")
+			self._connection.executescript(SCHEMA)
+
+	def __len__(self) -> int:
+		with self._lock:
+			return int(self._connection.execute("SELECT COUNT(*) FROM routes").fetchone()[0])
+
+	@staticmethod
+	def _route_key(params: Mapping[str, Any]) -> str:
+		# The locations, waypoints, features to avoid, and other options of a request, without its time.
+		return cache_key({key: value for key, value in params.items() if key not in TIME_PARAMS})
+
+	def put(self, params: Mapping[str, Any], response: Any) -> None:
+		"""
+		Stores a response, replacing any response to the same request.
+
+		Args:
+			params: The keyword arguments that were passed to googlemaps.Client.directions.
+			response: The response.
+		"""
+		try:
+			with self._lock, self._connection:
+				self._connection.execute(
+					"INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?)",
+					(cache_key(params), self._route_key(params), time.time(), json.dumps(response)),
+				)
+				self._connection.execute(
+					"DELETE FROM routes WHERE key IN "
+					+ "(SELECT key FROM routes ORDER BY fetched DESC LIMIT -1 OFFSET ?)",
+					(max(0, self.max_entries),),
+				)
+		except sqlite3.Error as e:  # pragma: no cover
+			logger.warning(f"Unable to save directions to the route store: {e}")
+
+	def get(self, params: Mapping[str, Any]) -> Optional[StoredResponse]:
+		"""
+		Retrieves the response to a request.
+
+		The response to the same request is preferred. Otherwise, the most recent response to a request
+		that differs only in its departure or arrival time is returned, which is marked as not exact.
+
+		Args:
+			params: The keyword arguments that would be passed to googlemaps.Client.directions.
+
+		Returns:
+			The response, or None if nothing matching was stored.
+		"""
+		key: str = cache_key(params)
+		with self._lock:
+			row: Optional[tuple[str, float, str]] = self._connection.execute(
+				"SELECT response, fetched, key FROM routes WHERE key = ?", (key,)
+			).fetchone()
+			if row is None:
+				row = self._connection.execute(
+					"SELECT response, fetched, key FROM routes WHERE route = ? ORDER BY fetched DESC LIMIT 1",
+					(self._route_key(params),),
+				).fetchone()
+		if row is None:
+			return None
+		return StoredResponse(json.loads(row[0]), row[1], exact=row[2] == key)
+
+	def is_fresh(self, params: Mapping[str, Any], max_age: float) -> bool:
+		"""
+		Determines whether the response to a request was retrieved recently.
+
+		Args:
+			params: The keyword arguments that would be passed to googlemaps.Client.directions.
+			max_age: The number of seconds a response is considered fresh.
+
+		Returns:
+			True if the response to the same request was stored within max_age seconds, False otherwise.
+		"""
+		with self._lock:
+			row: Optional[tuple[float]] = self._connection.execute(
+				"SELECT fetched FROM routes WHERE key = ?", (cache_key(params),)
+			).fetchone()
+		return row is not None and time.time() - row[0] <= max_age
+
+	def clear(self) -> None:
+		"""Removes all responses from the store."""
+		with self._lock, self._connection:
+			self._connection.execute("DELETE FROM routes")
+
+	def close(self) -> None:
+		"""Closes the database."""
+		with self._lock:
+			self._connection.close()
@@ -0,0 +1,318 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Finds the fastest time to leave, by searching for directions at regular departure times within a window.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import argparse
+import functools
+import logging
+import sys
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+from typing import Any, Optional, Union
+
+# Third-party Modules:
+from googlemaps.exceptions import ApiError, HTTPError, Timeout, TransportError
+
+# Local Modules:
+from .cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL, DirectionsCache, cache_key
+from .config import Config
+from .directions import (
+	MODES,
+	DirectionsError,
+	build_params,
+	create_client,
+	error_message,
+	get_directions,
+	to_timestamp,
+)
+from .fetch import DEFAULT_QUERIES_PER_SECOND, DEFAULT_WORKERS, FetchPool
+from .models import Model
+from .utils import getDataPath
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+DEFAULT_INTERVAL: int = 10  # Minutes.
+MAX_DEPARTURES: int = 288  # Every 5 minutes for a day.
+SWEEP_CACHE_FILE: str = "sweep_cache.json"
+# Durations are measured from each departure time, so responses may only be shared by identical times.
+EXACT_TIME_BUCKET: int = 1  # Seconds.
+
+
+def create_sweep_cache(settings: Mapping[str, Any]) -> Optional[DirectionsCache]:
+	"""
+	Creates a cache for sweep responses, keyed by exact departure time.
+
+	The responses are kept apart from the directions cache, where a departure time stands for every
+	time in its bucket.
+
+	Args:
+		settings: The cache section of the configuration.
+
+	Returns:
+		The cache, or None if caching is disabled.
+	"""
+	if not settings.get("enabled", True):
+		return None
+	return DirectionsCache(
+		getDataPath(SWEEP_CACHE_FILE),
+		ttl=settings.get("ttl", DEFAULT_TTL),
+		max_entries=settings.get("max_entries", DEFAULT_MAX_ENTRIES),
+		time_bucket=EXACT_TIME_BUCKET,
+	)
+
+
+class Departure(Model):
+	"""The result of searching for directions at one departure time."""
+
+	__slots__: tuple[str, ...] = ("time", "duration", "summary", "error")
+
+	def __init__(
+		self, time: int, duration: Optional[int] = None, summary: str = "", error: Optional[str] = None
+	) -> None:
+		self.time: int = time
+		self.duration: Optional[int] = duration
+		self.summary: str = summary
+		self.error: Optional[str] = error
+
+
+def departure_times(start: datetime, end: datetime, interval: timedelta) -> list[datetime]:
+	"""
+	Generates departure times at regular intervals.
+
+	Args:
+		start: The first departure time.
+		end: The last possible departure time.
+		interval: The time between departures.
+
+	Returns:
+		The departure times, including the end if it falls on an interval.
+
+	Raises:
+		ValueError: The interval is not positive, or the window contains too many departures.
+	"""
+	if interval <= timedelta(0):
+		raise ValueError("The interval must be positive.")
+	elif (end - start) / interval >= MAX_DEPARTURES:
+		raise ValueError(f"At most {MAX_DEPARTURES} departure times may be searched.")
+	times: list[datetime] = []
+	current: datetime = start
+	while current <= end:
+		times.append(current)
+		current += interval
+	return times
+
+
+def trip_duration(route: Mapping[str, Any], departure: int) -> Optional[int]:
+	"""
+	Calculates the time from leaving to arriving for a route.
+
+	Transit routes include the wait for the first vehicle, and driving routes use the
+	duration in traffic when it is available.
+
+	Args:
+		route: A route from the directions response.
+		departure: The time of leaving, as a Unix timestamp.
+
+	Returns:
+		The duration in seconds, or None if it is unknown.
+	"""
+	legs: Sequence[Mapping[str, Any]] = route.get("legs", ())
+	if not legs:
+		return None
+	arrival: Optional[Mapping[str, Any]] = legs[-1].get("arrival_time")
+	if arrival is not None and "value" in arrival:
+		return max(0, int(arrival["value"]) - departure)
+	durations: list[Optional[Mapping[str, Any]]] = [
+		leg.get("duration_in_traffic") or leg.get("duration") for leg in legs
+	]
+	if None in durations:
+		return None
+	return sum(int(duration["value"]) for duration in durations if duration is not None)
+
+
+def _departure(timestamp: int, future: Future[Any]) -> Departure:
+	try:
+		response: Any = future.result()
+	except (ApiError, HTTPError, Timeout, TransportError) as e:
+		return Departure(timestamp, error=error_message(e))
+	best: Optional[Departure] = None
+	for route in response:
+		duration: Optional[int] = trip_duration(route, timestamp)
+		if duration is not None and (best is None or best.duration is None or duration < best.duration):
+			best = Departure(timestamp, duration, route.get("summary", ""))
+	return best if best is not None else Departure(timestamp, error="No routes found.")
+
+
+def sweep(
+	params: Mapping[str, Any],
+	times: Sequence[Union[datetime, int, float]],
+	fetch: Callable[[dict[str, Any]], Any],
+	workers: int = DEFAULT_WORKERS,
+	queries_per_second: float = DEFAULT_QUERIES_PER_SECOND,
+) -> list[Departure]:
+	"""
+	Searches for directions at each departure time concurrently.
+
+	Only identical departure times share a single request.
+
+	Args:
+		params: The request parameters, as built by build_params. Any arrival time is ignored.
+		times: The departure times.
+		fetch: A callable that retrieves the directions response for request parameters.
+		workers: The maximum number of concurrent requests.
+		queries_per_second: The maximum sustained request rate, or 0 for no limit.
+
+	Returns:
+		The fastest route for each departure time, in the order they were given.
+	"""
+	base: dict[str, Any] = {key: value for key, value in params.items() if key != "arrival_time"}
+	pool: FetchPool = FetchPool(
+		fetch, workers, queries_per_second, key=functools.partial(cache_key, time_bucket=EXACT_TIME_BUCKET)
+	)
+	try:
+		pending: list[tuple[int, Future[Any]]] = []
+		for value in times:
+			timestamp: int = to_timestamp(value)
+			pending.append((timestamp, pool.submit({**base, "departure_time": timestamp})))
+		return [_departure(timestamp, future) for timestamp, future in pending]
+	finally:
+		pool.shutdown()
+
+
+def fastest(departures: Sequence[Departure]) -> Optional[Departure]:
+	"""
+	Finds the departure with the shortest trip.
+
+	Args:
+		departures: The results of a sweep.
+
+	Returns:
+		The earliest of the fastest departures, or None if no departure has a route.
+	"""
+	found: list[Departure] = [departure for departure in departures if departure.duration is not None]
+	if not found:
+		return None
+	return min(found, key=lambda departure: (departure.duration, departure.time))
+
+
+def format_duration(seconds: int) -> str:
+	"""
+	Formats a duration compactly.
+
+	Args:
+		seconds: The duration in seconds.
+
+	Returns:
+		The duration in hours and minutes.
+	"""
+	hours, minutes = divmod(round(seconds / 60), 60)
+	return f"{hours} hr {minutes} min" if hours else f"{minutes} min"
+
+
+def format_table(departures: Sequence[Departure]) -> list[str]:
+	"""
+	Formats the results of a sweep as a table of durations by departure time.
+
+	Args:
+		departures: The results of a sweep.
+
+	Returns:
+		One line per departure. The fastest is marked.
+	"""
+	best: Optional[Departure] = fastest(departures)
+	lines: list[str] = []
+	for departure in departures:
+		when: str = datetime.fromtimestamp(departure.time).strftime("%I:%M %p").lstrip("0")
+		if departure.duration is None:
+			lines.append(f"{when}: {departure.error}")
+			continue
+		line: str = f"{when}: {format_duration(departure.duration)}"
+		if departure.summary:
+			line += f", via {departure.summary}"
+		if departure is best:
+			line += " (fastest)"
+		lines.append(line)
+	return lines
+
+
+def _clock(value: str) -> datetime:
+	return datetime.strptime(value, "%H:%M")
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+	"""
+	Runs the departure time sweep command.
+
+	Args:
+		args: The command line arguments, or None to use sys.argv.
+
+	Returns:
+		The exit status.
+	"""
+	parser = argparse.ArgumentParser(prog="travel sweep", description="Finds the fastest time to leave.")
+	parser.add_argument("origin", help="The starting location.")
+	parser.add_argument("destination", help="The destination.")
+	parser.add_argument("-m", "--mode", choices=MODES, default="transit", help="The travel mode.")
+	parser.add_argument("-s", "--start", type=_clock, required=True, help="The earliest departure, as HH:MM.")
+	parser.add_argument("-e", "--end", type=_clock, required=True, help="The latest departure, as HH:MM.")
+	parser.add_argument(
+		"-i", "--interval", type=int, default=DEFAULT_INTERVAL, help="Minutes between departures."
+	)
+	parser.add_argument(
+		"-d", "--date", type=date.fromisoformat, help="The date, as YYYY-MM-DD. Defaults to today."
+	)
+	parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent requests.")
+	parser.add_argument(
+		"-q",
+		"--queries-per-second",
+		type=float,
+		default=DEFAULT_QUERIES_PER_SECOND,
+		help="The maximum request rate.",
+	)
+	parser.add_argument("--no-cache", action="store_true", help="Do not use the directions cache.")
+	options = parser.parse_args(args)
+	day: date = options.date or date.today()
+	cfg = Config.shared()
+	maps_client_cfg: dict[str, Any] = cfg.get("maps_client", {})
+	cache_cfg: dict[str, Any] = cfg.get("cache", {})
+	del cfg
+	try:
+		times: list[datetime] = departure_times(
+			datetime.combine(day, options.start.time()),
+			datetime.combine(day, options.end.time()),
+			timedelta(minutes=options.interval),
+		)
+		params: dict[str, Any] = build_params(options.origin, options.destination, options.mode)
+		client = create_client(maps_client_cfg)
+	except (DirectionsError, ValueError) as e:
+		print(e, file=sys.stderr)
+		return 1
+	cache: Union[DirectionsCache, None] = None if options.no_cache else create_sweep_cache(cache_cfg)
+
+	def fetch(params: dict[str, Any]) -> Any:
+		return get_directions(client, params, cache)
+
+	departures: list[Departure] = sweep(params, times, fetch, options.workers, options.queries_per_second)
+	if cache is not None:
+		cache.flush()
+	for line in format_table(departures):
+		print(line)
+	best: Optional[Departure] = fastest(departures)
+	if best is None:
+		print("No routes found.", file=sys.stderr)
+		return 2
+	when: str = datetime.fromtimestamp(best.time).strftime("%I:%M %p").lstrip("0")
+	print(f"Leave at {when} to arrive in {format_duration(best.duration or 0)}.")
+	return 0
@@ -0,0 +1,542 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Follows a stream of position fixes along a route, to announce each instruction as it comes up.
+
+The segments of every step are placed in a uniform grid when tracking starts, so that each fix
+is matched to the nearest step by measuring only the segments in the cells around it.
+Fixes may be read from a file or pipe, as NMEA 0183 sentences or latitude, longitude pairs,
+or simulated by moving along the route at a constant speed.
+"""
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import logging
+import math
+import sys
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from typing import Any, Optional, TextIO
+
+# Third-party Modules:
+import numpy as np
+
+# Local Modules:
+from .directions import instructions_to_text
+from .geometry import EARTH_RADIUS, decode_polylines, haversine
+from .models import Model, Route, Step
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+DEFAULT_CELL_SIZE: float = 100.0  # Meters.
+DEFAULT_OFF_ROUTE_DISTANCE: float = 50.0  # Meters.
+DEFAULT_OFF_ROUTE_FIXES: int = 3  # Consecutive fixes away from the route before re-routing.
+DEFAULT_ARRIVAL_DISTANCE: float = 25.0  # Meters.
+DEFAULT_SIMULATED_SPEED: float = 15.0  # Meters per second.
+DEFAULT_SIMULATED_INTERVAL: float = 1.0  # Seconds.
+SIMULATED_SOURCE: str = "simulate"
+STDIN_SOURCE: str = "-"
+# The penalty in meters for matching a step before the current step, so that a fix where the
+# route passes the same place twice is matched to the part that is ahead.
+BACKTRACK_PENALTY: float = 10.0
+
+
+class Fix(Model):
+	"""A position reported by a GPS receiver."""
+
+	__slots__: tuple[str, ...] = ("latitude", "longitude")
+
+	def __init__(self, latitude: float, longitude: float) -> None:
+		self.latitude: float = latitude
+		self.longitude: float = longitude
+
+
+class Snap(Model):
+	"""The point on a route nearest to a fix."""
+
+	__slots__: tuple[str, ...] = ("step", "distance", "remaining")
+
+	def __init__(self, step: int, distance: float, remaining: float) -> None:
+		self.step: int = step
+		self.distance: float = distance  # From the fix to the route, in meters.
+		self.remaining: float = remaining  # From the nearest point to the end of the step, in meters.
+
+
+class TrackingEvent(Model):
+	"""Something that happened while tracking, which the user should be told about."""
+
+	__slots__: tuple[str, ...] = ("kind", "text", "fix", "leg")
+
+	STEP: str = "step"
+	OFF_ROUTE: str = "off_route"
+	ARRIVED: str = "arrived"
+
+	def __init__(self, kind: str, text: str, fix: Fix, leg: int = 0) -> None:
+		self.kind: str = kind
+		self.text: str = text
+		self.fix: Fix = fix
+		self.leg: int = leg
+
+
+def _checksum_valid(sentence: str) -> bool:
+	body, separator, checksum = sentence.partition("*")
+	if not separator:
+		return True  # The checksum is optional.
+	value: int = 0
+	for character in body[1:]:
+		value ^= ord(character)
+	try:
+		return value == int(checksum[:2], 16)
+	except ValueError:
+		return False
+
+
+def _nmea_coordinate(value: str, hemisphere: str, degree_digits: int) -> float:
+	degrees: float = float(value[:degree_digits]) + float(value[degree_digits:]) / 60
+	return -degrees if hemisphere in ("S", "W") else degrees
+
+
+def parse_nmea(sentence: str) -> Optional[Fix]:
+	"""
+	Parses a position from an NMEA 0183 RMC or GGA sentence.
+
+	Args:
+		sentence: The sentence, such as "$GPRMC,...*6A".
+
+	Returns:
+		The fix, or None if the sentence is not a valid position.
+	"""
+	sentence = sentence.strip()
+	if not sentence.startswith("$") or not _checksum_valid(sentence):
+		return None
+	fields: list[str] = sentence.partition("*")[0].split(",")
+	kind: str = fields[0][3:]
+	try:
+		if kind == "RMC" and len(fields) >= 7 and fields[2] == "A":
+			latitude, longitude = fields[3:5], fields[5:7]
+		elif kind == "GGA" and len(fields) >= 7 and fields[6] not in ("", "0"):
+			latitude, longitude = fields[2:4], fields[4:6]
+		else:
+			return None
+		return Fix(_nmea_coordinate(latitude[0], latitude[1], 2), _nmea_coordinate(longitude[0], longitude[1], 3))
+	except ValueError:
+		return None
+
+
+def parse_fix(line: str) -> Optional[Fix]:
+	"""
+	Parses a position from a line of input.
+
+	Args:
+		line: An NMEA 0183 sentence, or a latitude and longitude in degrees, separated by a comma.
+
+	Returns:
+		The fix, or None if the line is not a valid position.
+	"""
+	line = line.strip()
+	if line.startswith("$"):
+		return parse_nmea(line)
+	fields: list[str] = line.split(",")
+	try:
+		latitude, longitude = float(fields[0]), float(fields[1])
+	except (IndexError, ValueError):
+		return None
+	if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+		return None
+	return Fix(latitude, longitude)
+
+
+def read_fixes(lines: Iterable[str]) -> Iterator[Fix]:
+	"""
+	Reads positions from lines of input, skipping any lines that are not valid positions.
+
+	Args:
+		lines: The lines, such as a file object.
+
+	Yields:
+		The fixes.
+	"""
+	for line in lines:
+		fix: Optional[Fix] = parse_fix(line)
+		if fix is not None:
+			yield fix
+
+
+def simulate_fixes(
+	coordinates: np.ndarray,
+	speed: float = DEFAULT_SIMULATED_SPEED,
+	interval: float = DEFAULT_SIMULATED_INTERVAL,
+	sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[Fix]:
+	"""
+	Simulates a GPS receiver moving along a path at a constant speed.
+
+	Args:
+		coordinates: An array of shape (n, 2) with the path.
+		speed: The speed in meters per second.
+		interval: The number of seconds between fixes.
+		sleep: A callable that waits for a number of seconds.
+
+	Yields:
+		The fixes, ending with the last point of the path.
+	"""
+	coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+	if not len(coordinates):
+		return None
+	travelled: np.ndarray = np.concatenate(([0.0], np.cumsum(haversine(coordinates))))
+	stops: np.ndarray = np.append(np.arange(0.0, travelled[-1], max(speed * interval, 1e-3)), travelled[-1])
+	latitudes: np.ndarray = np.interp(stops, travelled, coordinates[:, 0])
+	longitudes: np.ndarray = np.interp(stops, travelled, coordinates[:, 1])
+	for counter, (latitude, longitude) in enumerate(zip(latitudes.tolist(), longitudes.tolist())):
+		if counter:
+			sleep(interval)
+		yield Fix(latitude, longitude)
+
+
+class StepIndex(object):
+	"""
+	Implements a uniform grid spatial index over the segments of the steps of a route.
+	"""
+
+	def __init__(self, paths: Sequence[np.ndarray], cell_size: float = DEFAULT_CELL_SIZE) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			paths: An array of shape (n, 2) with the path of each step.
+			cell_size: The width of the grid cells in meters.
+		"""
+		self.cell_size: float = cell_size
+		points: list[np.ndarray] = [np.asarray(path, dtype=float).reshape(-1, 2) for path in paths]
+		everything: np.ndarray = np.concatenate(points) if points else np.empty((0, 2))
+		if not len(everything):
+			raise ValueError("The route has no geometry to track.")
+		self._origin: np.ndarray = everything.mean(axis=0)
+		self._scale: float = math.cos(math.radians(float(self._origin[0])))
+		starts: list[np.ndarray] = []
+		ends: list[np.ndarray] = []
+		steps: list[np.ndarray] = []
+		for step, path in enumerate(points):
+			if not len(path):
+				continue
+			projected: np.ndarray = self.project(path)
+			if len(projected) == 1:
+				projected = np.repeat(projected, 2, axis=0)
+			starts.append(projected[:-1])
+			ends.append(projected[1:])
+			steps.append(np.full(len(projected) - 1, step))
+		self._starts: np.ndarray = np.concatenate(starts)
+		self._ends: np.ndarray = np.concatenate(ends)
+		self._steps: np.ndarray = np.concatenate(steps)
+		lengths: np.ndarray = np.hypot(*(self._ends - self._starts).T)
+		# The distance along each step from the end of each segment to the end of the step.
+		self._after: np.ndarray = np.zeros(len(lengths))
+		for step in np.unique(self._steps):
+			members: np.ndarray = np.flatnonzero(self._steps == step)
+			self._after[members] = lengths[members][::-1].cumsum()[::-1] - lengths[members]
+		self._lengths: np.ndarray = lengths
+		self._grid: dict[tuple[int, int], np.ndarray] = self._build_grid()
+
+	def __len__(self) -> int:
+		return len(self._starts)
+
+	def project(self, coordinates: np.ndarray) -> np.ndarray:
+		"""
+		Projects coordinates to meters from the center of the route.
+
+		Args:
+			coordinates: An array of shape (n, 2).
+
+		Returns:
+			An array of shape (n, 2) with the east and north offsets.
+		"""
+		offsets: np.ndarray = np.radians(np.asarray(coordinates, dtype=float).reshape(-1, 2) - self._origin)
+		projected: np.ndarray = np.column_stack((offsets[:, 1] * self._scale, offsets[:, 0])) * EARTH_RADIUS
+		return projected
+
+	def _build_grid(self) -> dict[tuple[int, int], np.ndarray]:
+		low: np.ndarray = np.floor(np.minimum(self._starts, self._ends) / self.cell_size).astype(int)
+		high: np.ndarray = np.floor(np.maximum(self._starts, self._ends) / self.cell_size).astype(int)
+		cells: defaultdict[tuple[int, int], list[int]] = defaultdict(list)
+		for segment, ((x1, y1), (x2, y2)) in enumerate(zip(low.tolist(), high.tolist())):
+			for x in range(x1, x2 + 1):
+				for y in range(y1, y2 + 1):
+					cells[(x, y)].append(segment)
+		return {cell: np.asarray(segments) for cell, segments in cells.items()}
+
+	def nearest(self, fix: Fix, max_distance: float, current: Optional[int] = None) -> Optional[Snap]:
+		"""
+		Finds the point on the route nearest to a fix.
+
+		Args:
+			fix: The fix.
+			max_distance: The farthest from the route in meters that a fix may be matched.
+			current: The step that was matched to the previous fix, if any.
+
+		Returns:
+			The nearest point, or None if no step is within max_distance of the fix.
+		"""
+		point: np.ndarray = self.project(np.array([fix.latitude, fix.longitude]))[0]
+		reach: int = max(1, math.ceil(max_distance / self.cell_size))
+		column, row = (int(value) for value in np.floor(point / self.cell_size))
+		found: list[np.ndarray] = [
+			self._grid[(x, y)]
+			for x in range(column - reach, column + reach + 1)
+			for y in range(row - reach, row + reach + 1)
+			if (x, y) in self._grid
+		]
+		if not found:
+			return None
+		candidates: np.ndarray = np.unique(np.concatenate(found))
+		starts: np.ndarray = self._starts[candidates]
+		segments: np.ndarray = self._ends[candidates] - starts
+		lengths: np.ndarray = self._lengths[candidates]
+		offsets: np.ndarray = point - starts
+		along: np.ndarray = np.clip(
+			np.einsum("ij,ij->i", offsets, segments) / np.maximum(lengths**2, 1e-12), 0.0, 1.0
+		)
+		distances: np.ndarray = np.hypot(*(offsets - along[:, np.newaxis] * segments).T)
+		scores: np.ndarray = distances
+		if current is not None:
+			scores = distances + np.where(self._steps[candidates] < current, BACKTRACK_PENALTY, 0.0)
+		best: int = int(scores.argmin())
+		if distances[best] > max_distance:
+			return None
+		segment: int = int(candidates[best])
+		remaining: float = float(self._after[segment] + (1.0 - along[best]) * lengths[best])
+		return Snap(int(self._steps[segment]), float(distances[best]), remaining)
+
+
+def _instruction(step: Step) -> str:
+	lines: list[str] = [" ".join(text.split()) for text in instructions_to_text(step.html_instructions or "")]
+	text: str = ". ".join(line.rstrip(".") for line in lines if line)
+	return f"{text}." if text else ""
+
+
+def create_tracker(route: Route, settings: Mapping[str, Any]) -> Tracker:
+	"""
+	Creates a tracker.
+
+	Args:
+		route: The route to follow.
+		settings: The tracking section of the configuration.
+
+	Returns:
+		The tracker.
+
+	Raises:
+		ValueError: The route has no polylines.
+	"""
+	return Tracker(
+		route,
+		off_route_distance=settings.get("off_route_distance", DEFAULT_OFF_ROUTE_DISTANCE),
+		off_route_fixes=settings.get("off_route_fixes", DEFAULT_OFF_ROUTE_FIXES),
+		arrival_distance=settings.get("arrival_distance", DEFAULT_ARRIVAL_DISTANCE),
+	)
+
+
+class Tracker(object):
+	"""
+	Implements following a route, one fix at a time.
+	"""
+
+	def __init__(
+		self,
+		route: Route,
+		off_route_distance: float = DEFAULT_OFF_ROUTE_DISTANCE,
+		off_route_fixes: int = DEFAULT_OFF_ROUTE_FIXES,
+		arrival_distance: float = DEFAULT_ARRIVAL_DISTANCE,
+	) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			route: The route to follow.
+			off_route_distance: The distance in meters from the route at which a fix is off the route.
+			off_route_fixes: The number of consecutive fixes off the route before the user is considered lost.
+			arrival_distance: The distance in meters from the end of the route at which the user has arrived.
+
+		Raises:
+			ValueError: The route has no polylines.
+		"""
+		self.steps: list[Step] = [step for leg in route.legs for step in leg.steps]
+		self.legs: list[int] = [counter for counter, leg in enumerate(route.legs) for _ in leg.steps]
+		self.index: StepIndex = StepIndex(decode_polylines([step.polyline or "" for step in self.steps]))
+		self.off_route_distance: float = off_route_distance
+		self.off_route_fixes: int = max(1, off_route_fixes)
+		self.arrival_distance: float = arrival_distance
+		self.step: Optional[int] = None
+		self.arrived: bool = False
+		self._misses: int = 0
+
+	def update(self, fix: Fix) -> Optional[TrackingEvent]:
+		"""
+		Matches a fix to the route.
+
+		Args:
+			fix: The fix.
+
+		Returns:
+			An event if the user reached a new step, left the route, or arrived, otherwise None.
+		"""
+		if self.arrived:
+			return None
+		snap: Optional[Snap] = self.index.nearest(fix, self.off_route_distance, self.step)
+		if snap is None:
+			self._misses += 1
+			if self._misses != self.off_route_fixes:
+				return None  # Either a stray fix, or the user has already been told.
+			return TrackingEvent(TrackingEvent.OFF_ROUTE, "Off route.", fix, self._leg())
+		self._misses = 0
+		if snap.step == len(self.steps) - 1 and snap.remaining <= self.arrival_distance:
+			self.arrived = True
+			return TrackingEvent(TrackingEvent.ARRIVED, "You have arrived.", fix, self._leg())
+		elif snap.step == self.step:
+			return None
+		previous: Optional[int] = self.step
+		self.step = snap.step
+		parts: list[str] = []
+		if previous is None:
+			# Tracking just started, so the step the user is on has not been announced.
+			parts.append(_instruction(self.steps[self.step]))
+		if self.step < len(self.steps) - 1:
+			parts.append(f"Next, {_instruction(self.steps[self.step + 1])}")
+		else:
+			parts.append("Continue to the destination.")
+		return TrackingEvent(TrackingEvent.STEP, " ".join(part for part in parts if part), fix, self._leg())
+
+	def _leg(self) -> int:
+		return self.legs[self.step] if self.step is not None else 0
+
+
+def reroute_params(params: Mapping[str, Any], fix: Fix, leg: int = 0) -> dict[str, Any]:
+	"""
+	Builds the request parameters for a new route from the current position.
+
+	Args:
+		params: The request parameters of the route that was being followed.
+		fix: The current position.
+		leg: The leg of the route the user was on, so that waypoints already visited are skipped.
+
+	Returns:
+		The new request parameters, departing now.
+	"""
+	result: dict[str, Any] = dict(params)
+	result["origin"] = f"{fix.latitude:.6f},{fix.longitude:.6f}"
+	if result.get("waypoints") and not result.get("optimize_waypoints"):
+		result["waypoints"] = list(result["waypoints"])[leg:]
+	if not result.get("waypoints"):
+		result.pop("waypoints", None)
+		result.pop("optimize_waypoints", None)
+	if result.get("mode") == "transit":
+		result.pop("arrival_time", None)
+		result["departure_time"] = None
+	return result
+
+
+def open_source(
+	source: str, coordinates: np.ndarray, settings: Mapping[str, Any]
+) -> tuple[Iterator[Fix], Optional[TextIO]]:
+	"""
+	Opens a source of fixes.
+
+	Args:
+		source: SIMULATED_SOURCE, STDIN_SOURCE, or the path of a file or named pipe.
+		coordinates: An array of shape (n, 2) with the path of the route, used by the simulated source.
+		settings: The tracking section of the configuration.
+
+	Returns:
+		The fixes, and the file they are read from if it should be closed when tracking stops.
+
+	Raises:
+		OSError: The file could not be opened.
+	"""
+	if source == SIMULATED_SOURCE:
+		speed: float = settings.get("speed", DEFAULT_SIMULATED_SPEED)
+		interval: float = settings.get("interval", DEFAULT_SIMULATED_INTERVAL)
+		return simulate_fixes(coordinates, speed, interval), None
+	elif source == STDIN_SOURCE:
+		return read_fixes(sys.stdin), None
+	# Reading from a named pipe blocks until a GPS daemon writes to it, which is why fixes are read
+	# in a background thread.
+	fileObj: TextIO = open(source, "r", encoding="ascii", errors="replace")
+	return read_fixes(fileObj), fileObj
+
+
+class TrackingSession(object):
+	"""
+	Implements reading fixes and matching them to a route in a background thread.
+	"""
+
+	def __init__(
+		self,
+		tracker: Tracker,
+		fixes: Iterator[Fix],
+		on_event: Callable[[TrackingEvent], None],
+		fileObj: Optional[TextIO] = None,
+	) -> None:
+		"""
+		Defines the constructor for the object.
+
+		Args:
+			tracker: The tracker for the route being followed.
+			fixes: The source of fixes.
+			on_event: A callable that is called from the background thread with each event.
+			fileObj: The file the fixes are read from, which is closed when the session stops.
+		"""
+		self._tracker: Tracker = tracker
+		self._fixes: Iterator[Fix] = fixes
+		self._on_event: Callable[[TrackingEvent], None] = on_event
+		self._file: Optional[TextIO] = fileObj
+		self._lock: threading.Lock = threading.Lock()
+		self._stopped: threading.Event = threading.Event()
+		self._thread: threading.Thread = threading.Thread(target=self._run, name="tracking", daemon=True)
+
+	@property
+	def tracker(self) -> Tracker:
+		"""The tracker for the route being followed."""
+		with self._lock:
+			return self._tracker
+
+	@tracker.setter
+	def tracker(self, value: Tracker) -> None:
+		with self._lock:
+			self._tracker = value
+
+	@property
+	def running(self) -> bool:
+		"""True if fixes are being read, False otherwise."""
+		return self._thread.is_alive() and not self._stopped.is_set()
+
+	def start(self) -> None:
+		"""Starts reading fixes."""
+		self._thread.start()
+
+	def stop(self) -> None:
+		"""Stops reading fixes, once the fix that is being waited for arrives."""
+		self._stopped.set()
+
+	def _run(self) -> None:
+		try:
+			for fix in self._fixes:
+				if self._stopped.is_set():
+					break
+				event: Optional[TrackingEvent] = self.tracker.update(fix)
+				if event is not None:
+					self._on_event(event)
+		except OSError as e:
+			logger.warning("Unable to read position fixes: %s", e)
+		finally:
+			self._stopped.set()
+			if self._file is not None:
+				self._file.close()
+		logger.debug("Tracking stopped.")
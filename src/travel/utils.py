@@ -10,7 +10,9 @@ from __future__ import annotations
 import _imp
 import os
 import sys
+import tempfile
 from collections.abc import Sequence
+from contextlib import suppress
 from typing import Any, Union
 
 
@@ -102,3 +104,29 @@ def getDataPath(*args: str) -> str:
 		The path.
 	"""
 	return os.path.realpath(os.path.join(getDirectoryPath(DATA_DIRECTORY), *args))
+
+
+def writeFileAtomic(filename: str, data: str) -> None:
+	"""
+	Writes text to a file, so an interrupted write never leaves a partially written file behind.
+
+	The text is written to a temporary file in the same directory, which then replaces the file.
+
+	Args:
+		filename: The path of the file.
+		data: The text.
+
+	Raises:
+		OSError: The file could not be written.
+	"""
+	fileDescriptor, tempName = tempfile.mkstemp(
+		prefix=f".{os.path.basename(filename)}.", suffix=".tmp", dir=os.path.dirname(os.path.abspath(filename))
+	)
+	try:
+		with open(fileDescriptor, "w", encoding="utf-8") as fileObj:
+			fileObj.write(data)
+		os.replace(tempName, filename)
+	except BaseException:
+		with suppress(OSError):
+			os.remove(tempName)
+		raise
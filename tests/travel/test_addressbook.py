@@ -0,0 +1,142 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import os.path
+import tempfile
+import time
+from collections.abc import Mapping, Sequence
+from typing import Any
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+# Third-party Modules:
+from googlemaps.exceptions import Timeout
+
+# Travel Directions Modules:
+from travel.addressbook import AddressBook
+
+
+GEOCODE_RESULTS: dict[str, list[dict[str, Any]]] = {
+	"home": [
+		{
+			"place_id": "home_id",
+			"formatted_address": "100 Main St, Springfield, USA",
+			"geometry": {"location": {"lat": 40.0, "lng": -75.0}},
+		}
+	],
+	"work": [{"place_id": "work_id", "formatted_address": "1 Plant Rd, Springfield, USA"}],
+	"health clinic": [{"place_id": "clinic_id", "formatted_address": "5 Health Way, Shelbyville, USA"}],
+	"nowhere": [],
+}
+
+
+class TestAddressBook(TestCase):
+	def setUp(self) -> None:
+		self.tempDir = tempfile.TemporaryDirectory()
+		self.fileName: str = os.path.join(self.tempDir.name, "address_book.json")
+		self.geocode: Mock = Mock(side_effect=self.fake_geocode)
+
+	def tearDown(self) -> None:
+		self.tempDir.cleanup()
+
+	@staticmethod
+	def fake_geocode(address: str) -> Sequence[Mapping[str, Any]]:
+		if address == "timeout":
+			raise Timeout()
+		return GEOCODE_RESULTS[address.strip().lower()]
+
+	def test_resolve(self) -> None:
+		book: AddressBook = AddressBook(self.fileName, save_delay=None)
+		self.assertEqual(book.resolve("Home", self.geocode), "place_id:home_id")
+		self.assertEqual(book.resolve(" home ", self.geocode), "place_id:home_id")
+		self.geocode.assert_called_once_with("Home")
+		# Unknown addresses, failures, and unambiguous locations are sent as typed.
+		self.assertEqual(book.resolve("Nowhere", self.geocode), "Nowhere")
+		self.assertEqual(book.resolve("timeout", self.geocode), "timeout")
+		self.assertEqual(book.resolve("40.1,-75.2", self.geocode), "40.1,-75.2")
+		self.assertEqual(book.resolve("place_id:abc", self.geocode), "place_id:abc")
+		self.assertEqual(self.geocode.call_count, 3)
+		self.assertEqual(book.get("HOME").lat, 40.0)  # type: ignore[union-attr]
+		# Places persist across instances once the address book is saved.
+		self.assertTrue(book.flush())
+		self.assertIn("home", AddressBook(self.fileName))
+		params: dict[str, Any] = book.resolve_params(
+			{"origin": "Home", "destination": "Work", "waypoints": ["Nowhere", "Home"], "mode": "driving"},
+			self.geocode,
+		)
+		self.assertEqual(
+			params,
+			{
+				"origin": "place_id:home_id",
+				"destination": "place_id:work_id",
+				"waypoints": ["Nowhere", "place_id:home_id"],
+				"mode": "driving",
+			},
+		)
+
+	@patch("travel.addressbook.time")
+	def test_max_age(self, mockTime: Mock) -> None:
+		mockTime.time.return_value = 1000.0
+		book: AddressBook = AddressBook(self.fileName, max_age=60, save_delay=None)
+		book.resolve("Home", self.geocode)
+		book.record_use(["Home"])
+		mockTime.time.return_value = 1100.0
+		book.resolve("Home", self.geocode)
+		self.assertEqual(self.geocode.call_count, 2)
+		# Usage counts survive geocoding the address again.
+		self.assertEqual(book.get("home").count, 1)  # type: ignore[union-attr]
+
+	def test_suggest(self) -> None:
+		book: AddressBook = AddressBook(self.fileName, max_entries=2, save_delay=None)
+		for address in ("Home", "Health Clinic"):
+			book.resolve(address, self.geocode)
+		book.record_use(["Health Clinic", "Health Clinic", "Home", "Not Geocoded"])
+		self.assertEqual(book.suggest("h"), ["Health Clinic", "Home"])
+		self.assertEqual(book.suggest("h", limit=1), ["Health Clinic"])
+		# Formatted addresses are also matched.
+		self.assertEqual(book.suggest("100 main"), ["Home"])
+		self.assertEqual(book.suggest("x"), [])
+		self.assertEqual(book.suggest(" "), [])
+		# The least used place is removed when the address book is full.
+		book.resolve("Work", self.geocode)
+		self.assertEqual(len(book), 2)
+		self.assertNotIn("Home", book)
+		book.flush()
+		self.assertEqual(AddressBook(self.fileName).suggest("w"), ["Work"])
+		book.clear()
+		book.flush()
+		self.assertEqual(len(AddressBook(self.fileName)), 0)
+
+	def test_save(self) -> None:
+		book: AddressBook = AddressBook(self.fileName, save_delay=None)
+		book.resolve("Home", self.geocode)
+		book.record_use(["Home"])
+		book.record_use(["Home"])
+		# Changes are only written when the address book is saved.
+		self.assertFalse(os.path.exists(self.fileName))
+		self.assertTrue(book.flush())
+		self.assertFalse(book.flush())
+		self.assertEqual(AddressBook(self.fileName).get("home").count, 2)  # type: ignore[union-attr]
+		# Only the address book file is left in the directory.
+		self.assertEqual(os.listdir(self.tempDir.name), ["address_book.json"])
+		book = AddressBook(self.fileName, save_delay=0.2)
+		book.record_use(["Home"])
+		# The change is saved once the delay passes.
+		count: int = 0
+		for _ in range(500):
+			count = AddressBook(self.fileName).get("home").count  # type: ignore[union-attr]
+			if count == 3:
+				break
+			time.sleep(0.01)
+		self.assertEqual(count, 3)
+
+	def test_load_corrupted(self) -> None:
+		with open(self.fileName, "w", encoding="utf-8") as fileObj:
+			fileObj.write('{"version": 1, "places": [{"text": "no place id"}]}')
+		self.assertEqual(len(AddressBook(self.fileName)), 0)
@@ -0,0 +1,124 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import io
+import json
+from typing import Any
+from unittest import TestCase
+
+# Third-party Modules:
+from googlemaps.exceptions import Timeout
+
+# Travel Directions Modules:
+from travel.batch import ERROR_KEY, read_trips, run_batch, trip_params
+from travel.directions import DirectionsError
+
+
+ROUTE: dict[str, Any] = {
+	"legs": [{"start_address": "Home", "end_address": "Work", "distance": {"text": "1 mi"}, "steps": []}]
+}
+
+
+class TestBatch(TestCase):
+	def test_read_trips(self) -> None:
+		csvFile: io.StringIO = io.StringIO(
+			"id,origin,destination,mode,waypoints,avoid\n1,Home,Work,driving,Store|Bank,\n"
+		)
+		self.assertEqual(
+			list(read_trips(csvFile, "csv")),
+			[
+				{
+					"id": "1",
+					"origin": "Home",
+					"destination": "Work",
+					"mode": "driving",
+					"waypoints": "Store|Bank",
+				}
+			],
+		)
+		jsonFile: io.StringIO = io.StringIO('{"origin": "Home", "destination": "Work"}\n\n')
+		self.assertEqual(list(read_trips(jsonFile, "jsonl")), [{"origin": "Home", "destination": "Work"}])
+		with self.assertRaises(ValueError):
+			list(read_trips(jsonFile, "xml"))
+		# Malformed lines are returned as errors, and the lines after them are still read.
+		jsonFile = io.StringIO('{"origin": "Home", "destination": "Work"}\n{"origin": \n[1]\n{"id": 4}\n')
+		trips: list[dict[str, Any]] = list(read_trips(jsonFile, "jsonl"))
+		self.assertEqual(len(trips), 4)
+		self.assertTrue(trips[1][ERROR_KEY].startswith("Line 2: "))
+		self.assertTrue(trips[2][ERROR_KEY].startswith("Line 3: "))
+		self.assertEqual(trips[3], {"id": 4})
+		with self.assertRaisesRegex(DirectionsError, "^Line 2: "):
+			trip_params(trips[1])
+
+	def test_trip_params(self) -> None:
+		params: dict[str, Any] = trip_params(
+			{
+				"origin": "Home",
+				"destination": "Work",
+				"waypoints": "Store| Bank",
+				"optimize_waypoints": "Yes",
+				"avoid": "tolls|ferries",
+			}
+		)
+		self.assertEqual(params["waypoints"], ["Store", "Bank"])
+		self.assertIs(params["optimize_waypoints"], True)
+		self.assertEqual(params["avoid"], ["tolls", "ferries"])
+		params = trip_params(
+			{"origin": "Home", "destination": "Work", "mode": "transit", "arrival_time": "1000"}
+		)
+		self.assertEqual(params["arrival_time"], 1000)
+		# Fields of the wrong type make the trip invalid.
+		with self.assertRaisesRegex(DirectionsError, "not 5"):
+			trip_params({"origin": "Home", "destination": "Work", "waypoints": 5})
+		with self.assertRaises(DirectionsError):
+			trip_params({"origin": "Home", "destination": "Work", "departure_time": [1000]})
+
+	def test_run_batch(self) -> None:
+		def fetch(params: dict[str, Any]) -> Any:
+			if params["destination"] == "Nowhere":
+				raise Timeout()
+			elif params["destination"] == "Broken":
+				raise RuntimeError("Broken")
+			return [ROUTE]
+
+		trips: list[dict[str, Any]] = [
+			{"origin": "Home", "destination": "Work"},
+			{"origin": "Home", "destination": "Nowhere"},
+			{"id": "bad", "origin": "Home", "destination": "Work", "mode": "transit", "departure_time": "x"},
+			*[{"origin": "Home", "destination": "Work"}] * 10,
+		]
+		output: io.StringIO = io.StringIO()
+		self.assertEqual(run_batch(trips, fetch, output, workers=2), (11, 2))
+		records: list[dict[str, Any]] = [json.loads(line) for line in output.getvalue().splitlines()]
+		self.assertEqual([record["id"] for record in records], [1, 2, "bad", *range(4, 14)])
+		self.assertEqual(records[0]["routes"], ["From: Home\nTo: Work\nTotal Distance: 1 mi"])
+		self.assertEqual(records[1]["error"], "The server failed to respond.")
+		self.assertIsNotNone(records[2]["error"])
+		output = io.StringIO()
+		trips = list(read_trips(io.StringIO('{"origin": "Home", "destination": "Work"}\nnot json\n'), "jsonl"))
+		self.assertEqual(run_batch(trips, fetch, output), (1, 1))
+		records = [json.loads(line) for line in output.getvalue().splitlines()]
+		self.assertEqual([record["id"] for record in records], [1, 2])
+		self.assertTrue(records[1]["error"].startswith("Line 2: Invalid trip request: "))
+		# Unexpected errors fail their trip, and the rest of the batch is still planned.
+		output = io.StringIO()
+		trips = [
+			{"id": "c", "origin": "A", "destination": "B", "waypoints": 5},
+			{"origin": "Home", "destination": "Broken"},
+			{"origin": "Home", "destination": "Work"},
+		]
+		with self.assertLogs("travel.batch", "ERROR"):
+			self.assertEqual(run_batch(trips, fetch, output), (1, 2))
+		records = [json.loads(line) for line in output.getvalue().splitlines()]
+		self.assertEqual([record["id"] for record in records], ["c", 2, 3])
+		self.assertEqual(records[1]["error"], "Unexpected error: Broken")
+		output = io.StringIO()
+		trips = [{"origin": "Home", "destination": "Work"}, {"origin": "Home", "destination": "Nowhere"}]
+		self.assertEqual(run_batch(trips, fetch, output, fmt="csv"), (1, 1))
+		self.assertEqual(output.getvalue().splitlines()[1], "2,,,,,,,,,,,The server failed to respond.")
@@ -0,0 +1,43 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+from typing import Any
+from unittest import TestCase
+
+# Travel Directions Modules:
+from travel.bench import compare, run
+from travel.directions import process_results
+from travel.samples import SAMPLES
+
+
+class TestBench(TestCase):
+	def test_samples(self) -> None:
+		for name, sample in SAMPLES.items():
+			with self.subTest(name=name):
+				self.assertTrue(all(process_results(sample())))
+		self.assertGreaterEqual(len(SAMPLES["alternatives"]()), 5)
+
+	def test_run(self) -> None:
+		current: dict[str, Any] = run(["build_params", "cache."], repeat=1, number=1)
+		self.assertEqual(
+			sorted(current["results"]),
+			["build_params.driving", "build_params.transit", "cache.hit", "cache.key", "cache.miss"],
+		)
+		self.assertEqual(current["results"]["cache.key"]["number"], 1)
+		current = run(["nothing"], repeat=1, startup=["travel.samples", "travel.nonexistent"])
+		self.assertEqual(list(current["results"]), ["import.travel.samples"])
+		self.assertGreater(current["results"]["import.travel.samples"]["min"], 0)
+
+	def test_compare(self) -> None:
+		baseline: dict[str, Any] = {"results": {"a": {"min": 1.0}, "b": {"min": 1.0}, "c": {"min": 0.0}}}
+		current: dict[str, Any] = {
+			"results": {"a": {"min": 1.05}, "b": {"min": 1.5}, "c": {"min": 1.0}, "d": {"min": 1.0}}
+		}
+		self.assertEqual(compare(baseline, current), ["b: 1.50x slower (1000000.0 to 1500000.0 us)"])
+		self.assertEqual(compare(baseline, current, threshold=0.01)[0][:2], "a:")
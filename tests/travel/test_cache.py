@@ -0,0 +1,145 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import os.path
+import tempfile
+import time
+from typing import Any
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+# Travel Directions Modules:
+from travel.cache import DirectionsCache, bucket_time, cache_key, normalize_params
+
+
+class TestNormalization(TestCase):
+	def test_bucket_time(self) -> None:
+		self.assertEqual(bucket_time(1000, 300), 900)
+		self.assertEqual(bucket_time(900, 300), 900)
+		self.assertEqual(bucket_time(1199.5, 300), 900)
+		with patch("travel.cache.time") as mockTime:
+			mockTime.time.return_value = 1250.0
+			self.assertEqual(bucket_time(None, 300), 1200)
+			self.assertEqual(bucket_time("now", 300), 1200)
+
+	def test_normalize_params(self) -> None:
+		params: dict[str, Any] = {
+			"origin": "  123 Main   Street ",
+			"destination": "City HALL",
+			"mode": "Driving",
+			"waypoints": [" First Stop", ""],
+			"optimize_waypoints": True,
+			"avoid": ["tolls", "highways", "tolls"],
+		}
+		self.assertEqual(
+			normalize_params(params),
+			{
+				"origin": "123 main street",
+				"destination": "city hall",
+				"mode": "driving",
+				"waypoints": ["first stop"],
+				"optimize_waypoints": True,
+				"avoid": ["highways", "tolls"],
+			},
+		)
+		# Empty waypoints and avoid lists do not change the response.
+		params = {
+			"origin": "a",
+			"destination": "b",
+			"waypoints": [""],
+			"optimize_waypoints": False,
+			"avoid": [],
+		}
+		self.assertEqual(normalize_params(params), {"origin": "a", "destination": "b"})
+
+	def test_cache_key(self) -> None:
+		first: dict[str, Any] = {"origin": "Home", "destination": "Work", "departure_time": 1000}
+		second: dict[str, Any] = {"destination": "work ", "origin": " home", "departure_time": 1100}
+		self.assertEqual(cache_key(first, 300), cache_key(second, 300))
+		self.assertNotEqual(cache_key(first, 60), cache_key(second, 60))
+
+
+class TestDirectionsCache(TestCase):
+	def setUp(self) -> None:
+		self.tempDir = tempfile.TemporaryDirectory()
+		self.fileName: str = os.path.join(self.tempDir.name, "cache.json")
+
+	def tearDown(self) -> None:
+		self.tempDir.cleanup()
+
+	@patch("travel.cache.time")
+	def test_get_put(self, mockTime: Mock) -> None:
+		mockTime.time.return_value = 1000.0
+		cache: DirectionsCache = DirectionsCache(self.fileName, ttl=60, max_entries=2, save_delay=None)
+		params: dict[str, Any] = {"origin": "Home", "destination": "Work", "mode": "driving"}
+		self.assertIsNone(cache.get(params))
+		cache.put(params, [{"legs": []}])
+		self.assertEqual(cache.get({**params, "origin": "HOME "}), [{"legs": []}])
+		# Responses persist across instances once the cache is saved.
+		self.assertTrue(cache.flush())
+		self.assertFalse(cache.flush())
+		self.assertEqual(DirectionsCache(self.fileName, ttl=60).get(params), [{"legs": []}])
+		# Expired responses are not served.
+		mockTime.time.return_value = 1061.0
+		self.assertIsNone(cache.get(params))
+		self.assertEqual(len(cache), 0)
+
+	@patch("travel.cache.time")
+	def test_eviction(self, mockTime: Mock) -> None:
+		mockTime.time.return_value = 1000.0
+		cache: DirectionsCache = DirectionsCache(self.fileName, ttl=60, max_entries=2, save_delay=None)
+		first: dict[str, Any] = {"origin": "a", "destination": "b"}
+		second: dict[str, Any] = {"origin": "a", "destination": "c"}
+		third: dict[str, Any] = {"origin": "a", "destination": "d"}
+		cache.put(first, [1])
+		cache.put(second, [2])
+		# Accessing the first entry makes the second the least recently used.
+		self.assertEqual(cache.get(first), [1])
+		cache.put(third, [3])
+		self.assertEqual(len(cache), 2)
+		self.assertIn(first, cache)
+		self.assertNotIn(second, cache)
+		self.assertIn(third, cache)
+		cache.clear()
+		cache.flush()
+		self.assertEqual(len(DirectionsCache(self.fileName)), 0)
+
+	@patch("travel.cache.time")
+	def test_put_many(self, mockTime: Mock) -> None:
+		mockTime.time.return_value = 1000.0
+		cache: DirectionsCache = DirectionsCache(self.fileName, ttl=60, max_entries=2, save_delay=None)
+		cache.put_many(({"origin": "a", "destination": str(index)}, [index]) for index in range(3))
+		self.assertEqual(len(cache), 2)
+		cache.flush()
+		self.assertEqual(DirectionsCache(self.fileName, ttl=60).get({"origin": "a", "destination": "2"}), [2])
+
+	def test_save_delay(self) -> None:
+		cache: DirectionsCache = DirectionsCache(self.fileName, save_delay=0.2)
+		cache.put({"origin": "a", "destination": "b"}, [1])
+		cache.put({"origin": "a", "destination": "c"}, [2])
+		# The changes are saved together, once the delay passes.
+		self.assertFalse(os.path.exists(self.fileName))
+		for _ in range(500):
+			if os.path.exists(self.fileName):
+				break
+			time.sleep(0.01)
+		self.assertEqual(len(DirectionsCache(self.fileName)), 2)
+		self.assertFalse(cache.flush())
+		# Only the cache file is left in the directory.
+		self.assertEqual(os.listdir(self.tempDir.name), ["cache.json"])
+		cache = DirectionsCache(self.fileName, save_delay=None)
+		cache.put({"origin": "a", "destination": "d"}, [3])
+		self.assertEqual(len(DirectionsCache(self.fileName)), 2)
+		cache.flush()
+		self.assertEqual(len(DirectionsCache(self.fileName)), 3)
+
+	def test_load_corrupted(self) -> None:
+		with open(self.fileName, "w", encoding="utf-8") as fileObj:
+			fileObj.write("invalid")
+		self.assertEqual(len(DirectionsCache(self.fileName)), 0)
@@ -0,0 +1,57 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import threading
+from unittest import TestCase
+
+# Third-party Modules:
+from googlemaps.exceptions import HTTPError, TransportError, _OverQueryLimit
+
+# Travel Directions Modules:
+from travel.client import SingleAttemptClient
+from travel.directions import create_client
+from travel.mockserver import MockDirectionsServer
+from travel.samples import SAMPLES
+
+
+class TestSingleAttemptClient(TestCase):
+	def setUp(self) -> None:
+		self.server: MockDirectionsServer = MockDirectionsServer(("127.0.0.1", 0), seed=0)
+		self.thread: threading.Thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+		self.thread.start()
+		self.client: SingleAttemptClient = create_client(
+			{"key": "AIzaMockKey", "timeout": 5, "base_url": self.server.base_url}, retry=False
+		)
+
+	def tearDown(self) -> None:
+		self.server.shutdown()
+		self.server.server_close()
+		self.thread.join()
+
+	def test_success(self) -> None:
+		self.assertIsInstance(self.client, SingleAttemptClient)
+		self.assertEqual(self.client.directions("Home", "Work", mode="transit"), SAMPLES["transit"]())
+		self.assertEqual(self.server.counts["ok"], 1)
+
+	def test_failures_are_not_retried(self) -> None:
+		self.server.error_rate = 1.0
+		with self.assertRaises(HTTPError) as context:
+			self.client.directions("Home", "Work")
+		self.assertEqual(context.exception.status_code, 500)
+		self.assertEqual(self.server.counts["error"], 1)
+		self.server.error_rate = 0.0
+		self.server.quota_rate = 1.0
+		with self.assertRaises(_OverQueryLimit):
+			self.client.directions("Home", "Work")
+		self.assertEqual(self.server.counts["quota"], 1)
+		self.server.quota_rate = 0.0
+		self.server.drop_rate = 1.0
+		with self.assertRaises(TransportError):
+			self.client.directions("Home", "Work")
+		self.assertEqual(self.server.counts["drop"], 1)
@@ -7,12 +7,14 @@
 from __future__ import annotations
 
 # Built-in Modules:
+import json
 import os.path
+import tempfile
 from unittest import TestCase
 from unittest.mock import Mock, mock_open, patch
 
 # Travel Directions Modules:
-from travel.config import DATA_DIRECTORY, Config, ConfigError
+from travel.config import Config, ConfigError
 
 
 class TestConfig(TestCase):
@@ -39,13 +41,44 @@ class TestConfig(TestCase):
 		self.assertEqual(cfg, {})
 
 	def test_save(self) -> None:
-		cfg: Config = Config("testconfig")
-		cfg["test"] = "somevalue"
-		mockOpen: Mock = mock_open()
-		lines: list[str] = []
-		mockOpen.return_value.write.side_effect = lambda line: lines.append(line)
-		with patch("travel.config.open", mockOpen):
-			cfg.save()
-		fileName: str = os.path.join(DATA_DIRECTORY, f"{cfg.name}.json")
-		mockOpen.assert_called_once_with(fileName, "w", encoding="utf-8", newline="\r\n")
-		self.assertEqual("".join(lines), '{\n  "test": "somevalue"\n}')
+		with tempfile.TemporaryDirectory() as tempDir, patch("travel.config.DATA_DIRECTORY", tempDir):
+			cfg: Config = Config("testconfig")
+			cfg["test"] = "somevalue"
+			self.assertTrue(cfg.save())
+			fileName: str = os.path.join(tempDir, f"{cfg.name}.json")
+			with open(fileName, "rb") as fileObj:
+				self.assertEqual(fileObj.read(), b'{\r\n  "test": "somevalue"\r\n}')
+			# Unchanged configurations are not written.
+			self.assertFalse(cfg.save())
+			cfg["test"] = "othervalue"
+			self.assertTrue(cfg.save())
+			self.assertEqual(os.listdir(tempDir), [f"{cfg.name}.json"])
+			# A failed write leaves the existing file intact.
+			cfg["test"] = "failed"
+			with patch("travel.config.os.replace", side_effect=OSError()):
+				with self.assertRaises(OSError):
+					cfg.save()
+			self.assertEqual(os.listdir(tempDir), [f"{cfg.name}.json"])
+			self.assertEqual(Config("testconfig")["test"], "othervalue")
+
+	def test_cache(self) -> None:
+		with tempfile.TemporaryDirectory() as tempDir, patch("travel.config.DATA_DIRECTORY", tempDir):
+			fileName: str = os.path.join(tempDir, "testconfig.json")
+			with open(fileName, "w", encoding="utf-8") as fileObj:
+				json.dump({"maps_client": {"timeout": 20}}, fileObj)
+			with patch("travel.config.json.load", wraps=json.load) as mockLoad:
+				first: Config = Config("testconfig")
+				second: Config = Config("testconfig")
+				self.assertEqual(mockLoad.call_count, 1)
+			# Instances do not share the parsed data.
+			first["maps_client"]["timeout"] = 5
+			self.assertEqual(second["maps_client"]["timeout"], 20)
+			self.assertFalse(second.refresh())
+			with open(fileName, "w", encoding="utf-8") as fileObj:
+				json.dump({"maps_client": {"timeout": 300}}, fileObj)
+			self.assertTrue(second.changed())
+			self.assertTrue(second.refresh())
+			self.assertEqual(second["maps_client"]["timeout"], 300)
+			self.assertFalse(second.changed())
+			self.addCleanup(Config._instances.pop, "testconfig", None)
+			self.assertIs(Config.shared("testconfig"), Config.shared("testconfig"))
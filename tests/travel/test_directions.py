@@ -0,0 +1,358 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+# Third-party Modules:
+import requests
+from bs4 import BeautifulSoup
+from googlemaps.exceptions import ApiError, Timeout
+from requests.adapters import HTTPAdapter
+
+# Travel Directions Modules:
+from travel.directions import (
+	DirectionsError,
+	InvalidAPIKeyError,
+	MissingAPIKeyError,
+	RouteDetails,
+	build_params,
+	create_client,
+	create_session,
+	error_message,
+	fetch_directions,
+	get_directions,
+	instructions_to_text,
+	iter_route_chunks,
+	prewarm,
+	process_leg,
+	process_results,
+	process_route,
+	process_step,
+	process_sub_step,
+	to_timestamp,
+	update_client,
+)
+from travel.models import Leg, Quantity, Route, Step
+
+
+WALKING_STEP: dict[str, Any] = {
+	"travel_mode": "WALKING",
+	"html_instructions": "Walk to <b>Main St</b> &amp; <b>1st Ave</b>",
+	"distance": {"text": "0.2 mi", "value": 322},
+	"duration": {"text": "4 mins", "value": 240},
+	"steps": [
+		{
+			"travel_mode": "WALKING",
+			"html_instructions": (
+				"Turn <b>left</b> onto <b>Main St</b>"
+				+ '<div style="font-size:0.9em">Destination will be on the right</div>'
+			),
+			"distance": {"text": "0.1 mi", "value": 161},
+			"duration": {"text": "2 mins", "value": 120},
+		}
+	],
+}
+
+TRANSIT_STEP: dict[str, Any] = {
+	"travel_mode": "TRANSIT",
+	"html_instructions": "Bus towards Downtown",
+	"distance": {"text": "3.4 mi", "value": 5472},
+	"duration": {"text": "15 mins", "value": 900},
+	"transit_details": {
+		"departure_time": {"text": "8:05am"},
+		"arrival_time": {"text": "8:20am"},
+		"departure_stop": {"name": "Main St & 1st Ave"},
+		"arrival_stop": {"name": "Central Station"},
+		"headsign": "Downtown",
+		"num_stops": 6,
+		"line": {"short_name": "42", "name": "Crosstown", "vehicle": {"name": "Bus"}},
+	},
+}
+
+LEG: dict[str, Any] = {
+	"start_address": "123 Main St",
+	"end_address": "Central Station",
+	"distance": {"text": "3.6 mi", "value": 5794},
+	"duration": {"text": "19 mins", "value": 1140},
+	"departure_time": {"text": "8:01am"},
+	"arrival_time": {"text": "8:20am"},
+	"steps": [WALKING_STEP, TRANSIT_STEP],
+}
+
+ROUTE: dict[str, Any] = {"legs": [LEG], "warnings": ["Walking directions are in beta."]}
+
+INSTRUCTIONS: tuple[str, ...] = (
+	"",
+	"Head <b>north</b> on <b>Main St</b> toward <b>1st Ave</b>",
+	"Turn <b>right</b> onto <b>Elm St</b>",
+	'Turn <b>left</b> to stay on <b>I-90 W</b><div style="font-size:0.9em">Toll road</div>',
+	(
+		'Take exit <b>12</b> for <b>NY-7</b> toward <b>Troy</b>/<wbr/><b>Albany</b>'
+		+ '<div style="font-size:0.9em">Partial toll road</div>'
+		+ '<div style="font-size:0.9em">Entering New York</div>'
+	),
+	"Keep <b>left</b> at the fork, follow signs for <b>O&#39;Hare</b> &amp; <b>Chicago</b>",
+	"Walk to Caf&eacute; &quot;Le Monde&quot; &lt;Plaza Level&gt;",
+	'Continue onto <b>Route 9</b>\n<div style="font-size:0.9em">  </div>',
+	"<div>Restricted usage road</div> <div>Destination will be on the left</div>",
+	"Take the <B>ferry</B> to <b class=\"x\">Island</b><br/>",
+	"Slight <b>right</b><!-- comment -->onto the ramp",
+)
+
+
+class TestBuildParams(TestCase):
+	def test_driving(self) -> None:
+		params: dict[str, Any] = build_params(
+			" Home ",
+			"Work",
+			"Driving",
+			waypoints=["", " Store "],
+			optimize_waypoints=True,
+			avoid=["tolls"],
+			departure_time=1000,
+		)
+		self.assertEqual(
+			params,
+			{
+				"origin": "Home",
+				"destination": "Work",
+				"mode": "driving",
+				"alternatives": True,
+				"language": "en",
+				"region": "us",
+				"units": "imperial",
+				"waypoints": ["Store"],
+				"optimize_waypoints": True,
+				"avoid": ["tolls"],
+			},
+		)
+		self.assertNotIn("waypoints", build_params("Home", "Work", waypoints=[""]))
+
+	def test_transit(self) -> None:
+		params: dict[str, Any] = build_params("Home", "Work", "transit", waypoints=["Store"], avoid=["tolls"])
+		self.assertIsNone(params["departure_time"])
+		self.assertNotIn("waypoints", params)
+		self.assertNotIn("avoid", params)
+		departure: datetime = datetime(2022, 1, 2, 3, 4, tzinfo=timezone.utc)
+		params = build_params(
+			"Home",
+			"Work",
+			"transit",
+			departure_time=departure,
+			transit_mode="rail",
+			transit_routing_preference="fewer_transfers",
+		)
+		self.assertEqual(params["departure_time"], int(departure.timestamp()))
+		self.assertEqual(params["transit_mode"], "rail")
+		self.assertEqual(params["transit_routing_preference"], "fewer_transfers")
+		params = build_params("Home", "Work", "transit", departure_time=1000, arrival_time=2000)
+		self.assertEqual(params["arrival_time"], 2000)
+		self.assertNotIn("departure_time", params)
+
+	def test_invalid(self) -> None:
+		with self.assertRaises(DirectionsError):
+			build_params(" ", "Work")
+		with self.assertRaises(DirectionsError):
+			build_params("Home", "Work", "flying")
+		with self.assertRaises(DirectionsError):
+			build_params("Home", "Work", avoid=["traffic"])
+		with self.assertRaises(DirectionsError):
+			build_params("Home", "Work", "transit", transit_mode="ferry")
+
+	def test_to_timestamp(self) -> None:
+		self.assertEqual(to_timestamp(1000.5), 1000)
+		self.assertEqual(to_timestamp(datetime(1970, 1, 1, 0, 1, tzinfo=timezone.utc)), 60)
+
+
+class TestClient(TestCase):
+	def test_lazy_imports(self) -> None:
+		# Importing the module must not import the maps client or its dependencies, since they slow startup.
+		modules: set[str] = {"dateutil", "googlemaps", "numpy", "requests", "urllib3"}
+		code: str = f"import sys, travel.directions; print(sorted(set(sys.modules) & {modules!r}))"
+		env: dict[str, str] = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+		process: subprocess.CompletedProcess[str] = subprocess.run(
+			[sys.executable, "-c", code],
+			capture_output=True,
+			text=True,
+			env=env,
+		)
+		self.assertEqual(process.returncode, 0, process.stderr)
+		self.assertEqual(process.stdout.strip(), "[]")
+
+	def test_create_client(self) -> None:
+		with self.assertRaises(MissingAPIKeyError):
+			create_client({"key": " "})
+		with self.assertRaises(InvalidAPIKeyError):
+			create_client({"key": "abc"})
+		client: Any = create_client({"key": "AIzaTestKey", "base_url": "http://127.0.0.1:8765"})
+		self.assertEqual(client.base_url, "http://127.0.0.1:8765")
+		self.assertIsInstance(client.session.get_adapter("https://maps.googleapis.com"), HTTPAdapter)
+		update_client(client, {"timeout": 5})
+		self.assertEqual(client.timeout, 5)
+		self.assertEqual(client.requests_kwargs["timeout"], 5)
+		self.assertEqual(client.retry_timeout, timedelta(seconds=60))
+		client = create_client({"key": "AIzaTestKey"}, retry=False)
+		self.assertFalse(client.retry_over_query_limit)
+		self.assertEqual(client.session.get_adapter("https://maps.googleapis.com").max_retries.total, 0)
+
+	def test_create_session(self) -> None:
+		session: requests.Session = create_session({"workers": 6, "retries": 3, "compression": False})
+		adapter: Any = session.get_adapter("https://maps.googleapis.com")
+		self.assertEqual(adapter._pool_maxsize, 6)
+		self.assertEqual(adapter.max_retries.connect, 3)
+		# Server errors are left for googlemaps.Client to retry.
+		self.assertEqual(adapter.max_retries.status, 0)
+		self.assertEqual(session.headers["Accept-Encoding"], "identity")
+		self.assertEqual(session.headers["Connection"], "keep-alive")
+		session = create_session({"pool_size": 2, "keep_alive": False})
+		adapter = session.get_adapter("http://127.0.0.1")
+		self.assertEqual(adapter._pool_maxsize, 2)
+		self.assertEqual(session.headers["Accept-Encoding"], "gzip, deflate")
+		self.assertEqual(session.headers["Connection"], "close")
+		# When the caller owns retries, nothing is retried by the session.
+		session = create_session({"retries": 3}, retry=False)
+		adapter = session.get_adapter("https://maps.googleapis.com")
+		self.assertEqual(adapter.max_retries.total, 0)
+		self.assertEqual(adapter.max_retries.connect, 0)
+
+	def test_prewarm(self) -> None:
+		client: Mock = Mock(base_url="https://maps.googleapis.com", timeout=5)
+		prewarm(client)
+		client.session.head.assert_called_once_with(
+			"https://maps.googleapis.com", timeout=5, allow_redirects=False
+		)
+		# Failures are not fatal, since the first request will connect anyway.
+		client.session.head.side_effect = requests.ConnectionError()
+		prewarm(client)
+
+	def test_get_directions(self) -> None:
+		client: Mock = Mock()
+		client.directions.return_value = [ROUTE]
+		cache: Mock = Mock()
+		cache.get.return_value = None
+		params: dict[str, Any] = {"origin": "Home", "destination": "Work"}
+		self.assertEqual(get_directions(client, params, cache), [ROUTE])
+		client.directions.assert_called_once_with(**params)
+		cache.put.assert_called_once_with(params, [ROUTE])
+		client.reset_mock()
+		cache.get.return_value = [ROUTE]
+		self.assertEqual(get_directions(client, params, cache), [ROUTE])
+		client.directions.assert_not_called()
+		self.assertEqual(fetch_directions(client, params, cache), ([ROUTE], True))
+		cache.get.return_value = None
+		self.assertEqual(fetch_directions(client, params, cache), ([ROUTE], False))
+		self.assertEqual(fetch_directions(client, params), ([ROUTE], False))
+
+	def test_error_message(self) -> None:
+		self.assertEqual(error_message(Timeout()), "The server failed to respond.")
+		self.assertEqual(error_message(ApiError("OVER_QUERY_LIMIT", "Slow down.")), "Slow down.")
+		self.assertEqual(error_message(ApiError("ZERO_RESULTS")), "ZERO_RESULTS")
+
+
+class TestInstructions(TestCase):
+	def test_instructions_to_text(self) -> None:
+		# Golden output produced by the BeautifulSoup based formatter this replaced.
+		for html_instructions in INSTRUCTIONS:
+			with self.subTest(html_instructions=html_instructions):
+				soup: BeautifulSoup = BeautifulSoup(
+					html_instructions.replace("<b>", "").replace("</b>", ""), "html.parser"
+				)
+				expected: tuple[str, ...] = tuple(str(i) for i in soup.find_all(string=True))
+				self.assertEqual(instructions_to_text(html_instructions), expected)
+		self.assertEqual(
+			instructions_to_text(INSTRUCTIONS[3]), ("Turn left to stay on I-90 W", "Toll road")
+		)
+
+	def test_memoization(self) -> None:
+		instructions_to_text.cache_clear()
+		instructions_to_text(INSTRUCTIONS[1])
+		instructions_to_text(INSTRUCTIONS[1])
+		self.assertEqual(instructions_to_text.cache_info().hits, 1)
+
+
+class TestFormatting(TestCase):
+	def test_process_leg(self) -> None:
+		self.assertEqual(
+			process_leg(Leg.from_dict(LEG)),
+			[
+				"From: 123 Main St\nTo: Central Station",
+				"Total Distance: 3.6 mi (19 mins)",
+				"Departing: 8:01am",
+				"Arriving: 8:20am",
+			],
+		)
+
+	def test_process_step(self) -> None:
+		self.assertEqual(
+			process_step(Step.from_dict(WALKING_STEP)),
+			["Walk to main st & 1st ave", "Travel 0.2 mi (about 4 mins)"],
+		)
+		self.assertEqual(
+			process_step(Step.from_dict(TRANSIT_STEP)),
+			[
+				"At 8:05am, board 42 crosstown bus to downtown from main st & 1st ave "
+				+ "\ntravel 6 stops, travel 3.4 mi (about 15 mins)",
+				"At 8:20am disembark at central station",
+			],
+		)
+
+	def test_process_sub_step(self) -> None:
+		self.assertEqual(
+			process_sub_step(Step.from_dict(WALKING_STEP["steps"][0])),
+			[
+				"* Turn left onto main st\n* destination will be on the right",
+				"* Travel 0.1 mi (about 2 mins)",
+			],
+		)
+		self.assertEqual(process_sub_step(Step("WALKING", distance=Quantity("1 mi"))), [])
+
+	def test_process_route(self) -> None:
+		text: str = process_route(Route.from_dict(ROUTE))
+		self.assertTrue(text.startswith("From: 123 Main St\nTo: Central Station\n"))
+		self.assertTrue(text.endswith("\n\nWalking directions are in beta."))
+		self.assertIn("* Turn left onto main st\n", text)
+		self.assertEqual(process_results([ROUTE, ROUTE]), [text, text])
+
+	def test_iter_route_chunks(self) -> None:
+		route: Route = Route.from_dict(ROUTE)
+		chunks: list[list[str]] = list(iter_route_chunks(route))
+		# One chunk for the leg, for each step and sub step, and for the warnings.
+		self.assertEqual(len(chunks), 5)
+		self.assertEqual(chunks[0], process_leg(Leg.from_dict(LEG)))
+		self.assertEqual(chunks[1], process_step(Step.from_dict(WALKING_STEP)))
+		self.assertEqual(chunks[2], process_sub_step(Step.from_dict(WALKING_STEP["steps"][0])))
+		self.assertEqual(chunks[-1], ["", "Walking directions are in beta."])
+		self.assertEqual("\n".join(line for chunk in chunks for line in chunk), process_route(route))
+
+	def test_route_details(self) -> None:
+		details: RouteDetails = RouteDetails([ROUTE, ROUTE, ROUTE])
+		self.assertEqual(len(details), 3)
+		self.assertEqual(details.summaries(), ["Route 1", "Route 2", "Route 3"])
+		with patch("travel.directions.process_route", return_value="text") as mockProcessRoute:
+			self.assertEqual(details.next_unformatted(), 0)
+			self.assertEqual(details[1], "text")
+			self.assertEqual(details[1], "text")
+			mockProcessRoute.assert_called_once_with(Route.from_dict(ROUTE))
+			self.assertTrue(details.is_formatted(1))
+			self.assertFalse(details.is_formatted(0))
+			self.assertEqual(list(details), ["text"] * 3)
+			self.assertEqual(mockProcessRoute.call_count, 3)
+		self.assertIsNone(details.next_unformatted())
+		self.assertEqual(len(RouteDetails([])), 0)
+		details = RouteDetails([ROUTE])
+		self.assertEqual(list(details.iter_chunks(0)), list(iter_route_chunks(Route.from_dict(ROUTE))))
+		self.assertFalse(details.is_formatted(0))
+		details.store(0, "streamed")
+		self.assertEqual(details[0], "streamed")
@@ -0,0 +1,125 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import csv
+import io
+import json
+from typing import Any
+from unittest import TestCase
+from unittest.mock import Mock
+from xml.etree import ElementTree
+
+# Travel Directions Modules:
+from travel.export import (
+	ChunkedWriter,
+	CsvExporter,
+	GpxExporter,
+	JsonLinesExporter,
+	TextExporter,
+	create_exporter,
+	export_format,
+	export_trips,
+)
+from travel.models import Leg, Quantity, Route, Step
+
+
+ROUTES: list[Route] = [
+	Route(
+		summary="Main St",
+		legs=[
+			Leg(
+				"Home",
+				"Work",
+				distance=Quantity("1 mi", 1609),
+				steps=[
+					Step(
+						"DRIVING",
+						"Head <b>north</b> on <b>Main St</b>",
+						distance=Quantity("0.5 mi", 805),
+						duration=Quantity("1 min", 60),
+						polyline="_p~iF~ps|U_ulLnnqC",
+					),
+					Step("DRIVING", "Turn <b>right</b><div>Destination will be on the left</div>"),
+				],
+			)
+		],
+	),
+	Route(summary="Elm St", legs=[Leg("Home", "Work", steps=[Step("WALKING", "Walk", polyline="_mqNvxq`@")])]),
+]
+TRIPS: list[tuple[Any, list[Route], Any]] = [(1, ROUTES, None), ("bad", [], "The server failed to respond.")]
+
+
+class TestExport(TestCase):
+	def test_chunked_writer(self) -> None:
+		fileObj: Mock = Mock()
+		writer: ChunkedWriter = ChunkedWriter(fileObj, chunk_size=10)
+		self.assertEqual(writer.write("abcd"), 4)
+		writer.write("efgh")
+		fileObj.write.assert_not_called()
+		writer.write("ij")
+		fileObj.write.assert_called_once_with("abcdefghij")
+		writer.write("k")
+		writer.flush()
+		fileObj.write.assert_called_with("k")
+		fileObj.flush.assert_called_once_with()
+
+	def test_export_format(self) -> None:
+		self.assertEqual(export_format("trips.GPX"), "gpx")
+		self.assertEqual(export_format("trips"), "txt")
+		self.assertEqual(export_format("trips.xml", default="jsonl"), "jsonl")
+		self.assertIsInstance(create_exporter(io.StringIO(), "csv"), CsvExporter)
+		with self.assertRaises(ValueError):
+			create_exporter(io.StringIO(), "xml")
+
+	def test_text(self) -> None:
+		output: io.StringIO = io.StringIO()
+		self.assertEqual(export_trips(TRIPS, output, TextExporter.extension), 2)
+		text: str = output.getvalue()
+		self.assertTrue(text.startswith("Trip 1\n\nRoute 1, via Main St\nFrom: Home\nTo: Work\n"))
+		self.assertIn("Head north on main st\nTravel 0.5 mi (about 1 min)\n", text)
+		self.assertIn("\nRoute 2, via Elm St\n", text)
+		self.assertTrue(text.endswith("\nTrip bad\nError: The server failed to respond.\n"))
+
+	def test_jsonl(self) -> None:
+		output: io.StringIO = io.StringIO()
+		export_trips(TRIPS, output, JsonLinesExporter.extension)
+		records: list[dict[str, Any]] = [json.loads(line) for line in output.getvalue().splitlines()]
+		self.assertEqual([record["id"] for record in records], [1, "bad"])
+		self.assertEqual(records[0]["routes"][1], "From: Home\nTo: Work\nWalk")
+		self.assertEqual(records[1], {"id": "bad", "routes": [], "error": "The server failed to respond."})
+
+	def test_gpx(self) -> None:
+		output: io.StringIO = io.StringIO()
+		export_trips(TRIPS, output, GpxExporter.extension)
+		namespace: dict[str, str] = {"gpx": "http://www.topografix.com/GPX/1/1"}
+		root: ElementTree.Element = ElementTree.fromstring(output.getvalue())
+		tracks: list[ElementTree.Element] = root.findall("gpx:trk", namespace)
+		self.assertEqual(
+			[track.findtext("gpx:name", namespaces=namespace) for track in tracks],
+			["Trip 1, Route 1, via Main St", "Trip 1, Route 2, via Elm St"],
+		)
+		points: list[dict[str, str]] = [
+			point.attrib for point in tracks[0].findall("gpx:trkseg/gpx:trkpt", namespace)
+		]
+		self.assertEqual(
+			points, [{"lat": "38.50000", "lon": "-120.20000"}, {"lat": "40.70000", "lon": "-120.95000"}]
+		)
+
+	def test_csv(self) -> None:
+		output: io.StringIO = io.StringIO()
+		with CsvExporter(output, chunk_size=1) as exporter:
+			for trip in TRIPS:
+				exporter.write(*trip)
+		rows: list[dict[str, str]] = list(csv.DictReader(io.StringIO(output.getvalue())))
+		self.assertEqual(len(rows), 4)
+		self.assertEqual(rows[0]["instructions"], "Head north on Main St")
+		self.assertEqual(rows[0]["distance_meters"], "805")
+		self.assertEqual(rows[1]["instructions"], "Turn right Destination will be on the left")
+		self.assertEqual((rows[2]["route"], rows[2]["travel_mode"]), ("2", "WALKING"))
+		self.assertEqual((rows[3]["trip"], rows[3]["error"]), ("bad", "The server failed to respond."))
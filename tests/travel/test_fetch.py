@@ -0,0 +1,73 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import threading
+from concurrent.futures import Future
+from typing import Any
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+# Travel Directions Modules:
+from travel.fetch import FetchPool, RateLimiter
+
+
+class TestRateLimiter(TestCase):
+	@patch("travel.fetch.time")
+	def test_acquire(self, mockTime: Mock) -> None:
+		clock: list[float] = [0.0]
+		mockTime.monotonic.side_effect = lambda: clock[0]
+		mockTime.sleep.side_effect = lambda delay: clock.__setitem__(0, clock[0] + delay)
+		limiter: RateLimiter = RateLimiter(rate=2.0, burst=2)
+		self.assertEqual(limiter.acquire(), 0.0)
+		self.assertEqual(limiter.acquire(), 0.0)
+		# The bucket is empty, so the next token takes half a second to arrive.
+		self.assertAlmostEqual(limiter.acquire(), 0.5)
+		self.assertAlmostEqual(clock[0], 0.5)
+		self.assertEqual(RateLimiter(rate=0).acquire(), 0.0)
+
+
+class TestFetchPool(TestCase):
+	def setUp(self) -> None:
+		self.release: threading.Event = threading.Event()
+		self.calls: list[dict[str, Any]] = []
+
+	def fetch(self, params: dict[str, Any]) -> Any:
+		self.calls.append(params)
+		self.release.wait(5)
+		if params["destination"] == "error":
+			raise ValueError("Bad destination.")
+		return params["destination"]
+
+	def test_deduplication(self) -> None:
+		pool: FetchPool = FetchPool(self.fetch, workers=2, queries_per_second=0)
+		first: Future[Any] = pool.submit({"origin": "a", "destination": "b"})
+		second: Future[Any] = pool.submit({"origin": "A ", "destination": "b"})
+		third: Future[Any] = pool.submit({"origin": "a", "destination": "error"})
+		self.release.set()
+		self.assertEqual(first.result(5), "b")
+		self.assertEqual(second.result(5), "b")
+		with self.assertRaises(ValueError):
+			third.result(5)
+		pool.shutdown()
+		self.assertEqual(len(self.calls), 2)
+
+	def test_supersession(self) -> None:
+		pool: FetchPool = FetchPool(self.fetch, workers=1, queries_per_second=0)
+		running: Future[Any] = pool.submit({"origin": "a", "destination": "b"}, group="search")
+		queued: Future[Any] = pool.submit({"origin": "a", "destination": "c"}, group="search")
+		latest: Future[Any] = pool.submit({"origin": "a", "destination": "d"}, group="search")
+		self.assertTrue(running.cancelled())
+		self.assertTrue(queued.cancelled())
+		self.assertTrue(pool.is_latest(latest, "search"))
+		self.assertFalse(pool.is_latest(running, "search"))
+		self.release.set()
+		self.assertEqual(latest.result(5), "d")
+		pool.shutdown()
+		# The superseded request that had not started yet was never sent.
+		self.assertNotIn({"origin": "a", "destination": "c"}, self.calls)
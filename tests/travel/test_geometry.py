@@ -0,0 +1,112 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import random
+from typing import Any
+from unittest import TestCase
+
+# Third-party Modules:
+import numpy as np
+from googlemaps.convert import encode_polyline
+
+# Travel Directions Modules:
+from travel.directions import RouteDetails
+from travel.geometry import (
+	RouteGeometry,
+	bounding_box,
+	decode_polyline,
+	decode_polylines,
+	haversine,
+	path_length,
+	route_geometries,
+	simplify,
+)
+from travel.models import Route
+
+
+# The example from the documentation of the Encoded Polyline Algorithm Format.
+EXAMPLE: str = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+EXAMPLE_COORDINATES: list[list[float]] = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+
+
+class TestGeometry(TestCase):
+	def test_decode_polyline(self) -> None:
+		np.testing.assert_allclose(decode_polyline(EXAMPLE), EXAMPLE_COORDINATES)
+		self.assertEqual(decode_polyline("").shape, (0, 2))
+		self.assertEqual(decode_polylines([]), [])
+		with self.assertRaises(ValueError):
+			decode_polyline("_p~iF~ps|U_")  # Ends in the middle of a value.
+		with self.assertRaises(ValueError):
+			decode_polyline("_p~iF")  # A latitude without a longitude.
+		with self.assertRaises(ValueError):
+			decode_polyline("_p~iF ~ps|U")
+
+	def test_decode_polylines(self) -> None:
+		rng: random.Random = random.Random(0)
+		paths: list[list[tuple[float, float]]] = [
+			[
+				(round(rng.uniform(-90, 90), 5), round(rng.uniform(-180, 180), 5))
+				for counter in range(rng.randrange(0, 20))
+			]
+			for path in range(50)
+		]
+		# Every polyline starts from zero, even though they are decoded together.
+		decoded: list[np.ndarray] = decode_polylines([encode_polyline(path) if path else "" for path in paths])
+		self.assertEqual(len(decoded), len(paths))
+		for path, coordinates in zip(paths, decoded):
+			np.testing.assert_allclose(coordinates, np.asarray(path, dtype=float).reshape(-1, 2), atol=1e-9)
+
+	def test_measurements(self) -> None:
+		# One degree of latitude, and one degree of longitude at the equator.
+		coordinates: np.ndarray = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 0.0], [0.0, 0.0], [0.0, 1.0]])
+		np.testing.assert_allclose(haversine(coordinates), [111195.08, 0.0, 111195.08, 111195.08], rtol=1e-6)
+		self.assertAlmostEqual(path_length(coordinates), 333585.24, places=1)
+		self.assertEqual(path_length(coordinates[:1]), 0.0)
+		self.assertEqual(bounding_box(coordinates), (0.0, 0.0, 1.0, 1.0))
+		self.assertIsNone(bounding_box(np.empty((0, 2))))
+
+	def test_simplify(self) -> None:
+		# A straight line with a small wobble, and one large detour.
+		latitudes: np.ndarray = np.linspace(0.0, 0.01, 11)
+		longitudes: np.ndarray = np.zeros(11)
+		longitudes[3] = 0.000001
+		longitudes[7] = 0.001
+		coordinates: np.ndarray = np.column_stack((latitudes, longitudes))
+		simplified: np.ndarray = simplify(coordinates, 10.0)
+		np.testing.assert_array_equal(simplified, coordinates[[0, 6, 7, 8, 10]])
+		np.testing.assert_array_equal(simplify(coordinates, 1000.0), coordinates[[0, 10]])
+		np.testing.assert_array_equal(simplify(coordinates, 0), coordinates)
+
+	def test_route_geometries(self) -> None:
+		first: str = encode_polyline([(38.5, -120.2), (40.7, -120.95)])
+		second: str = encode_polyline([(40.7, -120.95), (43.252, -126.453)])
+		steps: list[dict[str, Any]] = [
+			{"travel_mode": "DRIVING", "polyline": {"points": first}},
+			{"travel_mode": "DRIVING", "polyline": {"points": second}},
+		]
+		routes: list[Route] = [
+			Route.from_dict({"legs": [{"start_address": "a", "end_address": "b", "steps": steps}]}),
+			Route.from_dict({"legs": [], "overview_polyline": {"points": EXAMPLE}}),
+			Route.from_dict({"legs": []}),
+		]
+		geometries: list[RouteGeometry] = route_geometries(routes)
+		# The point where the steps meet is not repeated.
+		np.testing.assert_allclose(geometries[0].coordinates, EXAMPLE_COORDINATES)
+		np.testing.assert_allclose(geometries[1].coordinates, EXAMPLE_COORDINATES)
+		self.assertAlmostEqual(geometries[0].length, path_length(np.asarray(EXAMPLE_COORDINATES)))
+		self.assertEqual(geometries[0].bounds, (38.5, -126.453, 43.252, -120.2))
+		self.assertEqual(len(geometries[2]), 0)
+		self.assertIsNone(geometries[2].bounds)
+		self.assertEqual(len(route_geometries(routes[:2], tolerance=1e6)[0]), 2)
+
+	def test_route_details(self) -> None:
+		details: RouteDetails = RouteDetails([{"legs": [], "overview_polyline": {"points": EXAMPLE}}])
+		geometry: RouteGeometry = details.geometry(0)
+		self.assertIs(details.geometry(0), geometry)
+		np.testing.assert_allclose(geometry.coordinates, EXAMPLE_COORDINATES)
@@ -0,0 +1,100 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import gzip
+import logging
+import os.path
+import queue
+import sys
+import tempfile
+from typing import Any
+from unittest import TestCase
+from unittest.mock import Mock
+
+# Travel Directions Modules:
+from travel.logs import CompressingRotatingFileHandler, DeferredQueueHandler, startLogging, stopLogging
+
+
+class TestLogs(TestCase):
+	def setUp(self) -> None:
+		self.tempDir = tempfile.TemporaryDirectory()
+		self.fileName: str = os.path.join(self.tempDir.name, "debug.log")
+		root: logging.Logger = logging.getLogger()
+		self.rootLevel: int = root.level
+		self.rootHandlers: list[logging.Handler] = root.handlers[:]
+
+	def tearDown(self) -> None:
+		stopLogging()
+		root: logging.Logger = logging.getLogger()
+		for handler in root.handlers[:]:
+			root.removeHandler(handler)
+		for handler in self.rootHandlers:
+			root.addHandler(handler)
+		root.setLevel(self.rootLevel)
+		self.tempDir.cleanup()
+
+	def test_rotation(self) -> None:
+		handler = CompressingRotatingFileHandler(self.fileName, maxBytes=64, backupCount=2, encoding="utf-8")
+		handler.setFormatter(logging.Formatter("%(message)s"))
+		for counter in range(4):
+			handler.emit(logging.makeLogRecord({"msg": str(counter) * 40}))
+		handler.close()
+		# Each record fills the file, so the oldest was discarded.
+		with gzip.open(f"{self.fileName}.1.gz", "rt", encoding="utf-8") as fileObj:
+			self.assertEqual(fileObj.read(), "2" * 40 + "\n")
+		with gzip.open(f"{self.fileName}.2.gz", "rt", encoding="utf-8") as fileObj:
+			self.assertEqual(fileObj.read(), "1" * 40 + "\n")
+		self.assertFalse(os.path.exists(f"{self.fileName}.3.gz"))
+		self.assertFalse(os.path.exists(f"{self.fileName}.1"))
+		with open(self.fileName, "r", encoding="utf-8") as fileObj:
+			self.assertEqual(fileObj.read(), "3" * 40 + "\n")
+
+	def test_deferred_formatting(self) -> None:
+		records: queue.SimpleQueue[Any] = queue.SimpleQueue()
+		handler = DeferredQueueHandler(records)
+		handler.emit(logging.makeLogRecord({"msg": "Value: %s, %d", "args": ("text", 5)}))
+		record: logging.LogRecord = records.get_nowait()
+		# Immutable arguments are only merged into the message when the listener formats the record.
+		self.assertFalse(hasattr(record, "message"))
+		self.assertEqual(record.args, ("text", 5))
+		self.assertEqual(record.getMessage(), "Value: text, 5")
+		# Mutable arguments are merged immediately, so later changes to them are not logged.
+		params: dict[str, Any] = {"origin": "Home"}
+		argument: Mock = Mock()
+		handler.emit(logging.makeLogRecord({"msg": "Params: %s %s", "args": (params, argument)}))
+		params["origin"] = "Work"
+		record = records.get_nowait()
+		self.assertFalse(record.args)
+		self.assertEqual(record.getMessage(), f"Params: {{'origin': 'Home'}} {argument}")
+		# Tracebacks are formatted immediately, and the exception is not kept.
+		try:
+			raise ValueError("Failed.")
+		except ValueError:
+			handler.emit(
+				logging.getLogger("travel.test").makeRecord(
+					"travel.test", logging.ERROR, __file__, 0, "Error", (), sys.exc_info()
+				)
+			)
+		record = records.get_nowait()
+		self.assertIsNone(record.exc_info)
+		self.assertIn("ValueError: Failed.", record.exc_text or "")
+		formatted: str = logging.Formatter("%(message)s").format(record)
+		self.assertTrue(formatted.startswith("Error\nTraceback"))
+
+	def test_start_logging(self) -> None:
+		startLogging("INFO", {"log_file": self.fileName, "log_max_bytes": 0})
+		logger: logging.Logger = logging.getLogger("travel.test")
+		self.assertFalse(logger.isEnabledFor(logging.DEBUG))
+		logger.debug("Dropped %s", "early")
+		logger.info("Kept %s", "message")
+		stopLogging()
+		with open(self.fileName, "r", encoding="utf-8") as fileObj:
+			lines: list[str] = fileObj.read().splitlines()
+		self.assertEqual(len(lines), 1)
+		self.assertTrue(lines[0].startswith('INFO: from travel.test in MainThread: "Kept message" @ '))
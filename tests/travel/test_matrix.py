@@ -0,0 +1,186 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import io
+import os.path
+import tempfile
+import threading
+from collections.abc import Sequence
+from typing import Any
+from unittest import TestCase
+
+# Third-party Modules:
+import numpy as np
+from googlemaps.exceptions import TransportError
+
+# Travel Directions Modules:
+from travel.cache import DirectionsCache
+from travel.directions import DirectionsError
+from travel.matrix import (
+	MAX_ELEMENTS,
+	DistanceMatrix,
+	build_matrix_params,
+	chunk_matrix,
+	get_matrix,
+	read_locations,
+)
+
+
+def element(origin: str, destination: str) -> dict[str, Any]:
+	if destination == "Nowhere":
+		return {"status": "ZERO_RESULTS"}
+	seconds: int = abs(int(origin[1:]) - int(destination[1:])) * 60
+	return {
+		"status": "OK",
+		"duration": {"text": "", "value": seconds},
+		"distance": {"text": "", "value": seconds * 10},
+	}
+
+
+class FakeClient(object):
+	def __init__(self, fail: bool = False) -> None:
+		self.fail: bool = fail
+		self.requests: list[tuple[list[str], list[str]]] = []
+		self._lock: threading.Lock = threading.Lock()
+
+	def distance_matrix(self, origins: Sequence[str], destinations: Sequence[str], **kwargs: Any) -> Any:
+		with self._lock:
+			self.requests.append((list(origins), list(destinations)))
+		if self.fail:
+			raise TransportError("Connection refused.")
+		return {
+			"status": "OK",
+			"rows": [
+				{"elements": [element(origin, destination) for destination in destinations]}
+				for origin in origins
+			],
+		}
+
+
+class TestMatrixParams(TestCase):
+	def test_build_matrix_params(self) -> None:
+		params: dict[str, Any] = build_matrix_params("Driving", avoid="tolls", departure_time=1000)
+		self.assertEqual(params["mode"], "driving")
+		self.assertEqual(params["avoid"], "tolls")
+		self.assertEqual(params["departure_time"], 1000)
+		params = build_matrix_params("transit", avoid="tolls", arrival_time=2000, transit_mode="bus")
+		self.assertNotIn("avoid", params)
+		self.assertEqual(params["arrival_time"], 2000)
+		self.assertEqual(params["transit_mode"], "bus")
+		with self.assertRaises(DirectionsError):
+			build_matrix_params("flying")
+		with self.assertRaises(DirectionsError):
+			build_matrix_params("driving", avoid="hills")
+		with self.assertRaises(DirectionsError):
+			build_matrix_params("driving", avoid="indoor")
+		with self.assertRaises(DirectionsError):
+			build_matrix_params("transit", transit_mode="ferry")
+
+	def test_chunk_matrix(self) -> None:
+		self.assertEqual(list(chunk_matrix(0, 5)), [])
+		self.assertEqual(list(chunk_matrix(3, 4)), [(range(0, 3), range(0, 4))])
+		blocks: list[tuple[range, range]] = list(chunk_matrix(60, 30))
+		covered: set[tuple[int, int]] = set()
+		for rows, columns in blocks:
+			self.assertLessEqual(len(rows), 25)
+			self.assertLessEqual(len(columns), 25)
+			self.assertLessEqual(len(rows) * len(columns), MAX_ELEMENTS)
+			covered.update((row, column) for row in rows for column in columns)
+		self.assertEqual(len(covered), 60 * 30)
+		self.assertEqual(len(blocks), 15 * 2)
+
+	def test_read_locations(self) -> None:
+		self.assertEqual(read_locations(io.StringIO(" Home \n\nWork\n")), ["Home", "Work"])
+
+
+class TestDistanceMatrix(TestCase):
+	def setUp(self) -> None:
+		self.matrix: DistanceMatrix = DistanceMatrix(["a", "b", "c"], ["x", "y"])
+		values: list[list[int]] = [[300, 100], [200, 400], [100, 50]]
+		for row, items in enumerate(values):
+			for column, value in enumerate(items):
+				self.matrix.set_cell(
+					row, column, {"status": "OK", "duration": {"value": value}, "distance": {"value": value * 2}}
+				)
+		self.matrix.set_cell(1, 1, {"status": "ZERO_RESULTS"})
+
+	def test_set_cell(self) -> None:
+		self.assertEqual(self.matrix.shape, (3, 2))
+		self.assertTrue(np.isnan(self.matrix.durations[1, 1]))
+		self.assertEqual(self.matrix.statuses[1][1], "ZERO_RESULTS")
+		self.matrix.set_cell(
+			0,
+			0,
+			{"status": "OK", "duration": {"value": 10}, "duration_in_traffic": {"value": 20}},
+		)
+		# Durations in traffic are preferred.
+		self.assertEqual(self.matrix.durations[0, 0], 20)
+		with self.assertRaises(ValueError):
+			self.matrix.values("speed")
+
+	def test_nearest(self) -> None:
+		self.assertEqual(self.matrix.nearest_origins(0, 2), [(2, 100.0), (1, 200.0)])
+		# Origins without a route are excluded.
+		self.assertEqual(self.matrix.nearest_origins(1, 5), [(2, 50.0), (0, 100.0)])
+		self.assertEqual(self.matrix.nearest_destinations(0, 1, by="distance"), [(1, 200.0)])
+		self.assertEqual(self.matrix.nearest_destinations(0, 0), [])
+
+	def test_write_csv(self) -> None:
+		output: io.StringIO = io.StringIO()
+		self.matrix.write_csv(output)
+		lines: list[str] = output.getvalue().splitlines()
+		self.assertEqual(lines[0], "origin,destination,status,duration,distance")
+		self.assertEqual(lines[1], "a,x,OK,300,600")
+		self.assertEqual(lines[4], "b,y,ZERO_RESULTS,,")
+		self.assertEqual(len(lines), 7)
+
+
+class TestGetMatrix(TestCase):
+	def setUp(self) -> None:
+		self.tempDir = tempfile.TemporaryDirectory()
+		self.cache: DirectionsCache = DirectionsCache(
+			os.path.join(self.tempDir.name, "matrix.json"), max_entries=1000
+		)
+		self.params: dict[str, Any] = build_matrix_params("driving")
+
+	def tearDown(self) -> None:
+		self.tempDir.cleanup()
+
+	def test_get_matrix(self) -> None:
+		client: FakeClient = FakeClient()
+		origins: list[str] = [f"o{index}" for index in range(30)]
+		destinations: list[str] = [f"d{index}" for index in range(12)] + ["Nowhere"]
+		matrix: DistanceMatrix = get_matrix(
+			origins, destinations, self.params, client.distance_matrix, self.cache, workers=4
+		)
+		self.assertEqual(len(client.requests), 5)
+		for request_origins, request_destinations in client.requests:
+			self.assertLessEqual(len(request_origins) * len(request_destinations), MAX_ELEMENTS)
+		self.assertEqual(matrix.durations[5, 2], 180)
+		self.assertEqual(matrix.distances[5, 2], 1800)
+		self.assertTrue(np.isnan(matrix.durations[:, -1]).all())
+		self.assertEqual(len(self.cache), 30 * 13)
+		# Only pairs that are not cached are requested.
+		client.requests.clear()
+		matrix = get_matrix(
+			origins[:3] + ["o99"], destinations[:2], self.params, client.distance_matrix, self.cache
+		)
+		self.assertEqual(client.requests, [(["o99"], ["d0", "d1"])])
+		self.assertEqual(matrix.durations[0, 1], 60)
+		self.assertEqual(matrix.durations[3, 0], 99 * 60)
+
+	def test_get_matrix_failure(self) -> None:
+		client: FakeClient = FakeClient(fail=True)
+		with self.assertLogs("travel.matrix", "WARNING"):
+			matrix: DistanceMatrix = get_matrix(
+				["o1", "o2"], ["d1"], self.params, client.distance_matrix, self.cache
+			)
+		self.assertTrue(np.isnan(matrix.durations).all())
+		self.assertEqual(matrix.statuses, [["Connection refused."], ["Connection refused."]])
+		self.assertEqual(len(self.cache), 0)
@@ -0,0 +1,78 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import json
+import math
+import os.path
+import tempfile
+from typing import Any
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+# Travel Directions Modules:
+from travel.metrics import Metrics, percentile
+
+
+class TestMetrics(TestCase):
+	def test_percentile(self) -> None:
+		values: list[float] = [float(value) for value in range(1, 101)]
+		self.assertEqual(percentile(values, 50), 50.0)
+		self.assertEqual(percentile(values, 95), 95.0)
+		self.assertEqual(percentile(values, 100), 100.0)
+		self.assertEqual(percentile([3.0], 99), 3.0)
+		self.assertTrue(math.isnan(percentile([], 50)))
+
+	@patch("travel.metrics.time")
+	def test_span(self, mockTime: Mock) -> None:
+		mockTime.perf_counter.side_effect = [1.0, 1.25, 2.0, 2.5]
+		metrics: Metrics = Metrics()
+		with metrics.span("fetch"):
+			pass
+		with self.assertRaises(ValueError):
+			with metrics.span("fetch"):
+				raise ValueError("Durations are recorded even when an exception is raised.")
+		metrics.increment("cache.hit")
+		metrics.increment("cache.hit", 2)
+		summary: dict[str, Any] = metrics.summary()
+		self.assertEqual(summary["stages"]["fetch"], {"count": 2, "p50": 0.25, "p95": 0.5, "p99": 0.5})
+		self.assertEqual(summary["counters"], {"cache.hit": 3})
+		self.assertEqual(
+			metrics.format_summary(), ["fetch: p50 250.0 ms, p95 500.0 ms, p99 500.0 ms (2 samples)", "cache.hit: 3"]
+		)
+		metrics.reset()
+		self.assertEqual(metrics.format_summary(), ["No measurements yet."])
+
+	def test_window(self) -> None:
+		metrics: Metrics = Metrics(window=3)
+		for value in range(5):
+			metrics.record("stage", float(value))
+		# Only the most recent durations are summarized.
+		self.assertEqual(metrics.summary()["stages"]["stage"]["count"], 3)
+		self.assertEqual(metrics.summary()["stages"]["stage"]["p50"], 3.0)
+		metrics.enabled = False
+		metrics.record("stage", 10.0)
+		metrics.increment("counter")
+		self.assertEqual(metrics.summary()["stages"]["stage"]["count"], 3)
+		self.assertEqual(metrics.summary()["counters"], {})
+
+	def test_export(self) -> None:
+		metrics: Metrics = Metrics()
+		with tempfile.TemporaryDirectory() as tempDir:
+			fileName: str = os.path.join(tempDir, "metrics.jsonl")
+			metrics.export_to(fileName)
+			metrics.record("fetch", 0.5)
+			metrics.increment("api.errors")
+			metrics.export_to(None)
+			metrics.record("fetch", 0.75)
+			with open(fileName, "r", encoding="utf-8") as fileObj:
+				records: list[dict[str, Any]] = [json.loads(line) for line in fileObj]
+		self.assertEqual([(item["name"], item.get("duration"), item.get("count")) for item in records], [
+			("fetch", 0.5, None),
+			("api.errors", None, 1),
+		])
@@ -0,0 +1,67 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import json
+import os.path
+import tempfile
+import threading
+from typing import Any
+from unittest import TestCase
+
+# Third-party Modules:
+import googlemaps
+from googlemaps.exceptions import ApiError, TransportError
+
+# Travel Directions Modules:
+from travel.directions import create_client, process_results
+from travel.mockserver import MockDirectionsServer, load_recordings
+from travel.samples import SAMPLES
+
+
+class TestMockServer(TestCase):
+	def setUp(self) -> None:
+		self.server: MockDirectionsServer = MockDirectionsServer(("127.0.0.1", 0), seed=0)
+		self.thread: threading.Thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+		self.thread.start()
+		self.client: googlemaps.Client = create_client(  # type: ignore[no-any-unimported]
+			{"key": "AIzaMockKey", "timeout": 5, "base_url": self.server.base_url}
+		)
+
+	def tearDown(self) -> None:
+		self.server.shutdown()
+		self.server.server_close()
+		self.thread.join()
+
+	def test_responses(self) -> None:
+		response: Any = self.client.directions("Home", "Work", mode="transit")
+		self.assertEqual(response, SAMPLES["transit"]())
+		response = self.client.directions("Home", "Work", alternatives=True)
+		self.assertEqual(len(process_results(response)), len(SAMPLES["alternatives"]()))
+		self.assertEqual(self.server.counts["ok"], 2)
+
+	def test_failures(self) -> None:
+		self.server.denied_rate = 1.0
+		with self.assertRaises(ApiError):
+			self.client.directions("Home", "Work")
+		self.server.denied_rate = 0.0
+		self.server.drop_rate = 1.0
+		with self.assertRaises(TransportError):
+			self.client.directions("Home", "Work")
+		self.assertEqual(self.server.counts["denied"], 1)
+		self.assertGreaterEqual(self.server.counts["drop"], 1)
+
+	def test_recordings(self) -> None:
+		with tempfile.TemporaryDirectory() as tempDir:
+			fileName: str = os.path.join(tempDir, "recording.json")
+			with open(fileName, "w", encoding="utf-8") as fileObj:
+				json.dump({"status": "OK", "routes": SAMPLES["short_walk"]()}, fileObj)
+			self.server.responder = load_recordings([fileName])
+		self.assertEqual(self.client.directions("Home", "Work"), SAMPLES["short_walk"]())
+		with self.assertRaises(ValueError):
+			load_recordings([])
@@ -0,0 +1,84 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+from typing import Any
+from unittest import TestCase
+
+# Travel Directions Modules:
+from travel.models import Leg, Quantity, Route, Step, TransitDetails, parse_response
+
+
+RESPONSE: list[dict[str, Any]] = [
+	{
+		"summary": "I-90 W",
+		"overview_polyline": {"points": "a~l~Fjk~uOwHJy@P"},
+		"warnings": [],
+		"legs": [
+			{
+				"start_address": "Home",
+				"end_address": "Work",
+				"distance": {"text": "1.2 mi", "value": 1931},
+				"duration": {"text": "5 mins", "value": 300},
+				"steps": [
+					{
+						"travel_mode": "TRANSIT",
+						"polyline": {"points": "a~l~Fjk~uOwHJy@P"},
+						"transit_details": {
+							"departure_stop": {"name": "Main St", "location": {"lat": 1, "lng": 2}},
+							"line": {"short_name": "42", "vehicle": {"name": "Bus", "type": "BUS"}},
+							"num_stops": 3,
+						},
+						"steps": [{"travel_mode": "WALKING", "html_instructions": "Walk"}],
+					}
+				],
+			},
+			{
+				"start_address": "Work",
+				"end_address": "Gym",
+				"distance": {"text": "0.5 mi", "value": 805},
+				"duration": {"text": "2 mins", "value": 120},
+				"steps": [],
+			},
+		],
+	}
+]
+
+
+class TestModels(TestCase):
+	def test_parse_response(self) -> None:
+		routes: list[Route] = parse_response(RESPONSE)
+		self.assertEqual(len(routes), 1)
+		route: Route = routes[0]
+		self.assertEqual(route.summary, "I-90 W")
+		self.assertEqual(route.warnings, ())
+		self.assertEqual(route.duration, 420)
+		self.assertEqual(route.distance, 2736)
+		leg: Leg = route.legs[0]
+		self.assertEqual(leg.distance, Quantity("1.2 mi", 1931))
+		self.assertIsNone(leg.departure_time)
+		step: Step = leg.steps[0]
+		self.assertEqual(
+			step.transit_details,
+			TransitDetails(departure_stop="Main St", num_stops=3, line_short_name="42", vehicle_name="Bus"),
+		)
+		self.assertEqual(step.steps, (Step("WALKING", "Walk"),))
+		self.assertIsNone(Route.from_dict({"legs": []}).warnings)
+		self.assertIsNone(Route.from_dict({"legs": []}).duration)
+
+	def test_slots(self) -> None:
+		# Unused fields, such as bounds, are not kept. Polylines are kept encoded.
+		route: Route = parse_response(RESPONSE)[0]
+		step: Step = route.legs[0].steps[0]
+		self.assertFalse(hasattr(step, "__dict__"))
+		with self.assertRaises(AttributeError):
+			setattr(step, "bounds", {})
+		self.assertEqual(step.polyline, "a~l~Fjk~uOwHJy@P")
+		self.assertEqual(route.overview_polyline, "a~l~Fjk~uOwHJy@P")
+		self.assertEqual(repr(Quantity("1 mi", 1609)), "Quantity(text='1 mi', value=1609)")
+		self.assertNotEqual(Quantity("1 mi"), Step("WALKING"))
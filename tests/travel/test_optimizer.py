@@ -0,0 +1,171 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import itertools
+import threading
+from collections.abc import Sequence
+from typing import Any, Optional
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+# Third-party Modules:
+import numpy as np
+
+# Travel Directions Modules:
+from travel.fetch import RateLimiter
+from travel.optimizer import (
+	nearest_neighbour,
+	optimize_order,
+	or_opt_move,
+	plan_route,
+	split_tour,
+	stitch_routes,
+	tour_cost,
+	two_opt_move,
+)
+
+
+def line_costs(positions: Sequence[float]) -> np.ndarray:
+	points: np.ndarray = np.asarray(positions, dtype=float)
+	costs: np.ndarray = np.abs(points[:, np.newaxis] - points[np.newaxis, :])
+	return costs
+
+
+def brute_force(costs: np.ndarray) -> float:
+	count: int = len(costs)
+	return min(
+		tour_cost([0, *middle, count - 1], costs) for middle in itertools.permutations(range(1, count - 1))
+	)
+
+
+class FakeClient(object):
+	"""Stops are named by their position on a line."""
+
+	def __init__(self) -> None:
+		self.directions_requests: list[dict[str, Any]] = []
+		self.matrix_requests: int = 0
+		self.matrix_avoid: Optional[str] = None
+		self._lock: threading.Lock = threading.Lock()
+
+	def distance_matrix(self, origins: Sequence[str], destinations: Sequence[str], **kwargs: Any) -> Any:
+		if kwargs.get("avoid") not in (None, "tolls", "highways", "ferries"):
+			raise ValueError("Invalid route restriction.")  # As googlemaps does.
+		with self._lock:
+			self.matrix_requests += 1
+			self.matrix_avoid = kwargs.get("avoid")
+		return {
+			"rows": [
+				{
+					"elements": [
+						{"status": "OK", "duration": {"value": abs(int(origin) - int(destination))}}
+						for destination in destinations
+					]
+				}
+				for origin in origins
+			]
+		}
+
+	def directions(self, **kwargs: Any) -> Any:
+		with self._lock:
+			self.directions_requests.append(kwargs)
+		stops: list[str] = [kwargs["origin"], *kwargs.get("waypoints", ()), kwargs["destination"]]
+		legs: list[dict[str, Any]] = [
+			{"start_address": start, "end_address": end, "steps": []} for start, end in zip(stops, stops[1:])
+		]
+		return [{"summary": "Main St", "legs": legs, "warnings": ["Tolls"]}]
+
+
+class TestOrdering(TestCase):
+	def test_nearest_neighbour(self) -> None:
+		costs: np.ndarray = line_costs([0, 5, 1, 2, 10])
+		self.assertEqual(nearest_neighbour(costs), [0, 2, 3, 1, 4])
+		self.assertEqual(nearest_neighbour(line_costs([0, 1])), [0, 1])
+
+	def test_moves(self) -> None:
+		costs: np.ndarray = line_costs([0, 3, 2, 1, 4])
+		improved: Any = two_opt_move([0, 1, 2, 3, 4], costs)
+		self.assertEqual(improved, [0, 3, 2, 1, 4])
+		self.assertIsNone(two_opt_move(improved, costs))
+		costs = line_costs([0, 2, 3, 1, 4])
+		improved = or_opt_move([0, 1, 2, 3, 4], costs)
+		self.assertEqual(improved, [0, 3, 1, 2, 4])
+		self.assertIsNone(or_opt_move(improved, costs))
+
+	def test_optimize_order(self) -> None:
+		generator: np.random.RandomState = np.random.RandomState(1)
+		for count in range(2, 8):
+			costs: np.ndarray = generator.uniform(1, 100, (count, count))  # Asymmetric.
+			order: list[int] = optimize_order(costs)
+			self.assertEqual(order[0], 0)
+			self.assertEqual(order[-1], count - 1)
+			self.assertEqual(sorted(order), list(range(count)))
+			self.assertLessEqual(tour_cost(order, costs), tour_cost(nearest_neighbour(costs), costs))
+		costs = line_costs([0, 7, 3, 9, 1, 5, 10])
+		self.assertAlmostEqual(tour_cost(optimize_order(costs), costs), brute_force(costs))
+
+	def test_optimize_order_unreachable(self) -> None:
+		costs: np.ndarray = line_costs([0, 1, 2, 3])
+		costs[1, 2] = np.nan
+		self.assertEqual(optimize_order(costs), [0, 2, 1, 3])
+
+
+class TestPlanRoute(TestCase):
+	def test_split_tour(self) -> None:
+		stops: list[str] = [str(index) for index in range(8)]
+		self.assertEqual(
+			split_tour(stops, max_waypoints=2), [["0", "1", "2", "3"], ["3", "4", "5", "6"], ["6", "7"]]
+		)
+		self.assertEqual(split_tour(stops[:4], max_waypoints=2), [stops[:4]])
+
+	def test_stitch_routes(self) -> None:
+		first: list[dict[str, Any]] = [{"summary": "A", "legs": [1, 2], "warnings": ["Tolls"]}]
+		second: list[dict[str, Any]] = [{"summary": "B", "legs": [3], "warnings": ["Tolls", "Ferry"]}]
+		route: dict[str, Any] = stitch_routes([first, second], [1, 0])[0]
+		self.assertEqual(route["summary"], "A, B")
+		self.assertEqual(route["legs"], [1, 2, 3])
+		self.assertEqual(route["warnings"], ["Tolls", "Ferry"])
+		self.assertEqual(route["waypoint_order"], [1, 0])
+		self.assertEqual(stitch_routes([first, []], []), [])
+
+	def test_plan_route(self) -> None:
+		client: FakeClient = FakeClient()
+		params: dict[str, Any] = {"origin": "0", "destination": "9", "waypoints": ["5", "2"], "mode": "driving"}
+		plan_route(client, params)
+		self.assertEqual(client.directions_requests, [params])
+		self.assertEqual(client.matrix_requests, 0)
+		client.directions_requests.clear()
+		waypoints: list[str] = ["8", "3", "6", "1", "7", "2", "5", "4"]
+		params = {**params, "waypoints": waypoints, "optimize_waypoints": True, "alternatives": True}
+		response: list[dict[str, Any]] = plan_route(client, params, max_waypoints=2)
+		self.assertGreater(client.matrix_requests, 0)
+		self.assertEqual(len(client.directions_requests), 3)
+		for request in client.directions_requests:
+			self.assertLessEqual(len(request["waypoints"]), 2)
+			self.assertFalse(request["optimize_waypoints"])
+			self.assertFalse(request["alternatives"])
+		self.assertEqual(len(response), 1)
+		addresses: list[str] = [leg["start_address"] for leg in response[0]["legs"]]
+		self.assertEqual(addresses, [str(index) for index in range(9)])
+		self.assertEqual([waypoints[index] for index in response[0]["waypoint_order"]], addresses[1:])
+		self.assertEqual(response[0]["warnings"], ["Tolls"])
+		client.directions_requests.clear()
+		plan_route(client, {**params, "avoid": ["indoor", "tolls"]}, max_waypoints=2)
+		self.assertEqual(client.matrix_avoid, "tolls")
+		for request in client.directions_requests:
+			self.assertEqual(request["avoid"], ["indoor", "tolls"])
+		# Requests share the rate limiter of the caller, and go through its resilience policy.
+		limiter: RateLimiter = RateLimiter(0)
+		resilience: Mock = Mock()
+		resilience.call.side_effect = lambda request: request()
+		client = FakeClient()
+		with patch.object(limiter, "acquire", return_value=0.0) as acquire:
+			plan_route(client, params, max_waypoints=2, limiter=limiter, resilience=resilience)
+		requests: int = client.matrix_requests + len(client.directions_requests)
+		self.assertEqual(acquire.call_count, requests)
+		self.assertEqual(resilience.call.call_count, requests)
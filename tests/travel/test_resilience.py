@@ -0,0 +1,112 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import itertools
+import threading
+from typing import Any
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+# Third-party Modules:
+from googlemaps.exceptions import ApiError, HTTPError, Timeout, TransportError, _OverQueryLimit
+
+# Travel Directions Modules:
+from travel.resilience import CircuitBreaker, CircuitOpenError, Resilience, backoff_delay, is_transient
+
+
+class TestResilience(TestCase):
+	@patch("travel.resilience.random")
+	def test_backoff_delay(self, mockRandom: Mock) -> None:
+		mockRandom.uniform.side_effect = lambda low, high: high
+		self.assertEqual([backoff_delay(attempt, 0.5, 3.0) for attempt in range(1, 5)], [0.5, 1.0, 2.0, 3.0])
+		mockRandom.uniform.side_effect = lambda low, high: low
+		self.assertEqual(backoff_delay(3, 0.5, 3.0), 0)
+
+	def test_is_transient(self) -> None:
+		self.assertTrue(is_transient(Timeout()))
+		self.assertTrue(is_transient(TransportError("Connection reset.")))
+		self.assertTrue(is_transient(HTTPError(503)))
+		self.assertFalse(is_transient(HTTPError(403)))
+		self.assertFalse(is_transient(ApiError("NOT_FOUND")))
+		self.assertFalse(is_transient(_OverQueryLimit("OVER_QUERY_LIMIT")))
+		self.assertFalse(is_transient(ValueError()))
+
+	@patch("travel.resilience.time")
+	def test_circuit_breaker(self, mockTime: Mock) -> None:
+		mockTime.monotonic.return_value = 100.0
+		breaker: CircuitBreaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+		breaker.record_failure()
+		breaker.allow()
+		breaker.record_failure()
+		self.assertTrue(breaker.is_open)
+		mockTime.monotonic.return_value = 105.5
+		with self.assertRaisesRegex(CircuitOpenError, "in 5 seconds"):
+			breaker.allow()
+		# After the reset timeout, one trial request is allowed through.
+		mockTime.monotonic.return_value = 110.0
+		breaker.allow()
+		with self.assertRaises(CircuitOpenError):
+			breaker.allow()
+		breaker.record_failure()
+		self.assertTrue(breaker.is_open)
+		mockTime.monotonic.return_value = 120.0
+		breaker.allow()
+		breaker.record_success()
+		self.assertFalse(breaker.is_open)
+		breaker.allow()
+
+	def test_retries(self) -> None:
+		calls: itertools.count[int] = itertools.count(1)
+
+		def request() -> Any:
+			if next(calls) < 3:
+				raise Timeout()
+			return ["route"]
+
+		policy: Resilience = Resilience(attempts=3, backoff_base=0, breaker=CircuitBreaker(failure_threshold=0))
+		self.assertEqual(policy.call(request), ["route"])
+		self.assertEqual(next(calls), 4)
+		# Errors that are not transient are not retried.
+		with self.assertRaises(ApiError):
+			policy.call(Mock(side_effect=ApiError("NOT_FOUND")))
+		failing: Mock = Mock(side_effect=TransportError("Connection reset."))
+		with self.assertRaises(TransportError):
+			policy.call(failing)
+		self.assertEqual(failing.call_count, 3)
+
+	def test_circuit_open(self) -> None:
+		policy: Resilience = Resilience(attempts=5, backoff_base=0, breaker=CircuitBreaker(2, 60))
+		failing: Mock = Mock(side_effect=Timeout())
+		with self.assertRaises(Timeout):
+			policy.call(failing)
+		# Retrying stopped once the circuit opened, and further requests are not sent.
+		self.assertEqual(failing.call_count, 2)
+		with self.assertRaises(CircuitOpenError):
+			policy.call(failing)
+		self.assertEqual(failing.call_count, 2)
+
+	def test_hedge(self) -> None:
+		policy: Resilience = Resilience(hedge=True)
+		self.assertIsNone(policy.hedge_delay())
+		for counter in range(20):
+			policy.call(lambda: 0.0)
+		self.assertIsNotNone(policy.hedge_delay())
+		released: threading.Event = threading.Event()
+		calls: itertools.count[int] = itertools.count()
+
+		def request() -> Any:
+			if next(calls) == 0:
+				# The first request stalls until the hedge request has been used.
+				released.wait(5)
+				return "primary"
+			return "hedge"
+
+		self.assertEqual(policy.call(request), "hedge")
+		released.set()
+		policy.shutdown()
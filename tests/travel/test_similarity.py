@@ -0,0 +1,78 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+from collections.abc import Sequence
+from unittest import TestCase
+
+# Travel Directions Modules:
+from travel.directions import RouteDetails
+from travel.models import Leg, Route, Step, TransitDetails
+from travel.similarity import distinct_routes, route_labels, route_tokens, signature, similarity
+
+
+def driving_route(summary: str, roads: Sequence[str]) -> Route:
+	steps: list[Step] = [
+		Step("DRIVING", f"Turn <b>left</b> onto <b>{road}</b>", polyline=f"{road}~") for road in roads
+	]
+	return Route(summary, [Leg("Home", "Work", steps=steps)])
+
+
+def transit_route(lines: Sequence[str]) -> Route:
+	steps: list[Step] = [
+		Step("TRANSIT", f"Bus towards {line}", transit_details=TransitDetails(line_short_name=line))
+		for line in lines
+	]
+	return Route("", [Leg("Home", "Work", steps=steps)])
+
+
+ROADS: list[str] = [f"Road {counter}" for counter in range(30)]
+
+
+class TestSimilarity(TestCase):
+	def test_signature(self) -> None:
+		route: Route = driving_route("", ROADS)
+		self.assertEqual(len(route_tokens(route)), 29 + 30)
+		self.assertEqual(signature(route_tokens(route)), signature(route_tokens(driving_route("", ROADS))))
+		self.assertEqual(signature(set()), ())
+		self.assertEqual(similarity((), ()), 0.0)
+		same: float = similarity(signature(route_tokens(route)), signature(route_tokens(route)))
+		self.assertEqual(same, 1.0)
+		detour: Route = driving_route("", [*ROADS[:15], "Side St", *ROADS[16:]])
+		different: Route = driving_route("", [f"Other {road}" for road in ROADS])
+		self.assertGreater(similarity(signature(route_tokens(route)), signature(route_tokens(detour))), 0.8)
+		self.assertLess(similarity(signature(route_tokens(route)), signature(route_tokens(different))), 0.2)
+
+	def test_distinct_routes(self) -> None:
+		first: Route = driving_route("I-90 W", ROADS)
+		# Differs from the first by a single block.
+		second: Route = driving_route("I-90 W", [*ROADS[:15], "Side St", *ROADS[16:]])
+		third: Route = driving_route("US-20 W", [f"Other {road}" for road in ROADS])
+		self.assertEqual(distinct_routes([first, second, third]), [first, third])
+		self.assertEqual(distinct_routes([first, second, third], threshold=0), [first, second, third])
+		self.assertEqual(distinct_routes([first, first], threshold=1.0), [first])
+		details: RouteDetails = RouteDetails([], 0.8)
+		self.assertEqual(details.suppressed, 0)
+
+	def test_route_labels(self) -> None:
+		routes: list[Route] = [
+			driving_route("I-90 W, Main St", ROADS),
+			driving_route("US-20 W, Main St", ROADS),
+			driving_route("", ROADS),
+		]
+		self.assertEqual(
+			route_labels(routes), ["Route 1, via I-90 W, Main St", "Route 2, via US-20 W, Main St", "Route 3"]
+		)
+		self.assertEqual(route_labels(routes[:2]), ["Route 1, via I-90 W", "Route 2, via US-20 W"])
+		self.assertEqual(route_labels([routes[0], routes[0]]), ["Route 1", "Route 2"])
+		# Transit routes are labeled by their lines.
+		self.assertEqual(
+			route_labels([transit_route(["42", "Red"]), transit_route(["42", "Blue"])]),
+			["Route 1, via Red", "Route 2, via Blue"],
+		)
+		self.assertEqual(route_labels([transit_route(["42"])]), ["Route 1, via 42"])
@@ -0,0 +1,99 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import queue
+import threading
+from typing import Any
+from unittest import TestCase
+from unittest.mock import Mock
+
+# Travel Directions Modules:
+from travel.speech import SpeechQueue, create_speech_queue, speaking_time, split_utterances
+
+
+class FakeSpeech(object):
+	def __init__(self, count: int) -> None:
+		self.spoken: list[tuple[str, bool]] = []
+		self.silenced: threading.Event = threading.Event()
+		self.silence_count: int = 0
+		self.done: threading.Event = threading.Event()
+		self.said: queue.SimpleQueue[str] = queue.SimpleQueue()
+		self._count: int = count
+
+	def say(self, text: str, interrupt: bool = False) -> None:
+		self.spoken.append((text, interrupt))
+		self.said.put(text)
+		if len(self.spoken) >= self._count:
+			self.done.set()
+
+	def silence(self) -> None:
+		self.silence_count += 1
+		self.silenced.set()
+
+
+class TestSpeech(TestCase):
+	def test_split_utterances(self) -> None:
+		self.assertEqual(
+			split_utterances("3 Routes found. Saved 2 minutes ago.\n\nRoute 1, via I-90\n"),
+			["3 Routes found.", "Saved 2 minutes ago.", "Route 1, via I-90"],
+		)
+		self.assertEqual(
+			split_utterances("Turn left onto Main St, then turn right onto Elm St", max_length=30),
+			["Turn left onto Main St,", "then turn right onto Elm St"],
+		)
+		self.assertEqual(split_utterances("abcdefgh ij", max_length=4), ["abcd", "efgh", "ij"])
+		self.assertEqual(split_utterances("A long line with no limit", max_length=0), ["A long line with no limit"])
+		self.assertEqual(speaking_time("one two three", 120), 1.5)
+		self.assertEqual(speaking_time("one two three", 0), 0.0)
+		speechQueue: SpeechQueue = create_speech_queue({"max_utterance_length": 20, "words_per_minute": 0})
+		self.assertEqual((speechQueue.max_length, speechQueue.words_per_minute), (20, 0))
+
+	def test_say(self) -> None:
+		speech: FakeSpeech = FakeSpeech(3)
+		backend: Mock = Mock(return_value=speech)
+		speechQueue: SpeechQueue = SpeechQueue(backend, words_per_minute=0)
+		speechQueue.say("Planning Trip.", True)
+		speechQueue.say("2 Routes found.\nRoute 1, via Main St")
+		self.assertEqual(len(speechQueue), 3)
+		speechQueue.start()
+		self.assertTrue(speech.done.wait(5))
+		speechQueue.stop(timeout=5)
+		backend.assert_called_once_with()
+		self.assertEqual(
+			speech.spoken, [("Planning Trip.", True), ("2 Routes found.", False), ("Route 1, via Main St", False)]
+		)
+
+	def test_interrupt(self) -> None:
+		speech: FakeSpeech = FakeSpeech(2)
+		# At 1 word per minute, each utterance is still being spoken for the rest of the test.
+		speechQueue: SpeechQueue = SpeechQueue(lambda: speech, words_per_minute=1)
+		speechQueue.say("Route 1. Head north. Turn left.")
+		speechQueue.start()
+		self.assertEqual(speech.said.get(timeout=5), "Route 1.")
+		# Interrupting utterances do not wait for the previous to finish.
+		speechQueue.say("Route 2.", True)
+		self.assertEqual(speech.said.get(timeout=5), "Route 2.")
+		speechQueue.say("Unspoken.")
+		speechQueue.interrupt()
+		self.assertTrue(speech.silenced.wait(5))
+		speechQueue.interrupt()  # Nothing is playing, so the screen reader is not silenced again.
+		speechQueue.stop(timeout=5)
+		self.assertEqual(len(speechQueue), 0)
+		self.assertEqual(speech.spoken, [("Route 1.", False), ("Route 2.", True)])
+		self.assertEqual(speech.silence_count, 1)
+
+	def test_backend_error(self) -> None:
+		def backend() -> Any:
+			raise ImportError("No screen reader.")
+
+		speechQueue: SpeechQueue = SpeechQueue(backend, words_per_minute=0)
+		with self.assertLogs("travel.speech", "ERROR"):
+			speechQueue.start()
+			speechQueue.say("Dropped.")
+			speechQueue.stop(timeout=5)
@@ -0,0 +1,88 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import os.path
+import sqlite3
+import tempfile
+from typing import Any, Optional
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+# Travel Directions Modules:
+from travel.store import RouteStore, StoredResponse, format_age
+
+
+class TestRouteStore(TestCase):
+	def setUp(self) -> None:
+		self.tempDir = tempfile.TemporaryDirectory()
+		self.fileName: str = os.path.join(self.tempDir.name, "routes.sqlite3")
+		self.store: RouteStore = RouteStore(self.fileName, max_entries=2)
+
+	def tearDown(self) -> None:
+		self.store.close()
+		self.tempDir.cleanup()
+
+	def test_format_age(self) -> None:
+		self.assertEqual(format_age(30), "less than a minute")
+		self.assertEqual(format_age(60), "1 minute")
+		self.assertEqual(format_age(7500), "2 hours")
+		self.assertEqual(format_age(86400 * 3 + 5), "3 days")
+
+	@patch("travel.store.time")
+	def test_put_get(self, mockTime: Mock) -> None:
+		mockTime.time.return_value = 1000.0
+		self.store.max_entries = 10
+		params: dict[str, Any] = {"origin": "Home", "destination": "Work", "mode": "driving", "avoid": ["tolls"]}
+		self.assertIsNone(self.store.get(params))
+		self.store.put(params, [{"summary": "tolls avoided"}])
+		mockTime.time.return_value = 1100.0
+		self.store.put({**params, "avoid": []}, [{"summary": "tolls allowed"}])
+		mockTime.time.return_value = 1200.0
+		stored: Optional[StoredResponse] = self.store.get(params)
+		self.assertEqual(stored, StoredResponse([{"summary": "tolls avoided"}], 1000.0))
+		self.assertEqual(stored.age if stored is not None else None, 200.0)
+		# Routes with different options are never substituted.
+		self.assertIsNone(self.store.get({**params, "avoid": ["ferries"]}))
+		self.assertIsNone(self.store.get({**params, "waypoints": ["Store"]}))
+		self.assertIsNone(self.store.get({**params, "mode": "walking"}))
+		# Otherwise, the most recent response for the same route at a different time is used.
+		mockTime.time.return_value = 1300.0
+		self.store.put({**params, "departure_time": 5000}, [{"summary": "later"}])
+		stored = self.store.get({"origin": " HOME", "destination": "work", "mode": "driving", "avoid": ["tolls"]})
+		self.assertEqual(stored, StoredResponse([{"summary": "tolls avoided"}], 1000.0))
+		stored = self.store.get({**params, "departure_time": 9000})
+		self.assertEqual(stored, StoredResponse([{"summary": "later"}], 1300.0, exact=False))
+		self.assertTrue(self.store.is_fresh(params, 300))
+		self.assertFalse(self.store.is_fresh(params, 299))
+		self.assertFalse(self.store.is_fresh({**params, "mode": "walking"}, 300))
+
+	@patch("travel.store.time")
+	def test_persistence(self, mockTime: Mock) -> None:
+		for counter in range(3):
+			mockTime.time.return_value = 1000.0 + counter
+			self.store.put({"origin": "a", "destination": str(counter)}, [counter])
+		# The oldest response was removed.
+		self.assertEqual(len(self.store), 2)
+		self.store.close()
+		self.store = RouteStore(self.fileName)
+		self.assertIsNone(self.store.get({"origin": "a", "destination": "0"}))
+		stored: Optional[StoredResponse] = self.store.get({"origin": "a", "destination": "2"})
+		self.assertEqual(stored.response if stored is not None else None, [2])
+		self.store.clear()
+		self.assertEqual(len(self.store), 0)
+
+	def test_version(self) -> None:
+		self.store.put({"origin": "a", "destination": "b"}, [1])
+		self.store.close()
+		with sqlite3.connect(self.fileName) as connection:
+			connection.execute("PRAGMA user_version = 0")
+		connection.close()
+		# Stores from other versions are discarded.
+		self.store = RouteStore(self.fileName)
+		self.assertEqual(len(self.store), 0)
@@ -0,0 +1,106 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any
+from unittest import TestCase
+
+# Third-party Modules:
+from googlemaps.exceptions import TransportError
+
+# Travel Directions Modules:
+from travel.sweep import (
+	Departure,
+	departure_times,
+	fastest,
+	format_duration,
+	format_table,
+	sweep,
+	trip_duration,
+)
+
+
+START: int = 1_700_000_000 // 3600 * 3600
+
+
+class TestSweep(TestCase):
+	def test_departure_times(self) -> None:
+		start: datetime = datetime(2024, 1, 1, 7, 0)
+		times: list[datetime] = departure_times(start, datetime(2024, 1, 1, 8, 0), timedelta(minutes=20))
+		self.assertEqual([value.minute for value in times], [0, 20, 40, 0])
+		self.assertEqual(departure_times(start, start - timedelta(minutes=1), timedelta(minutes=5)), [])
+		with self.assertRaises(ValueError):
+			departure_times(start, start, timedelta(0))
+		with self.assertRaises(ValueError):
+			departure_times(start, start + timedelta(days=2), timedelta(minutes=5))
+
+	def test_trip_duration(self) -> None:
+		transit: dict[str, Any] = {"legs": [{"duration": {"value": 600}, "arrival_time": {"value": START + 900}}]}
+		# The wait for the first vehicle is included.
+		self.assertEqual(trip_duration(transit, START), 900)
+		driving: dict[str, Any] = {
+			"legs": [
+				{"duration": {"value": 600}, "duration_in_traffic": {"value": 700}},
+				{"duration": {"value": 300}},
+			]
+		}
+		self.assertEqual(trip_duration(driving, START), 1000)
+		self.assertIsNone(trip_duration({"legs": [{}]}, START))
+		self.assertIsNone(trip_duration({"legs": []}, START))
+
+	def test_sweep(self) -> None:
+		requests: list[int] = []
+		lock: threading.Lock = threading.Lock()
+
+		def fetch(params: dict[str, Any]) -> Any:
+			departure: int = params["departure_time"]
+			with lock:
+				requests.append(departure)
+			time.sleep(0.01)  # Identical requests submitted meanwhile share this one.
+			if departure == START + 600:
+				raise TransportError("Connection reset.")
+			# The bus leaves on the half hour, and takes 20 minutes.
+			bus: int = START + (departure - START + 1799) // 1800 * 1800
+			return [
+				{"summary": "Bus", "legs": [{"arrival_time": {"value": bus + 1200}}]},
+				{"summary": "Walk", "legs": [{"duration": {"value": 3000}}]},
+			]
+
+		params: dict[str, Any] = {"origin": "a", "destination": "b", "mode": "transit", "arrival_time": 1}
+		times: list[int] = [START + minutes * 60 for minutes in (0, 10, 20, 30, 60, 62)]
+		departures: list[Departure] = sweep(params, times, fetch, workers=1)
+		self.assertEqual([departure.time for departure in departures], times)
+		self.assertEqual(
+			[departure.duration for departure in departures], [1200, None, 1800, 1200, 1200, 2880]
+		)
+		self.assertEqual(departures[0].summary, "Bus")
+		self.assertEqual(departures[1].error, "Connection reset.")
+		# Departures within the same cache time bucket are searched separately.
+		self.assertEqual(sorted(requests), times)
+		best: Any = fastest(departures)
+		self.assertIs(best, departures[0])
+		requests.clear()
+		sweep(params, [START, START, START + 60], fetch, workers=1)
+		self.assertEqual(sorted(requests), [START, START + 60])
+		self.assertIsNone(fastest(departures[1:2]))
+
+	def test_format(self) -> None:
+		self.assertEqual(format_duration(90), "2 min")
+		self.assertEqual(format_duration(3900), "1 hr 5 min")
+		departures: list[Departure] = [
+			Departure(START, 1800, "I-90"),
+			Departure(START + 600, 1200),
+			Departure(START + 1200, error="No routes found."),
+		]
+		lines: list[str] = format_table(departures)
+		self.assertTrue(lines[0].endswith(": 30 min, via I-90"))
+		self.assertTrue(lines[1].endswith(": 20 min (fastest)"))
+		self.assertTrue(lines[2].endswith(": No routes found."))
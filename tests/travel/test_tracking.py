@@ -0,0 +1,148 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+# Future Modules:
+from __future__ import annotations
+
+# Built-in Modules:
+import time
+from typing import Any, Optional
+from unittest import TestCase
+from unittest.mock import Mock
+
+# Third-party Modules:
+import numpy as np
+from googlemaps.convert import encode_polyline
+
+# Travel Directions Modules:
+from travel.models import Leg, Route, Step
+from travel.tracking import (
+	Fix,
+	Snap,
+	StepIndex,
+	Tracker,
+	TrackingEvent,
+	TrackingSession,
+	parse_fix,
+	parse_nmea,
+	read_fixes,
+	reroute_params,
+	simulate_fixes,
+)
+
+
+# An L shaped route, north for about 1.1 kilometers, then east for about 0.8 kilometers.
+CORNER: tuple[float, float] = (40.01, -75.0)
+NORTH: list[tuple[float, float]] = [(40.0, -75.0), (40.005, -75.0), CORNER]
+EAST: list[tuple[float, float]] = [CORNER, (40.01, -74.995), (40.01, -74.99)]
+ROUTE: Route = Route(
+	legs=[
+		Leg(
+			"Home",
+			"Work",
+			steps=[
+				Step("DRIVING", "Head <b>north</b> on <b>Main St</b>", polyline=encode_polyline(NORTH)),
+				Step("DRIVING", "Turn <b>right</b> onto <b>Elm St</b>", polyline=encode_polyline(EAST)),
+			],
+		)
+	]
+)
+
+
+class TestTracking(TestCase):
+	def test_parse(self) -> None:
+		rmc: Optional[Fix] = parse_nmea("$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A")
+		self.assertIsNotNone(rmc)
+		if rmc is not None:
+			self.assertAlmostEqual(rmc.latitude, 48.1173)
+			self.assertAlmostEqual(rmc.longitude, 11.516667, places=6)
+		gga: Optional[Fix] = parse_nmea("$GPGGA,123519,4807.038,S,01131.000,W,1,08,0.9,545.4,M,46.9,M,,")
+		self.assertEqual(gga, Fix(-48.1173, -11.516666666666667))
+		# Invalid checksum, and no satellite fix.
+		self.assertIsNone(parse_nmea("$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6B"))
+		self.assertIsNone(parse_nmea("$GPRMC,123519,V,4807.038,N,01131.000,E,,,230394,,"))
+		self.assertIsNone(parse_nmea("$GPGSV,3,1,11,03,03,111,00"))
+		self.assertEqual(parse_fix(" 40.5, -75.25\n"), Fix(40.5, -75.25))
+		self.assertIsNone(parse_fix("95,0"))
+		self.assertEqual(list(read_fixes(["latitude,longitude", "1,2", "", "3,4"])), [Fix(1, 2), Fix(3, 4)])
+
+	def test_simulate_fixes(self) -> None:
+		sleep: Mock = Mock()
+		fixes: list[Fix] = list(simulate_fixes(np.array(NORTH), speed=100.0, interval=2.0, sleep=sleep))
+		# About 1112 meters, at 200 meters per fix.
+		self.assertEqual(len(fixes), 7)
+		self.assertEqual(fixes[0], Fix(*NORTH[0]))
+		self.assertEqual(fixes[-1], Fix(*NORTH[-1]))
+		self.assertAlmostEqual(fixes[1].latitude, 40.0 + 200 / 111195.08, places=6)
+		self.assertEqual(sleep.call_count, 6)
+		self.assertEqual(list(simulate_fixes(np.empty((0, 2)))), [])
+
+	def test_step_index(self) -> None:
+		index: StepIndex = StepIndex([np.array(NORTH), np.array(EAST)], cell_size=100.0)
+		self.assertEqual(len(index), 4)
+		snap: Optional[Snap] = index.nearest(Fix(40.005, -75.0002), max_distance=50.0)
+		self.assertIsNotNone(snap)
+		if snap is not None:
+			self.assertEqual(snap.step, 0)
+			self.assertAlmostEqual(snap.distance, 17.0, delta=0.5)
+			self.assertAlmostEqual(snap.remaining, 556.0, delta=1.0)
+		self.assertEqual(getattr(index.nearest(Fix(40.0101, -74.992), 50.0), "step", None), 1)
+		self.assertIsNone(index.nearest(Fix(40.005, -74.99), 50.0))
+		self.assertIsNone(index.nearest(Fix(10.0, 10.0), 50.0))
+		with self.assertRaises(ValueError):
+			StepIndex([np.empty((0, 2))])
+		# Matching a fix only measures the segments near it.
+		rng: np.random.Generator = np.random.default_rng(0)
+		path: np.ndarray = np.cumsum(rng.normal(0, 0.0005, (20000, 2)), axis=0) + (40.0, -75.0)
+		large: StepIndex = StepIndex(np.array_split(path, 500))
+		start: float = time.perf_counter()
+		for point in path[::100]:
+			self.assertIsNotNone(large.nearest(Fix(*point), 50.0))
+		self.assertLess((time.perf_counter() - start) / len(path[::100]), 0.005)
+
+	def test_tracker(self) -> None:
+		tracker: Tracker = Tracker(ROUTE, off_route_fixes=2)
+		event: Optional[TrackingEvent] = tracker.update(Fix(40.0, -75.0))
+		self.assertEqual(
+			getattr(event, "text", None), "Head north on Main St. Next, Turn right onto Elm St."
+		)
+		self.assertIsNone(tracker.update(Fix(40.005, -75.0)))
+		event = tracker.update(Fix(40.01, -74.997))
+		self.assertEqual(getattr(event, "text", None), "Continue to the destination.")
+		# One stray fix is ignored, and the user is told once when they leave the route.
+		self.assertIsNone(tracker.update(Fix(40.02, -74.997)))
+		event = tracker.update(Fix(40.02, -74.997))
+		self.assertEqual(getattr(event, "kind", None), TrackingEvent.OFF_ROUTE)
+		self.assertIsNone(tracker.update(Fix(40.02, -74.997)))
+		event = tracker.update(Fix(40.01, -74.9901))
+		self.assertEqual(getattr(event, "kind", None), TrackingEvent.ARRIVED)
+		self.assertIsNone(tracker.update(Fix(40.01, -74.9901)))
+		with self.assertRaises(ValueError):
+			Tracker(Route(legs=[Leg("Home", "Work", steps=[Step("DRIVING", "Go")])]))
+
+	def test_session(self) -> None:
+		events: list[TrackingEvent] = []
+		fixes: list[Fix] = [Fix(*point) for point in [*NORTH, *EAST]]
+		session: TrackingSession = TrackingSession(Tracker(ROUTE), iter(fixes), events.append)
+		session.start()
+		session._thread.join(5)
+		self.assertFalse(session.running)
+		self.assertEqual([event.kind for event in events], ["step", "step", "arrived"])
+
+	def test_reroute_params(self) -> None:
+		params: dict[str, Any] = {
+			"origin": "Home",
+			"destination": "Work",
+			"mode": "driving",
+			"waypoints": ["Bank", "Store"],
+			"optimize_waypoints": False,
+		}
+		rerouted: dict[str, Any] = reroute_params(params, Fix(40.0, -75.123456789), leg=1)
+		self.assertEqual(rerouted["origin"], "40.000000,-75.123457")
+		self.assertEqual(rerouted["waypoints"], ["Store"])
+		self.assertNotIn("waypoints", reroute_params(params, Fix(0, 0), leg=2))
+		transit: dict[str, Any] = reroute_params({**params, "mode": "transit", "arrival_time": 1}, Fix(0, 0))
+		self.assertNotIn("arrival_time", transit)
+		self.assertIsNone(transit["departure_time"])
@@ -9,6 +9,7 @@ from __future__ import annotations
 # Built-in Modules:
 import os
 import sys
+import tempfile
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
@@ -77,3 +78,18 @@ class TestUtils(TestCase):
 			os.path.join(utils.getDirectoryPath(utils.DATA_DIRECTORY), *subdirectory)
 		)
 		self.assertEqual(utils.getDataPath(*subdirectory), output)
+
+	def test_writeFileAtomic(self) -> None:
+		with tempfile.TemporaryDirectory() as tempDir:
+			fileName: str = os.path.join(tempDir, "data.json")
+			utils.writeFileAtomic(fileName, "first")
+			utils.writeFileAtomic(fileName, "second")
+			with open(fileName, "r", encoding="utf-8") as fileObj:
+				self.assertEqual(fileObj.read(), "second")
+			with patch("travel.utils.os.replace", side_effect=OSError()):
+				with self.assertRaises(OSError):
+					utils.writeFileAtomic(fileName, "third")
+			# The temporary file is removed, and the file is left unchanged.
+			self.assertEqual(os.listdir(tempDir), ["data.json"])
+			with open(fileName, "r", encoding="utf-8") as fileObj:
+				self.assertEqual(fileObj.read(), "second")